@@ -1,6 +1,8 @@
 #streamlit main page
 import streamlit as st
 
+from src.panel import run_timer, show_run_timings
+
 # 페이지 정의
 entry_p = st.Page("pages/01_entry_page.py", title="홈", icon="🏠", default=True)
 nearby_parking_p = st.Page("pages/02_nearby_parkinglots.py", title="Parking Mate", icon="🅿️")
@@ -22,7 +24,7 @@ if st.session_state.prev_page != pg.title:
     # st.write(st.session_state)
 
     # 1. session_state에 유지해야하는 key
-    keep_keys = ['prev_page']
+    keep_keys = ['prev_page', 'run_timings']
 
     # 2. session_state key 중에 keep_keys에 없는 것만 삭제
     for key in list(st.session_state.keys()):
@@ -60,5 +62,7 @@ st.markdown("""
     """
 , unsafe_allow_html=True)
 
-pg.run()
-
+# 페이지 전체 실행 시간 기록 (panel(fragment)만 다시 실행될 때는 app.py를 거치지 않으므로 기록되지 않음)
+with run_timer(f"{pg.title} 페이지 전체"):
+    pg.run()
+show_run_timings()
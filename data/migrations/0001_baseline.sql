@@ -0,0 +1,37 @@
+-- 기본 스키마 (주차장 정보 / API 원본 적재 이력)
+-- 이미 운영 중인 DB는 python -m src.migrate --baseline 1 로 적용된 것으로 기록만 한다.
+CREATE TABLE parking_lot
+(
+    id           int primary key AUTO_INCREMENT,
+    reg_id       varchar(100),
+    name         varchar(250),
+    lat          varchar(100),
+    lng          varchar(100),
+    sido         varchar(100),
+    sigungu      varchar(100),
+    full_address text,
+    space_no     int,
+    coord        POINT NOT NULL SRID 4326,
+    use_yn       char(1) not null default 'Y'
+);
+
+-- 인덱스 추가
+CREATE SPATIAL INDEX geo_index ON parking_lot (coord);
+
+-- API 원본 데이터 (검증 결과 포함, 오류 데이터도 저장)
+CREATE TABLE parking_lot_raw
+(
+    id           int primary key AUTO_INCREMENT,
+    reg_id       varchar(100),
+    name         varchar(250),
+    lat          varchar(100),
+    lng          varchar(100),
+    sido         varchar(100),
+    sigungu      varchar(100),
+    full_address text,
+    space_no     int,
+    err_yn       char(1),
+    err_msg      text,
+    reg_nm       varchar(50),
+    reg_dt       datetime default CURRENT_TIMESTAMP
+);
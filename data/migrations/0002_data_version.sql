@@ -0,0 +1,10 @@
+-- 데이터 버전 관리 테이블
+-- 적재(collect_data)가 parking_lot을 변경할 때마다 version을 1 증가시킨다.
+CREATE TABLE data_version
+(
+    name       varchar(50) primary key,
+    version    int not null default 0,
+    updated_at datetime default CURRENT_TIMESTAMP on update CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (name, version) VALUES ('parking_lot', 0);
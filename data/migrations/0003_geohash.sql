@@ -0,0 +1,11 @@
+-- parking_lot에 geohash cell 컬럼 추가
+-- 적재 시 src/geohash.py로 8자리 geohash를 계산해 저장한다.
+ALTER TABLE parking_lot ADD COLUMN geohash char(8);
+
+-- 기존 데이터 채우기 (ST_GeoHash의 인자 순서는 경도, 위도)
+UPDATE parking_lot
+   SET geohash = ST_GeoHash(CAST(lng AS DOUBLE), CAST(lat AS DOUBLE), 8)
+ WHERE geohash IS NULL;
+
+-- 반경 검색용 B-tree 인덱스 (use_yn = 'Y' AND geohash LIKE 'prefix%')
+CREATE INDEX idx_parking_lot_geohash ON parking_lot (use_yn, geohash);
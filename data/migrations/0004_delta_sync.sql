@@ -0,0 +1,19 @@
+-- 변경분 반영(delta sync)용 스키마
+
+-- 주차장별 저장 필드 해시 (이전 적재와 비교용)
+CREATE TABLE parking_lot_fingerprint
+(
+    prk_center_id varchar(100) primary key,
+    content_hash  char(40) not null,
+    updated_at    datetime default CURRENT_TIMESTAMP on update CURRENT_TIMESTAMP
+);
+
+-- 중복 적재된 주차장은 가장 최근 행만 남기고 정리
+DELETE p1
+  FROM parking_lot p1
+  JOIN parking_lot p2
+    ON p1.reg_id = p2.reg_id
+   AND p1.id < p2.id;
+
+-- ON DUPLICATE KEY UPDATE 기준 키
+CREATE UNIQUE INDEX uq_parking_lot_reg_id ON parking_lot (reg_id);
@@ -0,0 +1,29 @@
+-- 좌표를 숫자(DOUBLE)로 바꾸고 coord를 lat/lng에서 계산되는 generated column으로 변경
+-- 적재 시 WKT 문자열을 만들지 않고, 주변 검색 SQL은 숫자 좌표를 그대로 읽는다.
+
+-- coord는 lat/lng에서 다시 계산하므로 기존 컬럼과 공간 인덱스 삭제
+DROP INDEX geo_index ON parking_lot;
+ALTER TABLE parking_lot DROP COLUMN coord;
+
+ALTER TABLE parking_lot
+    MODIFY lat DOUBLE NOT NULL,
+    MODIFY lng DOUBLE NOT NULL;
+
+-- 공간 인덱스는 STORED + NOT NULL + SRID 지정이 필요
+-- POINT()와 ST_SRID()는 좌표 순서를 바꾸지 않고 x를 경도로 저장하므로 POINT(lng, lat)
+-- (기존 ST_GeomFromText('POINT(lng lat)', 4326, 'axis-order=long-lat')와 같은 값, ST_Distance_Sphere(POINT(lng, lat))와 같은 순서)
+ALTER TABLE parking_lot
+    ADD COLUMN coord POINT SRID 4326 GENERATED ALWAYS AS (ST_SRID(POINT(lng, lat), 4326)) STORED NOT NULL;
+CREATE SPATIAL INDEX idx_parking_lot_coord ON parking_lot (coord);
+
+-- coord에서 다시 읽은 위도/경도가 lat/lng와 같은지 확인 (축이 바뀌었으면 이 문에서 migration이 실패하고, 이후 적재도 거부)
+ALTER TABLE parking_lot
+    ADD CONSTRAINT chk_parking_lot_coord CHECK (ST_Latitude(coord) = lat AND ST_Longitude(coord) = lng);
+
+-- 반경 검색: geohash 조건과 거리 계산에 쓰는 컬럼을 모두 포함한 인덱스
+-- (covering으로 실행되는지, 기존 인덱스보다 빠른지는 측정하지 않았음. 적용 후 EXPLAIN으로 확인)
+DROP INDEX idx_parking_lot_geohash ON parking_lot;
+CREATE INDEX idx_parking_lot_geohash ON parking_lot (use_yn, geohash, lat, lng);
+
+-- 지역 검색 / 시도·시군구 목록
+CREATE INDEX idx_parking_lot_region ON parking_lot (use_yn, sido, sigungu);
@@ -0,0 +1,5 @@
+-- 지역 검색(시도/시군구 + 이름순) keyset pagination용 인덱스
+-- WHERE use_yn = 'Y' AND sido = ? AND sigungu = ? AND (name, id) > (?, ?) ORDER BY name, id LIMIT n
+-- 을 정렬 없이 인덱스 순서대로 n건만 읽어서 처리한다. (내림차순은 같은 인덱스를 역방향으로 읽음)
+DROP INDEX idx_parking_lot_region ON parking_lot;
+CREATE INDEX idx_parking_lot_region ON parking_lot (use_yn, sido, sigungu, name, id);
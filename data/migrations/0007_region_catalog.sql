@@ -0,0 +1,25 @@
+-- 지역(시도/시군구)별 주차장 수, 주차면수 합계, 좌표 범위
+-- 지역 선택 목록과 지도 범위를 parking_lot을 읽지 않고 만든다.
+-- 적재(collect_data)가 변경된 지역만 다시 계산한다. (db_crud.refresh_region_catalog)
+CREATE TABLE region_catalog
+(
+    sido        varchar(100) not null,
+    sigungu     varchar(100) not null,
+    lot_count   int not null,
+    space_total int not null default 0,
+    min_lat     double,
+    min_lng     double,
+    max_lat     double,
+    max_lng     double,
+    updated_at  datetime default CURRENT_TIMESTAMP on update CURRENT_TIMESTAMP,
+    primary key (sido, sigungu)
+);
+
+-- 기존 데이터로 채우기
+INSERT INTO region_catalog (sido, sigungu, lot_count, space_total, min_lat, min_lng, max_lat, max_lng)
+SELECT sido, sigungu, COUNT(*), COALESCE(SUM(space_no), 0), MIN(lat), MIN(lng), MAX(lat), MAX(lng)
+  FROM parking_lot
+ WHERE use_yn = 'Y'
+   AND sido IS NOT NULL
+   AND sigungu IS NOT NULL
+ GROUP BY sido, sigungu;
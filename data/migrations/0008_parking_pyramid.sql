@@ -0,0 +1,40 @@
+-- 축소된 지도(전국/시도 단위)용 집계 피라미드
+-- web mercator tile(z/x/y) 격자마다 주차장 수, 주차면수 합계, 중심 좌표를 zoom 단계별로 저장한다.
+-- 가장 작은 격자(z = 14)는 parking_lot에서, 큰 격자는 바로 아래 단계 격자를 합쳐서 만든다.
+-- 적재(collect_data)가 끝날 때 db_crud.rebuild_parking_pyramid()로 다시 만든다.
+CREATE TABLE parking_lot_pyramid
+(
+    z           tinyint not null,
+    x           int not null,
+    y           int not null,
+    lot_count   int not null,
+    space_total int not null default 0,
+    lat         double not null,
+    lng         double not null,
+    primary key (z, x, y)
+);
+
+-- 기존 데이터로 채우기 (src/viewport.py의 lat_lng_to_tile과 같은 계산)
+INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+SELECT 14, cell_x, cell_y, COUNT(*), COALESCE(SUM(space_no), 0), AVG(lat), AVG(lng)
+  FROM (SELECT FLOOR((lng + 180) / 360 * 16384) AS cell_x,
+               FLOOR((1 - LN(TAN(RADIANS(lat)) + 1 / COS(RADIANS(lat))) / PI()) / 2 * 16384) AS cell_y,
+               lat, lng, space_no
+          FROM parking_lot
+         WHERE use_yn = 'Y') cells
+ GROUP BY cell_x, cell_y;
+
+INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+SELECT 12, x DIV 4, y DIV 4, SUM(lot_count), SUM(space_total),
+       SUM(lat * lot_count) / SUM(lot_count), SUM(lng * lot_count) / SUM(lot_count)
+  FROM parking_lot_pyramid WHERE z = 14 GROUP BY x DIV 4, y DIV 4;
+
+INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+SELECT 10, x DIV 4, y DIV 4, SUM(lot_count), SUM(space_total),
+       SUM(lat * lot_count) / SUM(lot_count), SUM(lng * lot_count) / SUM(lot_count)
+  FROM parking_lot_pyramid WHERE z = 12 GROUP BY x DIV 4, y DIV 4;
+
+INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+SELECT 8, x DIV 4, y DIV 4, SUM(lot_count), SUM(space_total),
+       SUM(lat * lot_count) / SUM(lot_count), SUM(lng * lot_count) / SUM(lot_count)
+  FROM parking_lot_pyramid WHERE z = 10 GROUP BY x DIV 4, y DIV 4;
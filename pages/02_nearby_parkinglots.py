@@ -3,14 +3,22 @@ import warnings
 import streamlit as st
 from streamlit_folium import st_folium
 import folium
-import math
-import urllib
-from folium.plugins import MarkerCluster
 
 from src.db_crud import get_near_parking_data
+from src.db_crud import get_parking_in_viewport
+from src.viewport import update_viewport
+from src.map_layer import marker_layer
+from src.map_view import show_result_map
+from src.panel import timed, rerun_panel, page_buttons
+from src.result_view import get_result_view
 from src.utils import find_address_and_point
 
 ITEMS_PER_PAGE = 4
+SORT_ORDERS = {     # 목록 정렬 방식 (field, 내림차순 여부). 가까운순은 검색 결과 순서 그대로
+    "가까운순 ▼": None,
+    "이름순▼": ("name", True),
+    "이름순▲": ("name", False),
+}
 
 # 1. 페이지 설정
 st.set_page_config(layout="wide", page_title="Parking Mate")
@@ -20,6 +28,10 @@ warnings.filterwarnings('ignore', category=UserWarning)
 st.markdown('', unsafe_allow_html=True)
 
 # 2. 세션 상태 초기화 (데이터 바구니 생성)
+# panel끼리는 아래 값으로만 주고받는다.
+#   search_results, destination: 검색 panel이 바꾸고(페이지 전체 다시 실행) 목록/지도 panel이 읽음
+#   current_page: 목록 panel이 바꾸고 읽음
+#   viewport_mode, viewport: 지도 panel이 바꾸고 읽음
 if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 
@@ -29,17 +41,11 @@ if "current_page" not in st.session_state:  # 리스트에서 현재 탐색중
 if "destination" not in st.session_state:  # 검색 결과
     st.session_state.destination = None
 
-# --- 레이아웃 시작 ---
-
-# 4. 상단 로고 (검색바는 아래 right_col로 이동)
-st.title("🚗 Parking Mate")
-st.write("---")
-st.subheader(f"🔍 검색 결과 ({len(st.session_state.search_results) if len(st.session_state.search_results) > 0 else 0}건)")
-# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
-left_col, right_col = st.columns([1, 2])
 
-# --- 오른쪽 영역: 검색창(상단) + 지도(하단) ---
-with right_col:
+@st.fragment
+@timed("02 검색 panel")
+def search_panel():
+    '''검색 폼. 검색하면 결과를 세션에 넣고 페이지 전체를 다시 실행'''
     # 지도 너비에 맞춘 단일 검색 폼
     with st.form(key='main_search_form'):
         search_input_col, search_btn_col = st.columns([4, 1])
@@ -60,10 +66,16 @@ with right_col:
                 st.session_state.destination = dest
                 parking_lots = get_near_parking_data(dest)
                 st.session_state.search_results = parking_lots
-                st.rerun()  # 데이터를 세션에 넣은 후 화면 즉시 갱신
+                st.session_state.current_page = 1
+                st.rerun()  # 데이터를 세션에 넣은 후 화면 즉시 갱신 (목록/지도 모두)
         else:
             st.warning("검색어를 입력해 주세요.")
 
+
+@st.fragment
+@timed("02 지도 panel")
+def map_panel():
+    '''검색 결과 지도. 지도 범위 보기에서 지도를 움직이면 이 panel만 다시 실행'''
     # 지도 표시 로직
     if st.session_state.search_results and len(st.session_state.search_results) > 0:
         # 사용자가 입력한 장소로 지도 중심 고정
@@ -74,82 +86,54 @@ with right_col:
         center_lat, center_lng = 37.5665, 126.9780  # 서울 기본 위치
         zoom_level = 12
 
-    m = folium.Map(location=[center_lat, center_lng], zoom_start=zoom_level)
-    cluster = MarkerCluster().add_to(m)
+    # 지도 범위 보기: 검색 반경 대신 지도에 보이는 범위의 주차장을 tile 단위로 불러와 표시
+    viewport_mode = st.toggle("지도에 보이는 범위의 주차장 보기", key="viewport_mode")
+    viewport = st.session_state.get('viewport')
+    if viewport_mode and viewport:
+        (center_lat, center_lng), zoom_level = viewport.center, viewport.zoom
 
-    # 목적지 마커 추가
+    # 목적지 마커와 길찾기 출발지
+    destination, origin = None, None
     if st.session_state.destination:
         dest = st.session_state.destination
-        folium.Marker(
-            location=[dest.lat, dest.lng],
-            icon=folium.Icon(color="red", icon="star")
-        ).add_to(m)
-
-    # 주차장 마커 추가
-    for parking_lot in st.session_state.search_results:
-        # 1. 길찾기를 위한 출발지 정보 (검색창에 입력한 위치)
-        if st.session_state.destination:
-            # 주소 전체보다는 사용자가 검색한 명칭이 가독성이 좋습니다.
-            raw_start_name = st.session_state.destination.name if st.session_state.destination.name else "내 목적지"
-            start_lat = st.session_state.destination.lat
-            start_lon = st.session_state.destination.lng
-        else:
-            raw_start_name = "내 목적지"
-            start_lat, start_lon = center_lat, center_lng
-
-        # 2. 안전한 URL 생성을 위한 인코딩 처리
-        s_name = urllib.parse.quote(raw_start_name)
-        e_name = urllib.parse.quote(parking_lot.name)
-
-        # 카카오맵 길찾기 'dir' 파라미터 구성
-        # sp: 출발지 좌표 및 이름, ep: 목적지 좌표 및 이름
-        kakao_dir_url = (
-            f"https://map.kakao.com/link/from/{s_name},{start_lat},{start_lon}"
-            f"/to/{e_name},{parking_lot.lat},{parking_lot.lng}"
-        )
-
-        popup_html = f"""
-            <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
-                <h4 style="margin:0 0 5px 0; color:#333;">{parking_lot.name}</h4>
-                <div style="font-size:13px; color:#666; margin-bottom:10px;">
-                    <b>📍 주소:</b> {parking_lot.full_addr}<br>
-                    <b>🅿️ 주차면수:</b> <span style="color:#007BFF; font-weight:bold;">{parking_lot.space_no}면</span>
-                </div>
-                <a href="{kakao_dir_url}" target="_blank" 
-                   style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
-                   🚕 자동으로 길찾기 시작
-                </a>
-            </div>
-            """
-
-        folium.Marker(
-            location=[parking_lot.lat, parking_lot.lng],
-            popup=folium.Popup(popup_html, max_width=300),
-            icon=folium.Icon(color='blue', icon='info-sign')
-        ).add_to(cluster)
+        destination = (dest.lat, dest.lng)
+        # 길찾기 출발지: 주소 전체보다는 사용자가 검색한 명칭이 가독성이 좋습니다.
+        origin = (dest.name or "내 목적지", dest.lat, dest.lng)
+
+    # 주차장 마커 추가 (marker와 popup은 브라우저에서 생성)
+    if viewport_mode and viewport:
+        lots, truncated = get_parking_in_viewport(viewport)
+        if truncated:
+            st.caption(f"주차면수가 많은 {len(lots)}곳만 표시합니다. 지도를 확대하면 더 많이 보입니다.")
+    else:
+        lots = st.session_state.search_results
+
+    if viewport_mode:
+        # 지도 범위를 돌려받아야 하므로 st_folium으로 표시
+        m = folium.Map(location=[center_lat, center_lng], zoom_start=zoom_level)
+        if destination:
+            folium.Marker(location=destination, icon=folium.Icon(color="red", icon="star")).add_to(m)
+        marker_layer(lots, origin=origin).add_to(m)
+        map_state = st_folium(m, width="100%", height=600, key="main_map", returned_objects=["bounds", "zoom"])
+        # 지도를 움직여서 불러올 tile이 바뀌었으면 지도만 다시 그림
+        if update_viewport(st.session_state, map_state):
+            rerun_panel()
+    else:
+        # 검색 결과가 같으면 만들어 둔 지도를 재사용
+        show_result_map(lots, center=(center_lat, center_lng), zoom=zoom_level, destination=destination, origin=origin)
 
-    st_folium(m, width="100%", height=600, key="main_map", returned_objects=[])
 
-# --- 왼쪽 영역: 검색 결과 리스트 ---
-with left_col:
-    sort_option = st.radio("", ["가까운순 ▼", "이름순▼", "이름순▲"], horizontal=True)
+@st.fragment
+@timed("02 목록 panel")
+def list_panel():
+    '''검색 결과 목록. 정렬/페이지 버튼을 누르면 이 panel만 다시 실행'''
+    sort_option = st.radio("", list(SORT_ORDERS), horizontal=True)
     if st.session_state.search_results:
-        total_items = len(st.session_state.search_results)
-        total_pages = math.ceil(total_items / ITEMS_PER_PAGE)
-
-        current_group = (st.session_state.current_page - 1) // 5
-        start_page = current_group * 5 + 1
-        end_page = min(start_page + 4, total_pages)
-
-        start_idx = (st.session_state.current_page - 1) * ITEMS_PER_PAGE
-        end_idx = start_idx + ITEMS_PER_PAGE
-
-        if sort_option == '가까운순 ▼':
-            page_data = st.session_state.search_results[start_idx:end_idx]
-        elif sort_option == '이름순▼':
-            page_data = sorted(st.session_state.search_results, key=lambda x: x.name, reverse=True)[start_idx:end_idx]
-        else:
-            page_data = sorted(st.session_state.search_results, key=lambda x: x.name)[start_idx:end_idx]
+        # 정렬 순서는 검색 결과마다 한 번만 계산하고, 현재 페이지만 꺼냄
+        view = get_result_view(st.session_state, "search_view", st.session_state.search_results,
+                               orders={name: order for name, order in SORT_ORDERS.items() if order})
+        total_pages = view.total_pages(ITEMS_PER_PAGE)
+        page_data = view.page(st.session_state.current_page, ITEMS_PER_PAGE, order=sort_option)
 
         for parking_lot in page_data:
             with st.container():
@@ -164,26 +148,26 @@ with left_col:
 
         st.write("---")
 
-        # [3] 화살표 + 숫자 5개 버튼 UI (겹침 방지 비율 적용)
-        page_cols = st.columns([1.1, 1, 1, 1, 1, 1, 1.5])
-
-        with page_cols[0]:
-            if current_group > 0:
-                if st.button("◀", key="prev_group"):
-                    st.session_state.current_page = start_page - 1
-                    st.rerun()
-
-        for i, p in enumerate(range(start_page, end_page + 1)):
-            with page_cols[i + 1]:
-                btn_type = "primary" if st.session_state.current_page == p else "secondary"
-                if st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True):
-                    st.session_state.current_page = p
-                    st.rerun()
-
-        with page_cols[6]:
-            if end_page < total_pages:
-                if st.button("▶", key="next_group"):
-                    st.session_state.current_page = end_page + 1
-                    st.rerun()
+        # [3] 화살표 + 숫자 5개 버튼 UI (누르면 목록 panel만 다시 실행)
+        page_buttons(total_pages)
     else:
-        st.info("오른쪽 검색창에서 가고 싶은 곳을 검색해 보세요!")
\ No newline at end of file
+        st.info("오른쪽 검색창에서 가고 싶은 곳을 검색해 보세요!")
+
+
+# --- 레이아웃 시작 ---
+
+# 4. 상단 로고 (검색바는 아래 right_col로 이동)
+st.title("🚗 Parking Mate")
+st.write("---")
+st.subheader(f"🔍 검색 결과 ({len(st.session_state.search_results) if len(st.session_state.search_results) > 0 else 0}건)")
+# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
+left_col, right_col = st.columns([1, 2])
+
+# --- 오른쪽 영역: 검색창(상단) + 지도(하단) ---
+with right_col:
+    search_panel()
+    map_panel()
+
+# --- 왼쪽 영역: 검색 결과 리스트 ---
+with left_col:
+    list_panel()
@@ -7,15 +7,20 @@ import pandas as pd
 import os
 import json
 import math
-import urllib
 import warnings  # 👈 경고 메시지 제어를 위해 추가
 from geopy.geocoders import Nominatim
 from dotenv import load_dotenv
 from src.db_crud import run_query
-from folium.plugins import MarkerCluster
+from src.map_layer import marker_layer, aggregate_layer
 
 from src.db_crud import get_sido_sigungu
-from src.db_crud import get_region_parking_data
+from src.db_crud import get_region_bounds
+from src.db_crud import get_parking_in_viewport
+from src.db_crud import get_parking_aggregates
+from src.viewport import update_viewport
+from src.db_crud import get_region_parking_page
+from src.db_crud import get_region_parking
+from src.panel import timed, rerun_panel
 
 # --- 0. 불필요한 경고 및 출력 억제 ---
 # Pandas의 SQLAlchemy 관련 UserWarning을 무시합니다.
@@ -32,9 +37,14 @@ else:
     st.error("DB 설정 정보를 불러올 수 없습니다.")
 
 # 세션 상태 초기화
+# 지역 선택 panel은 search_region, page, region_cursors를 바꾸고 페이지 전체를 다시 실행한다.
+# 지도는 검색한 지역의 주차장 전체를 목록 페이지와 따로 조회해서 표시한다.
 
-if 'search_result' not in st.session_state:
-    st.session_state['search_result'] = pd.DataFrame()
+if 'search_region' not in st.session_state:     # 검색한 (시도명, 시군구명)
+    st.session_state.search_region = None
+
+if 'region_cursors' not in st.session_state:    # 페이지별 시작 위치 (keyset pagination cursor, 1페이지는 None)
+    st.session_state.region_cursors = [None]
 
 if 'sido_name' not in st.session_state:         # 선택된 시도명 저장
     st.session_state.sido_name = ""
@@ -45,60 +55,23 @@ if 'sgg_name' not in st.session_state:          # 선택된 시군구명 저장
 if 'page' not in st.session_state:
     st.session_state.page = 1
 
-if 'region_data' not in st.session_state: # 시도/시군구 저장해둘 state 변수 - 시도를 key로, 시군구를 value 로
+if not st.session_state.get('region_data'): # 시도/시군구 저장해둘 state 변수 - 시도를 key로, 시군구를 value 로 (조회 실패로 비어 있으면 다시 조회)
     st.session_state.region_data = get_sido_sigungu()
 
-df = st.session_state.search_result
 # --- 레이아웃 설정 ---
 st.set_page_config(layout="wide", page_title="Parking Mate")
 st.title("🚗 Parking Mate")
 st.write("---")
-st.subheader(f"🔍 검색 결과 ({len(df)}건)")
-
-# --- 상단 구현 ---
-left_col, right_col = st.columns([1, 2])
-
-# --- 왼쪽 영역: 조회 결과 리스트 ---
-with left_col:
-    all_data = get_region_parking_data()
-    # 1. 필터 UI (조회 결과 리스트 바로 위나 적절한 위치에 배치)
-    sort_option = st.radio("", ["이름순▼", "이름순▲"], horizontal=True)
 
-    if not df.empty:
-        # ---------------- 여기에 필터 정렬 로직 추가 ----------------
-        if sort_option == '이름순▼':
-            df = df.sort_values(by='name', ascending=False)
-        else: # 이름순▲
-            df = df.sort_values(by='name', ascending=True)
-        # --------------------------------------------------------
-
-        # 2. 페이지네이션 설정
-        items_per_page = 4
-        total_pages = min(math.ceil(len(df) / items_per_page), 4)
-        start_idx = (st.session_state.page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        df_page = df.iloc[start_idx:end_idx]
-        for i, row in df_page.iterrows():
-            st.markdown(f"""
-            <div style="border:1px solid #ddd; padding:15px; border-radius:10px; margin-bottom:10px; background-color:white;">
-                <h4 style="margin:0; color:black;">{row['name']}</h4>
-                <p style="margin:5px 0; font-size:14px; color:#666;">📍 {row['full_address']}</p>
-                <p style="margin:0; color:#007BFF; font-weight:bold;">🅿️ 주차면수: {row['space_no']}면</p>
-            </div>
-            """, unsafe_allow_html=True)
-        st.write("---")
-        cols = st.columns([1] * (total_pages + 2))
-        for p in range(1, total_pages + 1):
-            with cols[p]:
-                btn_type = "primary" if st.session_state.page == p else "secondary"
-                if st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True):
-                    st.session_state.page = p
-                    st.rerun()
-    else:
-        st.info("위 선택창에서 원하는 위치를 선택해 보세요!")
+def reset_pages():
+    '''정렬이 바뀌면 1페이지부터 다시 조회'''
+    st.session_state.page = 1
+    st.session_state.region_cursors = [None]
 
-# --- 오른쪽 영역: 지도 ---
-with right_col:
+@st.fragment
+@timed("03 지역 선택 panel")
+def region_panel():
+    '''시도/시군구 선택. 선택을 바꾸면 이 panel만 다시 실행하고, 검색하면 페이지 전체를 다시 실행'''
     with st.container(border=True):
         col1, col2, col3 = st.columns([0.45, 0.45, 0.1])
 
@@ -113,7 +86,6 @@ with right_col:
             )
         with col2:
             if st.session_state.sido_name:  # 시도명이 선택되면 선택된 시도명에 해당하는 시군구 필터링해 출력.
-                data_sd = all_data[all_data['sido'] == st.session_state.sido_name]
                 st.session_state.sgg_name = col2.selectbox(
                     '시군구 선택',
                     #    sorted(data_sd['sigungu'].unique()),  # 시군구명을 가나다순으로 정렬
@@ -136,54 +108,108 @@ with right_col:
             search_btn = st.button("검색", use_container_width=True)
             if search_btn:
                 if st.session_state.sido_name and st.session_state.sgg_name:
-                    # 필터링 로직: all_data에서 직접 필터링하여 안전하게 데이터를 가져옵니다.
-                    res = all_data[
-                        (all_data['sido'] == st.session_state.sido_name) &
-                        (all_data['sigungu'] == st.session_state.sgg_name)
-                        ]
-                    st.session_state.search_result = res
+                    # 지역만 저장하고, 조회는 페이지 단위로 DB에서 처리
+                    st.session_state.search_region = (st.session_state.sido_name, st.session_state.sgg_name)
                     st.session_state.page = 1  # 검색 시 리스트 페이지 초기화
+                    st.session_state.region_cursors = [None]
 
-                    # ⭐ 핵심: 데이터를 세션에 넣은 후 즉시 리런!
+                    # ⭐ 핵심: 데이터를 세션에 넣은 후 즉시 리런! (목록/지도 모두)
                     st.rerun()
                 else:
                     st.warning("지역을 선택해주세요.")
 
+
+@st.fragment
+@timed("03 지도 panel")
+def map_panel(region):
+    '''검색한 지역(region: (시도명, 시군구명))의 주차장 지도. 지도 범위 보기에서 지도를 움직이면 이 panel만 다시 실행'''
     # 지도 표시
-    center_lat, center_lng = (df.iloc[0]['lat'], df.iloc[0]['lng']) if not df.empty else (37.5665, 126.9780)
-    m = folium.Map(location=[center_lat, center_lng], zoom_start=14 if not df.empty else 12)
-
-    cluster = MarkerCluster().add_to(m)
-
-    # 주차장 마커 추가
-    for i, row in df.iterrows():
-        # 1. 좌표 및 이름 설정
-        e_name = urllib.parse.quote(row['name'])
-
-        # 2. 카카오맵 URL 생성
-        kakao_dir_url = (
-            f"https://map.kakao.com/link/to/{e_name},{row['lat']},{row['lng']}"
-        )
-
-        # 3. 팝업 HTML (row 데이터 사용 및 태그 정리)
-        popup_html = f"""
-                <div style="width:220px; font-family: sans-serif; line-height:1.5;">
-                    <h4 style="margin:0; color:#333;">{row['name']}</h4>
-                    <div style="font-size:13px; color:#666; margin: 10px 0;">
-                        <b>📍 주소:</b> {row['full_address']}<br>
-                        <b>🅿️ 주차면수:</b> <span style="color:#007BFF; font-weight:bold;">{row['space_no']}면</span>
-                    </div>
-                    <a href="{kakao_dir_url}" target="_blank" 
-                       style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
-                       🚕 카카오맵 길찾기
-                    </a>
-                </div>
-                """
-
-        folium.Marker(
-            location=[row['lat'], row['lng']],
-            popup=folium.Popup(popup_html, max_width=300),
-            icon=folium.Icon(color='blue', icon='info-sign')
-        ).add_to(cluster)
-
-    st_folium(m, width="100%", height=600, key="main_map")
\ No newline at end of file
+    # 지도 범위 보기: 검색 결과 대신 지도에 보이는 범위의 주차장을 tile 단위로 불러와 표시
+    viewport_mode = st.toggle("지도에 보이는 범위의 주차장 보기", key="viewport_mode")
+    viewport = st.session_state.get('viewport')
+    if viewport_mode and viewport and viewport.aggregated:
+        # 축소된 지도: 주차장 대신 미리 집계한 격자를 표시 (전국/시도 단위에서도 화면의 격자 수만큼만 전송)
+        m = folium.Map(location=list(viewport.center), zoom_start=viewport.zoom)
+        show = st.radio("표시 방식", ["묶어서 보기", "히트맵"], horizontal=True, key="aggregate_mode")
+        cells, truncated = get_parking_aggregates(viewport)
+        if truncated:
+            st.caption(f"주차장이 많은 {len(cells)}개 구역만 표시합니다.")
+        aggregate_layer(cells, heatmap=show == "히트맵").add_to(m)
+    elif viewport_mode and viewport:
+        m = folium.Map(location=list(viewport.center), zoom_start=viewport.zoom)
+        lots, truncated = get_parking_in_viewport(viewport)
+        if truncated:
+            st.caption(f"주차면수가 많은 {len(lots)}곳만 표시합니다. 지도를 확대하면 더 많이 보입니다.")
+        marker_layer(lots).add_to(m)
+    else:
+        # 검색한 지역의 주차장 전체 (목록 페이지와 관계없이 지역마다 한 번 조회, 캐시)
+        lots = get_region_parking(*region) if region else None
+        if lots:
+            center_lat, center_lng = float(lots.lats[0]), float(lots.lngs[0])
+        else:
+            center_lat, center_lng = 37.5665, 126.9780
+        m = folium.Map(location=[center_lat, center_lng], zoom_start=14 if lots else 12)
+        if region:   # 검색한 지역 전체가 보이도록 (region_catalog에 저장된 좌표 범위)
+            bounds = get_region_bounds(*region)
+            if bounds:
+                m.fit_bounds(bounds)
+
+        # 주차장 마커 추가 (marker와 popup은 브라우저에서 생성)
+        if lots:
+            marker_layer(lots).add_to(m)
+
+    map_state = st_folium(m, width="100%", height=600, key="main_map",
+                          returned_objects=["bounds", "zoom"] if viewport_mode else [])
+    # 지도를 움직여서 불러올 tile이 바뀌었으면 지도만 다시 그림
+    if viewport_mode and update_viewport(st.session_state, map_state):
+        rerun_panel()
+
+
+# 1. 필터 UI
+sort_option = st.radio("", ["이름순▼", "이름순▲"], horizontal=True, key="sort_option", on_change=reset_pages)
+
+# 2. 현재 페이지만 DB에서 조회 (지역 필터, 정렬, 페이지 위치를 SQL로 처리)
+result = None
+if st.session_state.search_region:
+    result = get_region_parking_page(*st.session_state.search_region,
+                                     cursor=st.session_state.region_cursors[st.session_state.page - 1],
+                                     descending=sort_option == '이름순▼')
+df = result.rows if result is not None else pd.DataFrame()
+
+st.subheader(f"🔍 검색 결과 ({result.total if result is not None else 0}건)")
+
+# --- 상단 구현 ---
+left_col, right_col = st.columns([1, 2])
+
+# --- 왼쪽 영역: 조회 결과 리스트 ---
+with left_col:
+    if not df.empty:
+        items_per_page = 4
+        total_pages = min(math.ceil(result.total / items_per_page), 4)
+        for i, row in df.iterrows():
+            st.markdown(f"""
+            <div style="border:1px solid #ddd; padding:15px; border-radius:10px; margin-bottom:10px; background-color:white;">
+                <h4 style="margin:0; color:black;">{row['name']}</h4>
+                <p style="margin:5px 0; font-size:14px; color:#666;">📍 {row['full_address']}</p>
+                <p style="margin:0; color:#007BFF; font-weight:bold;">🅿️ 주차면수: {row['space_no']}면</p>
+            </div>
+            """, unsafe_allow_html=True)
+        st.write("---")
+        # 3. 페이지네이션: 지나온 페이지와 바로 다음 페이지만 이동 가능 (cursor를 아는 페이지)
+        if result.has_next and len(st.session_state.region_cursors) == st.session_state.page:
+            st.session_state.region_cursors.append(result.next_cursor)
+        cols = st.columns([1] * (total_pages + 2))
+        for p in range(1, total_pages + 1):
+            with cols[p]:
+                btn_type = "primary" if st.session_state.page == p else "secondary"
+                reachable = p <= len(st.session_state.region_cursors)
+                if st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True, disabled=not reachable):
+                    st.session_state.page = p
+                    st.rerun()
+    else:
+        st.info("위 선택창에서 원하는 위치를 선택해 보세요!")
+
+# --- 오른쪽 영역: 지역 선택 + 지도 ---
+with right_col:
+    region_panel()
+    map_panel(st.session_state.search_region)
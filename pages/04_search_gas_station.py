@@ -1,17 +1,25 @@
 import streamlit as st
-from streamlit_folium import st_folium
-import folium
-import math
-from folium.plugins import MarkerCluster
 
 from src.utils import get_oil_stations, find_address_and_point
+from src.map_view import show_result_map
+from src.panel import timed, page_buttons
+from src.result_view import get_result_view
 
 ITEMS_PER_PAGE = 4
+SORT_ORDERS = {     # 목록 정렬 방식 (field, 내림차순 여부)
+    "가까운순▼": ("distance", False),
+    "가격낮은순▼": ("price", False),   # 주유소 앱 특성상 이름보다 가격이 중요하므로 예시로 추가
+    "이름순▲": ("station_name", False),
+    "이름순▼": ("station_name", True),
+}
 
 # 2. 페이지 설정
 st.set_page_config(layout="wide", page_title="Oil Mate")
 #
 # 세션 상태 초기화
+# panel끼리는 아래 값으로만 주고받는다.
+#   oil_results, destination, search_name: 검색 panel이 바꾸고(페이지 전체 다시 실행) 목록/지도 panel이 읽음
+#   current_page: 목록 panel이 바꾸고 읽음
 if 'oil_results' not in st.session_state:
     st.session_state.oil_results = []
 
@@ -21,43 +29,21 @@ if 'destination' not in st.session_state:   # 검색 결과
 if "current_page" not in st.session_state: #리스트에서 현재 탐색중인 페이지
     st.session_state.current_page = 1
 
-# --- 레이아웃 ---
+if 'search_name' not in st.session_state:   # 검색한 주소 (길찾기 출발지 이름)
+    st.session_state.search_name = None
 
-stations = st.session_state['oil_results']
-# 4. 상단 로고 (검색바는 아래 right_col로 이동)
-st.title("⛽ Oil Mate")
-st.write("---")
-st.subheader(f"🔍 검색 결과 ({len(stations)}건)")
-# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
-left_col, right_col = st.columns([1, 2])
 
-# --- 왼쪽 영역: 검색 결과 리스트 ---
-with left_col:
-    sort_option = st.radio("", ["가까운순▼", "가격낮은순▼", "이름순▲", "이름순▼"], horizontal=True)
+@st.fragment
+@timed("04 목록 panel")
+def list_panel():
+    '''주유소 목록. 정렬/페이지 버튼을 누르면 이 panel만 다시 실행'''
+    sort_option = st.radio("", list(SORT_ORDERS), horizontal=True)
+    stations = st.session_state['oil_results']
     if stations:
-        # 정렬 라디오 버튼 (이 코드가 subheader 바로 아래 있어야 화면에 뜹니다)
-        # st.write("---")
-
-        # ---------------- 2. 필터 정렬 로직 (stations 리스트 직접 정렬) ----------------
-        if sort_option == '가까운순▼':
-            stations.sort(key=lambda x: x.distance)
-        elif sort_option == '가격낮은순▼':  # 주유소 앱 특성상 이름보다 가격이 중요하므로 예시로 추가
-            stations.sort(key=lambda x: x.price)
-        elif sort_option == '이름순▲':
-            stations.sort(key=lambda x: x.station_name)
-        elif sort_option == '이름순▼':
-            stations.sort(key=lambda x: x.station_name, reverse=True)
-
-        total_items = len(stations)
-        total_pages = math.ceil(total_items / ITEMS_PER_PAGE)
-
-        current_group = (st.session_state.current_page - 1) // 5
-        start_page = current_group * 5 + 1
-        end_page = min(start_page + 4, total_pages)
-
-        start_idx = (st.session_state.current_page - 1) * ITEMS_PER_PAGE
-        end_idx = start_idx + ITEMS_PER_PAGE
-        page_data = stations[start_idx:end_idx]
+        # 정렬 순서는 검색 결과마다 한 번만 계산하고 현재 페이지만 꺼냄 (검색 결과 리스트는 바꾸지 않음)
+        view = get_result_view(st.session_state, "oil_view", stations, orders=SORT_ORDERS)
+        total_pages = view.total_pages(ITEMS_PER_PAGE)
+        page_data = view.page(st.session_state.current_page, ITEMS_PER_PAGE, order=sort_option)
         for s in page_data:
             with st.container():
                 st.markdown(f"""
@@ -69,31 +55,16 @@ with left_col:
                 """, unsafe_allow_html=True)
 
         st.write("---")
-        page_cols = st.columns([1.1, 1, 1, 1, 1, 1, 1.5])
-
-        with page_cols[0]:
-            if current_group > 0:
-                if st.button("◀", key="prev_group"):
-                    st.session_state.current_page = start_page - 1
-                    st.rerun()
-
-        for i, p in enumerate(range(start_page, end_page + 1)):
-            with page_cols[i + 1]:
-                btn_type = "primary" if st.session_state.current_page == p else "secondary"
-                if st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True):
-                    st.session_state.current_page = p
-                    st.rerun()
-
-        with page_cols[6]:
-            if end_page < total_pages:
-                if st.button("▶", key="next_group"):
-                    st.session_state.current_page = end_page + 1
-                    st.rerun()
+        # 화살표 + 숫자 5개 버튼 UI (누르면 목록 panel만 다시 실행)
+        page_buttons(total_pages)
     else:
         st.info("오른쪽 검색창에서 동네 이름이나 주소를 검색해 보세요!")
 
-# --- 오른쪽 영역: 검색창 + 지도 ---
-with right_col:
+
+@st.fragment
+@timed("04 검색 panel")
+def search_panel():
+    '''주소 검색 폼. 검색하면 결과를 세션에 넣고 페이지 전체를 다시 실행'''
     # 1. 주소 검색 폼
     with st.form(key='search_form'):
         search_col, btn_col = st.columns([4, 1])
@@ -112,12 +83,19 @@ with right_col:
                     # B. 해당 좌표 주변 주유소 검색
                     found_stations = get_oil_stations(dest.lat, dest.lng)
                     st.session_state.oil_results = found_stations
-                    st.rerun()
+                    st.session_state.search_name = address_input
+                    st.session_state.current_page = 1
+                    st.rerun()  # 목록/지도 모두 갱신
                 else:
                     st.warning("입력하신 주소의 위치를 찾을 수 없습니다. 다시 시도해 주세요.")
         else:
             st.error("검색어를 입력해 주세요.")
 
+
+@st.fragment
+@timed("04 지도 panel")
+def map_panel():
+    '''주유소 지도 (결과가 같으면 만들어 둔 지도를 재사용)'''
     # 2. 지도 표시
     if st.session_state.destination:
         # 사용자가 입력한 장소로 지도 중심 고정
@@ -127,51 +105,34 @@ with right_col:
     else:
         center_lat, center_lng = 37.5665, 126.9780  # 서울 기본 위치
         zoom_level = 12
-    
-    m = folium.Map(location=[center_lat, center_lng], zoom_start=zoom_level)
-    cluster = MarkerCluster().add_to(m)
 
-    # 목적지 마커 추가
+    # 목적지 마커와 길찾기 출발지
+    destination, origin = None, None
     if st.session_state.destination:
         dest = st.session_state.destination
-        folium.Marker(
-            location=[dest.lat, dest.lng],
-            icon=folium.Icon(color="red", icon="star")
-        ).add_to(m)
-
-    # 주변 주유소 마커
-    for s in stations:
-        # 출발지 정보: 사용자가 검색한 주소와 좌표
-        # 목적지 정보: 주유소 이름과 좌표
-        start_name = address_input if address_input else "내 검색 위치"
-        start_lat, start_lon = [dest.lat, dest.lng]
-
-        # 카카오맵 길찾기 'dir' 파라미터 구성
-        # sp: 출발지 좌표 및 이름, ep: 목적지 좌표 및 이름
-        kakao_dir_url = (
-            f"https://map.kakao.com/link/from/{start_name},{start_lat},{start_lon}"
-            f"/to/{s.station_name},{s.lat},{s.lng}"
-        )
-
-        popup_html = f"""
-            <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
-                <h4 style="margin:0 0 5px 0; color:#333;">{s.station_name}</h4>
-                <div style="font-size:13px; color:#666; margin-bottom:10px;">
-                    <b>💰 가격:</b> <span style="color:#ff4b4b; font-weight:bold;">{s.price:,}원</span><br>
-                    <b>™️ 브랜드:</b> {s.brand_name}<br>
-                    <b>📏 거리:</b> {s.distance}m
-                </div>
-                <a href="{kakao_dir_url}" target="_blank" 
-                   style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
-                   🚕 자동으로 길찾기 시작
-                </a>
-            </div>
-            """
-
-        folium.Marker(
-            location=[s.lat, s.lng],
-            popup=folium.Popup(popup_html, max_width=300),
-            icon=folium.Icon(color='green', icon='info', prefix='fa')
-        ).add_to(cluster)
-
-    st_folium(m, width="100%", height=600, key="oil_map", returned_objects=[])
\ No newline at end of file
+        destination = (dest.lat, dest.lng)
+        # 길찾기 출발지: 사용자가 검색한 주소와 좌표
+        origin = (st.session_state.search_name or "내 검색 위치", dest.lat, dest.lng)
+
+    # 주변 주유소 마커 (marker와 popup은 브라우저에서 생성, 결과가 같으면 만들어 둔 지도를 재사용)
+    show_result_map(st.session_state.oil_results, center=(center_lat, center_lng), zoom=zoom_level, destination=destination, origin=origin)
+
+
+# --- 레이아웃 ---
+
+stations = st.session_state['oil_results']
+# 4. 상단 로고 (검색바는 아래 right_col로 이동)
+st.title("⛽ Oil Mate")
+st.write("---")
+st.subheader(f"🔍 검색 결과 ({len(stations)}건)")
+# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
+left_col, right_col = st.columns([1, 2])
+
+# --- 왼쪽 영역: 검색 결과 리스트 ---
+with left_col:
+    list_panel()
+
+# --- 오른쪽 영역: 검색창 + 지도 ---
+with right_col:
+    search_panel()
+    map_panel()
@@ -1,13 +1,9 @@
 import streamlit as st
-from streamlit_folium import st_folium
-import folium
-import math
-import urllib
-
-from src.db_crud import get_near_parking_data
-from src.utils import find_address_and_point
-from src.utils import get_oil_stations
-from folium.plugins import MarkerCluster
+
+from src.search import search_parking_and_oil
+from src.map_view import show_result_map
+from src.panel import timed, page_buttons
+from src.result_view import get_result_view
 from src.model import ParkingLot
 
 ITEMS_PER_PAGE = 4
@@ -40,6 +36,10 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 3. 세션 상탸 초기화
+# panel끼리는 아래 값으로만 주고받는다.
+#   parking_results, oil_results, destination, search_errors: 검색 panel이 바꾸고(페이지 전체 다시 실행) 목록/지도 panel이 읽음
+#   current_page: 목록 panel이 바꾸고 읽음
+#   result_option: 목록/지도 panel 모두에 영향을 주므로 panel 밖에서 선택 (바꾸면 페이지 전체 다시 실행)
 if 'parking_results' not in st.session_state:  # 주차장 조회 결과 저장
     st.session_state.parking_results = []
 
@@ -55,6 +55,9 @@ if "current_page" not in st.session_state:  # 리스트에서 현재 탐색중
 if "destination" not in st.session_state:  # 검색 결과
     st.session_state.destination = None
 
+if "search_errors" not in st.session_state:  # 검색 중 실패한 조회 (주차장/주유소)
+    st.session_state.search_errors = {}
+
 
 def oil_list_item(station):
     st.markdown(f"""
@@ -75,38 +78,21 @@ def parking_list_item(parking_lot):
                 </div>
                 """, unsafe_allow_html=True)
 
-# 4. 상단 로고 (검색바는 아래 right_col로 이동)
-st.title("🚗 Parking & Oil Mate ⛽")
-st.write("---")
-st.subheader(
-    f"🔍 검색 결과 주차장: ({len(st.session_state.parking_results) if len(st.session_state.parking_results) > 0 else 0}건) | "
-    f"주유소: ({len(st.session_state.oil_results) if len(st.session_state.oil_results) > 0 else 0}건)")
 
-# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
-left_col, right_col = st.columns([1, 2])
-
-# --- 왼쪽 영역: 검색 결과 리스트 ---
-with left_col:
-    option = st.radio("", ["전체", "주차장", "주유소"], horizontal=True)
-    if st.session_state.parking_results and st.session_state.oil_results:
-        if option == "전체":
-            total_list = sorted(st.session_state.parking_results + st.session_state.oil_results, key=lambda x: x.distance)
-        if option == "주차장":
-            total_list = st.session_state.parking_results
-        if option == "주유소":
-            total_list = st.session_state.oil_results
-
-        total_items = len(total_list)
-        total_pages = math.ceil(total_items / ITEMS_PER_PAGE)
-
-        current_group = (st.session_state.current_page - 1) // 5
-        start_page = current_group * 5 + 1
-        end_page = min(start_page + 4, total_pages)
-
-        start_idx = (st.session_state.current_page - 1) * ITEMS_PER_PAGE
-        end_idx = start_idx + ITEMS_PER_PAGE
-
-        page_data = total_list[start_idx:end_idx]
+@st.fragment
+@timed("05 목록 panel")
+def list_panel(option):
+    '''검색 결과 목록 (option: 전체/주차장/주유소). 페이지 버튼을 누르면 이 panel만 다시 실행'''
+    if st.session_state.parking_results or st.session_state.oil_results:
+        # 주차장/주유소 결과는 모두 거리순이므로 "전체"는 두 결과를 거리순으로 합침 (보여줄 페이지까지만)
+        sources = {
+            "전체": (st.session_state.parking_results, st.session_state.oil_results),
+            "주차장": (st.session_state.parking_results,),
+            "주유소": (st.session_state.oil_results,),
+        }
+        view = get_result_view(st.session_state, f"result_view_{option}", *sources[option])
+        total_pages = view.total_pages(ITEMS_PER_PAGE)
+        page_data = view.page(st.session_state.current_page, ITEMS_PER_PAGE)
 
         for data in page_data:
             with st.container():
@@ -115,32 +101,16 @@ with left_col:
 
         st.write("---")
 
-        # [3] 화살표 + 숫자 5개 버튼 UI (겹침 방지 비율 적용)
-        page_cols = st.columns([1.1, 1, 1, 1, 1, 1, 1.5])
-
-        with page_cols[0]:
-            if current_group > 0:
-                if st.button("◀", key="prev_group"):
-                    st.session_state.current_page = start_page - 1
-                    st.rerun()
-
-        for i, p in enumerate(range(start_page, end_page + 1)):
-            with page_cols[i + 1]:
-                btn_type = "primary" if st.session_state.current_page == p else "secondary"
-                if st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True):
-                    st.session_state.current_page = p
-                    st.rerun()
-
-        with page_cols[6]:
-            if end_page < total_pages:
-                if st.button("▶", key="next_group"):
-                    st.session_state.current_page = end_page + 1
-                    st.rerun()
+        # [3] 화살표 + 숫자 5개 버튼 UI (누르면 목록 panel만 다시 실행)
+        page_buttons(total_pages)
     else:
         st.info("오른쪽 검색창에서 가고 싶은 곳을 검색해 보세요!")
 
-# --- 오른쪽 영역: 검색창(상단) + 지도(하단) ---
-with right_col:
+
+@st.fragment
+@timed("05 검색 panel")
+def search_panel():
+    '''검색 폼. 검색하면 결과를 세션에 넣고 페이지 전체를 다시 실행'''
     # 지도 너비에 맞춘 단일 검색 폼
     with st.form(key='main_search_form'):
         search_input_col, search_btn_col = st.columns([5, 1])
@@ -157,24 +127,26 @@ with right_col:
     if search_submit:
         if target_location:
             with st.spinner('데이터를 불러오는 중...'):
-                dest = find_address_and_point(target_location)
-                st.session_state.destination = dest
-                parking_lots = get_near_parking_data(dest)
-                st.session_state.parking_results = parking_lots
-                found_stations = get_oil_stations(dest.lat, dest.lng)
-                st.session_state.oil_results = found_stations
-                st.rerun()  # 데이터를 세션에 넣은 후 화면 즉시 갱신
+                # 목적지 검색 후 주차장/주유소 조회를 동시에 실행
+                result = search_parking_and_oil(target_location)
+                if result.destination or result.errors:
+                    st.session_state.destination = result.destination
+                    st.session_state.parking_results = result.parking_lots
+                    st.session_state.oil_results = result.oil_stations
+                    st.session_state.search_errors = result.errors
+                    st.session_state.current_page = 1
+                    st.rerun()  # 데이터를 세션에 넣은 후 화면 즉시 갱신 (목록/지도 모두)
+                else:
+                    st.warning("입력하신 장소의 위치를 찾을 수 없습니다. 다시 시도해 주세요.")
         else:
             st.warning("검색어를 입력해 주세요.")
 
-    if st.session_state.parking_results and st.session_state.oil_results:
-        if option == "전체":
-            total_list = sorted(st.session_state.parking_results + st.session_state.oil_results, key=lambda x: x.distance)
-        if option == "주차장":
-            total_list = st.session_state.parking_results
-        if option == "주유소":
-            total_list = st.session_state.oil_results
 
+@st.fragment
+@timed("05 지도 panel")
+def map_panel(option):
+    '''선택한 종류(option)의 검색 결과 지도 (결과가 같으면 만들어 둔 지도를 재사용)'''
+    if st.session_state.parking_results or st.session_state.oil_results:
         center_lat = st.session_state.destination.lat
         center_lng = st.session_state.destination.lng
         zoom_level = 14
@@ -182,75 +154,45 @@ with right_col:
         center_lat, center_lng = 37.5665, 126.9780  # 서울 기본 위치
         zoom_level = 12
 
-    m = folium.Map(location=[center_lat, center_lng], zoom_start=zoom_level)
-
-    cluster = MarkerCluster().add_to(m)
-
+    # 목적지 마커와 길찾기 출발지
+    destination, origin = None, None
     if st.session_state.destination:
         dest = st.session_state.destination
-        folium.Marker(
-            location=[dest.lat, dest.lng],
-            icon=folium.Icon(color="red", icon="star")
-        ).add_to(m)
-
-    if st.session_state.parking_results and st.session_state.oil_results:
-        for data in total_list:
-            if st.session_state.destination:
-                # 주소 전체보다는 사용자가 검색한 명칭이 가독성이 좋습니다.
-                raw_start_name = st.session_state.destination.name if st.session_state.destination.name else "내 목적지"
-                start_lat = st.session_state.destination.lat
-                start_lon = st.session_state.destination.lng
-            else:
-                raw_start_name = "내 목적지"
-                start_lat, start_lon = center_lat, center_lng
-
-            # 2. 안전한 URL 생성을 위한 인코딩 처리
-            s_name = raw_start_name
-            e_name = urllib.parse.quote(data.name) if isinstance(data, ParkingLot) else data.station_name
-
-            # 카카오맵 길찾기 'dir' 파라미터 구성
-            # sp: 출발지 좌표 및 이름, ep: 목적지 좌표 및 이름
-            kakao_dir_url = (
-                f"https://map.kakao.com/link/from/{s_name},{start_lat},{start_lon}"
-                f"/to/{e_name},{data.lat},{data.lng}"
-            )
-            if isinstance(data, ParkingLot):
-                popup_html = f"""
-                            <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
-                                <h4 style="margin:0 0 5px 0; color:#333;">{data.name}</h4>
-                                <div style="font-size:13px; color:#666; margin-bottom:10px;">
-                                    <b>📍 주소:</b> {data.full_addr}<br>
-                                    <b>🅿️ 주차면수:</b> <span style="color:#007BFF; font-weight:bold;">{data.space_no}면</span>
-                                </div>
-                                <a href="{kakao_dir_url}" target="_blank" 
-                                   style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
-                                   🚕 자동으로 길찾기 시작
-                                </a>
-                            </div>
-                            """
-            else:
-                popup_html = f"""
-                            <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
-                                <h4 style="margin:0 0 5px 0; color:#333;">{data.station_name}</h4>
-                                <div style="font-size:13px; color:#666; margin-bottom:10px;">
-                                    <b>💰 가격:</b> <span style="color:#ff4b4b; font-weight:bold;">{data.price:,}원</span><br>
-                                    <b>™️ 브랜드:</b> {data.brand_name}<br>
-                                    <b>📏 거리:</b> {data.distance}m
-                                </div>
-                                <a href="{kakao_dir_url}" target="_blank" 
-                                   style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
-                                   🚕 자동으로 길찾기 시작
-                                </a>
-                            </div>
-                            """
-            folium.Marker(
-                location=[data.lat, data.lng],
-                popup=folium.Popup(popup_html, max_width=300),
-                icon=folium.Icon(color='blue', icon='info-sign') if isinstance(data, ParkingLot) else folium.Icon(color='green', icon='tint', prefix='fa')
-            ).add_to(cluster)
-
-    st_folium(m, width="100%", height=600, key="main_map", returned_objects=[])
+        destination = (dest.lat, dest.lng)
+        # 길찾기 출발지: 주소 전체보다는 사용자가 검색한 명칭이 가독성이 좋습니다.
+        origin = (dest.name or "내 목적지", dest.lat, dest.lng)
+
+    # 선택한 종류의 마커를 한 layer로 추가 (marker와 popup은 브라우저에서 생성)
+    # 검색 결과와 선택이 같으면 만들어 둔 지도를 재사용 (목록 페이지를 바꿔도 지도를 다시 만들지 않음)
+    layers = {
+        "전체": (st.session_state.parking_results, st.session_state.oil_results),
+        "주차장": (st.session_state.parking_results,),
+        "주유소": (st.session_state.oil_results,),
+    }
+    show_result_map(*layers[option], center=(center_lat, center_lng), zoom=zoom_level,
+                    destination=destination, origin=origin)
 
 
+# 4. 상단 로고 (검색바는 아래 right_col로 이동)
+st.title("🚗 Parking & Oil Mate ⛽")
+st.write("---")
+st.subheader(
+    f"🔍 검색 결과 주차장: ({len(st.session_state.parking_results) if len(st.session_state.parking_results) > 0 else 0}건) | "
+    f"주유소: ({len(st.session_state.oil_results) if len(st.session_state.oil_results) > 0 else 0}건)")
 
+ERROR_LABELS = {'geocode': '목적지 검색', 'parking': '주차장 조회', 'oil': '주유소 조회'}
+for leg, err in st.session_state.search_errors.items():
+    st.warning(f"{ERROR_LABELS.get(leg, leg)} 중 오류가 발생했습니다: {err}")
 
+# 5. 메인 레이아웃 분할: 왼쪽(리스트) | 오른쪽(검색창 + 지도)
+left_col, right_col = st.columns([1, 2])
+
+# --- 왼쪽 영역: 검색 결과 리스트 ---
+with left_col:
+    option = st.radio("", ["전체", "주차장", "주유소"], horizontal=True, key="result_option")
+    list_panel(option)
+
+# --- 오른쪽 영역: 검색창(상단) + 지도(하단) ---
+with right_col:
+    search_panel()
+    map_panel(option)
@@ -0,0 +1,191 @@
+# CACHE
+# 여러 streamlit 세션(thread)이 함께 사용하는 메모리 캐시.
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    '''
+    크기 제한(LRU)과 유효시간(TTL)을 가진 thread-safe 캐시.
+    hit/miss/eviction(용량 초과로 삭제)/expiration(TTL 만료) 횟수를 기록한다.
+    '''
+    def __init__(self, maxsize: int = 256, ttl: float = None, timer=time.monotonic):
+        """
+        maxsize(추가): 최대 저장 개수. 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+        ttl(추가): 저장 후 유효시간(초). None이면 만료 없음
+        timer(추가): 현재 시각 함수
+        """
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__timer = timer
+        self.__data = OrderedDict()     # key -> (value, 저장 시각)
+        self.__lock = threading.Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    def get(self, key, default=None):
+        '''key의 값을 반환. 없거나 만료되었으면 default'''
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def get_entry(self, key):
+        '''(값, 저장 후 지난 시간(초)) 반환. 없거나 만료되었으면 None'''
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+            value, stored_at = entry
+            age = self.__timer() - stored_at
+            if self.__ttl is not None and age > self.__ttl:
+                del self.__data[key]
+                self.__expirations += 1
+                self.__misses += 1
+                return None
+            self.__data.move_to_end(key)
+            self.__hits += 1
+            return value, age
+
+    def put(self, key, value):
+        with self.__lock:
+            self.__data[key] = (value, self.__timer())
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.__maxsize:
+                self.__data.popitem(last=False)
+                self.__evictions += 1
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            entry = self.__data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'size': len(self.__data),
+                'maxsize': self.__maxsize,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'expirations': self.__expirations,
+            }
+
+    def __repr__(self):
+        return f'LRUCache(maxsize = {self.__maxsize}, ttl = {self.__ttl}, size = {len(self.__data)})'
+
+
+class SingleFlight:
+    '''
+    같은 key로 동시에 들어온 호출을 하나로 묶는다.
+    먼저 온 호출만 실제로 실행하고, 나머지는 그 결과(또는 예외)를 함께 받는다.
+    '''
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+        self.__executed = 0     # 실제로 실행된 횟수
+        self.__shared = 0       # 다른 호출의 결과를 받아간 횟수
+
+    def do(self, key, fn):
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._Call()
+                self.__calls[key] = call
+                self.__executed += 1
+            else:
+                self.__shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self.__lock:
+            return {'executed': self.__executed, 'shared': self.__shared, 'in_flight': len(self.__calls)}
+
+
+class CachedLoader:
+    '''
+    LRUCache + SingleFlight.
+    캐시에 없으면 load 함수를 한 번만 호출해서 저장하고, 제공한 데이터가 얼마나 오래된 것인지 기록한다.
+    '''
+    def __init__(self, maxsize: int = 256, ttl: float = None):
+        self.__cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.__flight = SingleFlight()
+        self.__lock = threading.Lock()
+        self.__served = 0
+        self.__upstream_calls = 0
+        self.__age_total = 0.0
+        self.__age_max = 0.0
+
+    def get(self, key, load):
+        '''key의 값을 반환. 없으면 load()의 결과를 저장 후 반환'''
+        entry = self.__cache.get_entry(key)
+        if entry is None:
+            entry = self.__flight.do(key, lambda: self.__load(key, load))
+        value, age = entry
+        with self.__lock:
+            self.__served += 1
+            self.__age_total += age
+            self.__age_max = max(self.__age_max, age)
+        return value
+
+    def __load(self, key, load):
+        entry = self.__cache.get_entry(key)    # 기다리는 사이 다른 호출이 채웠을 수 있음
+        if entry is not None:
+            return entry
+        with self.__lock:
+            self.__upstream_calls += 1
+        value = load()
+        self.__cache.put(key, value)
+        return value, 0.0
+
+    def clear(self):
+        self.__cache.clear()
+
+    def stats(self):
+        '''캐시 통계 + 원본 호출 수(upstream_calls), 절약한 호출 수(saved), 제공한 데이터의 경과 시간'''
+        result = self.__cache.stats()
+        flight = self.__flight.stats()
+        with self.__lock:
+            served = self.__served
+            result.update({
+                'served': served,
+                'upstream_calls': self.__upstream_calls,
+                'coalesced': flight['shared'],
+                'saved': served - self.__upstream_calls,
+                'served_age_avg': self.__age_total / served if served else 0.0,
+                'served_age_max': self.__age_max,
+            })
+        return result
@@ -1,7 +1,25 @@
 from utils import fetch_from_api    # api 호출하는 함수
 from utils import valid_check_with_logging    # api 호출하는 함수
 from db_crud import run_bulk_insert_query
-from config import config_api_key
+from db_crud import run_bulk_load
+from db_crud import run_query
+from db_crud import bump_data_version
+from db_crud import refresh_region_catalog
+from db_crud import rebuild_parking_pyramid
+from config import config_api_key, config_api_rate
+from config import config_bulk_load_threshold
+from config import config_ingest_state_path
+from geohash import encode_many
+from validation import BatchValidator, to_column, to_floats
+from rate_limit import TokenBucket
+from pipeline import Pipeline, Stage
+from ingest_state import IngestState
+from collections import Counter
+import argparse
+import hashlib
+import itertools
+import math
+import threading
 import time
 
 sql = '''
@@ -12,86 +30,558 @@ sql = '''
     )
 '''
 
-normal_sql = """
-    INSERT INTO parking_lot (reg_id, name, lat, lng, sido, sigungu, full_address, space_no, coord)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, \
-    ST_GeomFromText(CONCAT('POINT(', %s, ' ', %s, ')'), 4326, 'axis-order=long-lat')) \
+# parking_lot 저장용 (전체 적재, 변경분 반영 공통): reg_id가 같으면 UPDATE, 없으면 INSERT
+# (reg_id에 unique key가 있어서 다시 적재하거나 같은 주차장이 두 번 와도 실패하지 않음: data/migrations/0004_delta_sync.sql)
+# (coord는 lat/lng에서 계산되는 컬럼이라 저장하지 않음: data/migrations/0005_numeric_coordinates.sql)
+upsert_sql = """
+    INSERT INTO parking_lot (reg_id, name, lat, lng, sido, sigungu, full_address, space_no, geohash, use_yn)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'Y')
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name), lat = VALUES(lat), lng = VALUES(lng), sido = VALUES(sido), sigungu = VALUES(sigungu),
+        full_address = VALUES(full_address), space_no = VALUES(space_no), geohash = VALUES(geohash), use_yn = 'Y'
 """
 
-def fetch_parking_api():
-    '''주차장 정보 가져오기'''
-
-    BASE_URL = 'https://apis.data.go.kr/B553881/Parking/PrkSttusInfo'   # api url 정보
-    data_list = []      # api를 받는 data 리스트
-    page_no = 1         # page no
-    total_saved = 0     # 전체 저장된 개수 카운트
-    BATCH_SIZE = 4000   # 만 건 단위로 끊기
-
-    while True:
-        numOfRows = 2000    # 한번에 받는 데이터의 수
-        items = fetch_from_api( # fetch_from_api(api 공통함수 호출)
-            BASE_URL,
-            {'serviceKey': config_api_key,'pageNo':page_no,'numOfRows':numOfRows, 'format':2}
-        ).get("PrkSttusInfo", [])
-
-        if not items: # 더이상 데이터가 없으면 중단
-            break
-
-        data_list.extend(items)
-        print(f"{page_no}페이지 완료 (누적: {len(data_list)}건)")
-
-        # list가 설정한 Batch size보다 커지면 DB에 저장
-        if len(data_list) >= BATCH_SIZE:
-            print(f"{len(data_list)}건 도달! DB 저장을 시작합니다.")
-
-            inserted_count, inserted_normal_count = insert_batch(data_list)
-
-            if inserted_count:
-                total_saved += inserted_count
-                print(f"DB 저장 완료! (누적 저장: {total_saved}건)")
-                # 🔥 2. 저장 성공 후 리스트 비우기
-                data_list = []
-            else:
-                print("DB 저장 실패. 다음 루프에서 재시도합니다.")
-
-        page_no += 1
-    # 2. 루프 종료 후 남은 데이터 처리
-    if data_list:
-        print(f"마지막 남은 {len(data_list)}건을 처리합니다.")
-        inserted_count, inserted_normal_count = insert_batch(data_list)
-        total_saved += (inserted_count if inserted_count else 0)
-        print(f"최종 저장 완료 (총 {total_saved}건)")
+fingerprint_sql = """
+    INSERT INTO parking_lot_fingerprint (prk_center_id, content_hash)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE content_hash = VALUES(content_hash)
+"""
+
+# LOAD DATA LOCAL INFILE 적재용: staging 컬럼(튜플 순서와 동일)과 staging -> 대상 테이블 이동 SQL
+RAW_STAGE_COLUMNS = ['reg_id', 'name', 'lat', 'lng', 'sido', 'sigungu', 'full_address', 'space_no', 'err_yn', 'err_msg']
+NORMAL_STAGE_COLUMNS = ['reg_id', 'name', 'lat', 'lng', 'sido', 'sigungu', 'full_address', 'space_no', 'geohash']
+
+raw_move_sql = '''
+    INSERT INTO parking_lot_raw (
+        reg_id, name, lat, lng, sido, sigungu, full_address, space_no, err_yn, err_msg, reg_nm
+    )
+    SELECT reg_id, name, lat, lng, sido, sigungu, full_address, NULLIF(space_no, ''), err_yn, err_msg, 'API'
+      FROM bulk_stage
+'''
+
+upsert_move_sql = """
+    INSERT INTO parking_lot (reg_id, name, lat, lng, sido, sigungu, full_address, space_no, geohash, use_yn)
+    SELECT reg_id, name, lat, lng, sido, sigungu, full_address, NULLIF(space_no, ''), geohash, 'Y'
+      FROM bulk_stage
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name), lat = VALUES(lat), lng = VALUES(lng), sido = VALUES(sido), sigungu = VALUES(sigungu),
+        full_address = VALUES(full_address), space_no = VALUES(space_no), geohash = VALUES(geohash), use_yn = 'Y'
+"""
+
+WRITE_SQL = {   # 종류: (executemany SQL, staging 컬럼, LOAD DATA 후 이동 SQL)
+    'raw': (sql, RAW_STAGE_COLUMNS, raw_move_sql),
+    'normal': (upsert_sql, NORMAL_STAGE_COLUMNS, upsert_move_sql),
+    'upsert': (upsert_sql, NORMAL_STAGE_COLUMNS, upsert_move_sql),
+}
+
+def write_rows(kind, rows):
+    """
+    rows를 DB에 저장. 건수가 BULK_LOAD_THRESHOLD 이상이면 LOAD DATA LOCAL INFILE, 아니면 executemany 사용
+        kind(필수): 'raw'(parking_lot_raw), 'normal'(parking_lot 전체 적재), 'upsert'(parking_lot 변경분)
+    """
+    query, stage_columns, move_sql = WRITE_SQL[kind]
+    if config_bulk_load_threshold and len(rows) >= config_bulk_load_threshold:
+        return run_bulk_load(stage_columns, rows, move_sql)
+    return run_bulk_insert_query(query, rows)
+
+REQUIRED_KEYS = ['prk_center_id', 'prk_plce_nm', 'prk_plce_entrc_la', 'prk_plce_entrc_lo']
+# 좌표는 숫자이고 WGS84 범위 안이어야 함 (coord가 SRID 4326 POINT라서 범위를 벗어나면 batch 전체가 저장에 실패)
+COORD_KEYS = ['prk_plce_entrc_la', 'prk_plce_entrc_lo']
+COORD_RANGES = {'prk_plce_entrc_la': (-90, 90), 'prk_plce_entrc_lo': (-180, 180)}
+VALIDATOR = BatchValidator(REQUIRED_KEYS, COORD_KEYS, COORD_RANGES)
+# DB에 저장하는 필드 (저장용 튜플의 순서)
+ROW_KEYS = ['prk_center_id', 'prk_plce_nm', 'prk_plce_entrc_la', 'prk_plce_entrc_lo', 'prk_plce_adres_sido',
+            'prk_plce_adres_sigungu', 'prk_plce_adres', 'prk_cmprt_co']
+REGION_INDEX = (ROW_KEYS.index('prk_plce_adres_sido'), ROW_KEYS.index('prk_plce_adres_sigungu'))    # 저장용 튜플의 (시도, 시군구) 위치
+# 변경 여부를 판단하는 필드 (DB에 저장하는 필드)
+HASH_KEYS = ['prk_plce_nm', 'prk_plce_entrc_la', 'prk_plce_entrc_lo', 'prk_plce_adres_sido',
+             'prk_plce_adres_sigungu', 'prk_plce_adres', 'prk_cmprt_co', 'error_yn', 'error_msg']
+
+BASE_URL = 'https://apis.data.go.kr/B553881/Parking/PrkSttusInfo'   # api url 정보
+NUM_OF_ROWS = 2000  # 한번에 받는 데이터의 수
+BATCH_SIZE = 4000   # DB에 한 번에 저장하는 단위
+WRITE_RETRIES = 3   # DB 저장 실패 시 최대 시도 횟수
+PAGE_KEY = '_page_no'   # 조회한 페이지 번호를 표시하는 key (저장하지 않음)
+
+# API key 별 호출 속도 제한 (같은 key를 쓰는 worker들이 함께 사용)
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(api_key):
+    with _rate_limiters_lock:
+        if api_key not in _rate_limiters:
+            _rate_limiters[api_key] = TokenBucket(rate=config_api_rate, capacity=config_api_rate)
+        return _rate_limiters[api_key]
+
+def fetch_page(page_no, api_key=config_api_key):
+    """
+    한 페이지 조회. (주차장 리스트, 전체 건수) 반환 (전체 건수를 모르면 None)
+    API 호출에 실패하면 (None, None) (마지막 페이지 다음의 빈 페이지와 구분)
+    """
+    get_rate_limiter(api_key).acquire()
+    response = fetch_from_api( # fetch_from_api(api 공통함수 호출)
+        BASE_URL,
+        {'serviceKey': api_key, 'pageNo': page_no, 'numOfRows': NUM_OF_ROWS, 'format': 2}
+    )
+    if response is None:
+        return None, None
+    total_count = response.get("totalCount")
+    return response.get("PrkSttusInfo", []), (int(total_count) if total_count is not None else None)
+
+class Ingest:
+    '''
+    주차장 정보를 fetch -> validate -> transform -> write 단계의 pipeline으로 적재.
+    단계 사이의 queue 크기가 정해져 있어서 DB 저장이 느리거나 멈추면 조회도 함께 멈춘다.
+    (전체 데이터 크기와 관계없이 메모리에는 queue에 들어 있는 batch만 올라옴)
+    state를 지정하면 모든 데이터가 저장된 페이지를 기록해 두고(checkpoint), 재시도 후에도 저장하지 못한
+    batch는 dead letter로 보관한다. resume으로 같은 run을 이어서 진행하면 기록된 페이지는 건너뛴다.
+    '''
+    def __init__(self, fetch_workers=1, validate_workers=1, write_workers=1, queue_size=2, sync=None,
+                 state=None, resume=None):
+        """
+        fetch_workers(추가): 동시에 조회할 페이지 수
+        validate_workers(추가): 검증/변환 thread 수
+        write_workers(추가): 동시에 DB에 저장할 batch 수
+        queue_size(추가): 단계 사이에 쌓아둘 수 있는 최대 batch 수
+        sync(추가): DeltaSync (지정하면 변경분만 반영)
+        state(추가): IngestState (checkpoint / dead letter 기록)
+        resume(추가): 이어서 진행할 run_id ('latest'면 마지막에 끝나지 않은 run)
+        """
+        self.__sync = sync
+        self.__state = state
+        self.__resume = resume
+        self.__run_id = None
+        self.__resumed = False
+        self.__lock = threading.Lock()
+        self.__prefetched = {}
+        self.__remaining = {}       # 페이지 번호 -> 아직 저장되지 않은 건수
+        self.__complete = True
+        self.__saved = 0
+        self.__dead_letters = 0
+        self.__regions = set()      # parking_lot이 바뀐 (시도, 시군구)
+
+        stages = [
+            Stage('fetch', self.__fetch, workers=fetch_workers, queue_size=max(queue_size, fetch_workers)),
+            Stage('validate', self.__validate, workers=validate_workers, queue_size=queue_size, batch_size=BATCH_SIZE),
+        ]
+        if sync is None:    # 변경분 반영은 DB의 fingerprint와 비교해야 하므로 write 단계에서 변환
+            stages.append(Stage('transform', self.__transform, workers=validate_workers, queue_size=queue_size))
+        stages.append(Stage('write', self.__write, workers=write_workers, queue_size=queue_size))
+        self.__pipeline = Pipeline(stages, on_error=self.__on_error)
+
+    @property
+    def saved(self):
+        return self.__saved
+
+    @property
+    def run_id(self):
+        return self.__run_id
+
+    @property
+    def resumed(self):
+        '''이전 run을 이어서 진행했는지 (건너뛴 페이지가 있으면 전체 데이터를 본 것이 아님)'''
+        return self.__resumed
+
+    def run(self):
+        """
+        1페이지로 전체 건수를 확인해 조회할 페이지를 정한 뒤 pipeline 실행
+        (전체 건수를 모르면 빈 페이지가 나올 때까지 조회)
+        모든 페이지를 빠짐없이 가져와 저장했으면 True 반환
+        """
+        items, total_count = fetch_page(1)
+        if items is None:
+            print("1페이지 조회 실패. 조회를 중단합니다.")
+            return False
+        self.__prefetched[1] = items
+        if total_count is not None:
+            pages = range(1, math.ceil(total_count / NUM_OF_ROWS) + 1)
+            print(f"전체 {total_count}건, {len(pages)}페이지를 조회합니다.")
+        else:
+            pages = itertools.count(1)
+
+        done = self.__start_run(len(pages) if total_count is not None else None)
+        if done:
+            if 1 in done:
+                self.__prefetched.pop(1, None)
+            print(f"run {self.__run_id}: 저장이 끝난 {len(done)}페이지를 건너뜁니다.")
+            pages = (page_no for page_no in pages if page_no not in done)
+
+        stats = self.__pipeline.run(pages)
+        for name, stat in stats.items():
+            print(f"[{name}] {stat['records']}건, {stat['records_per_sec']:.0f}건/초, "
+                  f"실행 {stat['busy']:.1f}초, 다음 단계 대기 {stat['blocked']:.1f}초, 오류 {stat['errors']}건")
+
+        # 바뀐 지역의 region_catalog를 다시 계산하고, parking_lot이 바뀌었음을 기록 (각 프로세스의 메모리 색인이 새로 빌드됨)
+        regions = self.__regions | (self.__sync.take_regions() if self.__sync else set())
+        if regions and refresh_region_catalog(regions) is None:
+            print("region_catalog 갱신 실패.")
+        if self.__saved:
+            publish_changes()
+        print(f"최종 저장 완료 (총 {self.__saved}건)")
+        if self.__state:
+            watermark = self.__state.finish_run(self.__run_id, self.__complete)
+            print(f"run {self.__run_id}: {watermark}페이지까지 저장 완료, dead letter {self.__dead_letters}건")
+        return self.__complete
+
+    def stats(self):
+        return self.__pipeline.stats()
+
+    def __start_run(self, total_pages):
+        '''새 run을 시작하거나 이전 run을 이어받고, 이미 저장이 끝난 페이지 set 반환'''
+        if self.__state is None:
+            return set()
+        mode = 'full' if self.__sync is None else 'delta'
+        if self.__resume:
+            run_id = self.__state.find_run(mode, None if self.__resume == 'latest' else self.__resume)
+            if run_id:
+                self.__run_id, self.__resumed = run_id, True
+                self.__state.set_total_pages(run_id, total_pages)
+                return self.__state.done_pages(run_id)
+            print("이어서 진행할 run이 없어 새로 시작합니다.")
+        self.__run_id = self.__state.start_run(mode, total_pages)
+        print(f"run {self.__run_id} 시작")
+        return set()
+
+    def __fail(self):
+        with self.__lock:
+            self.__complete = False
+
+    def __on_error(self, stage, item, error):
+        print(f"[{stage}] 처리 중 오류: {error}")
+        self.__fail()
+
+    def __fetch(self, page_no):
+        items = self.__prefetched.pop(page_no, None)
+        if items is None:
+            items, _ = fetch_page(page_no)
+        if items is None:   # API 호출 실패
+            print(f"{page_no}페이지 조회 실패.")
+            self.__fail()
+            return None
+        if not items:       # 마지막 페이지 다음의 빈 페이지
+            self.__pipeline.stop()
+            return None
+        for data in items:  # batch가 여러 페이지에 걸쳐도 페이지별 저장 완료를 알 수 있도록 표시
+            data[PAGE_KEY] = page_no
+        with self.__lock:
+            self.__remaining[page_no] = len(items)
+        print(f"{page_no}페이지 완료 ({len(items)}건)")
+        return items
+
+    def __validate(self, data_list):
+        if self.__sync is not None:     # 변경분 반영은 검증 결과가 기록된 데이터(dict)로 비교
+            return valid_check_with_logging(data_list, REQUIRED_KEYS, COORD_KEYS, COORD_RANGES)
+        columns = to_columns(data_list)
+        return Counter(data.get(PAGE_KEY) for data in data_list), columns, VALIDATOR.validate(columns)
+
+    def __transform(self, batch):
+        pages, columns, result = batch
+        return (pages, *to_rows(columns, result))
+
+    def __write(self, batch):
+        if self.__sync is not None:
+            pages = Counter(data.get(PAGE_KEY) for data in batch)
+            inserted_count = self.__sync.write(batch)[0]     # 단계별로 재시도하므로 batch 전체를 다시 쓰지 않음
+            if inserted_count is None:
+                self.__dead_letter('delta', batch)
+        else:
+            pages, raw_rows, normal_rows = batch
+            inserted_count = with_retry(lambda: write_rows('raw', raw_rows))
+            if inserted_count is None:
+                self.__dead_letter('raw', raw_rows)
+            if normal_rows:
+                if with_retry(lambda: write_rows('normal', normal_rows)) is None:
+                    self.__dead_letter('normal', normal_rows)
+                else:
+                    with self.__lock:
+                        self.__regions.update(to_regions(normal_rows))
+                    if inserted_count is None:  # parking_lot은 바뀌었으므로 publish_changes가 실행되도록 저장 건수에 포함
+                        inserted_count = len(normal_rows)
+        self.__settle(pages)
+        if inserted_count is None:
+            return None
+        with self.__lock:
+            self.__saved += inserted_count
+            print(f"DB 저장 완료! (누적 저장: {self.__saved}건)")
+        return inserted_count
+
+    def __dead_letter(self, kind, payload):
+        '''재시도 후에도 저장하지 못한 batch 보관 (state가 없으면 버림)'''
+        self.__fail()
+        with self.__lock:
+            self.__dead_letters += 1
+        if self.__state is None:
+            print(f"DB 저장 실패 ({kind} {len(payload)}건).")
+            return
+        self.__state.add_dead_letter(self.__run_id, kind, payload)
+        print(f"DB 저장 실패 ({kind} {len(payload)}건). dead letter로 보관합니다.")
+
+    def __settle(self, pages):
+        '''batch에 포함된 페이지별 건수를 처리 완료로 반영하고, 모두 처리된 페이지를 checkpoint로 기록'''
+        done = []
+        with self.__lock:
+            for page_no, count in pages.items():
+                self.__remaining[page_no] -= count
+                if self.__remaining[page_no] <= 0:
+                    del self.__remaining[page_no]
+                    done.append(page_no)
+        if done and self.__state:
+            self.__state.mark_pages(self.__run_id, done)
+
+def replay_dead_letters(state, sync=None):
+    """
+    dead letter로 보관된 batch를 다시 저장하고, 저장한 건수 반환
+        state(필수): IngestState
+        sync(추가): 변경분 반영(delta) batch를 저장할 DeltaSync (없으면 새로 생성)
+    """
+    saved = 0
+    sync = sync or DeltaSync()
+    regions = set()
+    for id, run_id, kind, payload in state.dead_letters():
+        if kind == 'delta':
+            count = sync.write(payload)[0]
+        else:
+            count = write_rows(kind, [tuple(row) for row in payload])
+            if count is not None and kind != 'raw':
+                regions.update(to_regions(payload))
+        if count is None:
+            print(f"dead letter {id} (run {run_id}, {kind} {len(payload)}건) 저장 실패.")
+            continue
+        state.mark_replayed(id)
+        saved += count
+        print(f"dead letter {id} (run {run_id}, {kind} {len(payload)}건) 저장 완료.")
+    refresh_region_catalog(regions | sync.take_regions())
+    if saved:
+        publish_changes()
+    return saved
+
+def publish_changes():
+    '''parking_lot 변경이 끝난 뒤 집계 피라미드를 다시 만들고, 바뀌었음을 기록 (각 프로세스의 색인/캐시가 새로 만들어짐)'''
+    cells = rebuild_parking_pyramid()
+    print("집계 피라미드 갱신 실패." if cells is None else f"집계 피라미드 갱신 완료 ({cells}개 격자)")
+    bump_data_version()
+
+def with_retry(fn, retries=WRITE_RETRIES):
+    '''fn()이 None을 반환하면(저장 실패) 간격을 늘려가며 재시도. 끝까지 실패하면 None'''
+    for i in range(retries):
+        result = fn()
+        if result is not None:
+            return result
+        if i + 1 < retries:
+            print(f" {i + 1}번째 저장 재시도 중...")
+            time.sleep(2 * (i + 1))
     return None
 
-def insert_batch(data_list):
-    required = ['prk_center_id', 'prk_plce_nm', 'prk_plce_entrc_la', 'prk_plce_entrc_lo']
+def to_geohashes(lats, lngs):
+    '''위도/경도 문자열 리스트를 geohash 리스트로 한 번에 변환 (숫자가 아니면 None)'''
+    lats, lngs = to_column(lats), to_column(lngs)
+    lat, lat_invalid = to_floats(lats)
+    lng, lng_invalid = to_floats(lngs)
+    usable = ~(lat_invalid | lng_invalid | (lats == None) | (lngs == None))    # noqa: E711
+    geohashes = encode_many(lat, lng)
+    return [geohash if ok else None for geohash, ok in zip(geohashes, usable.tolist())]
+
+def to_columns(data_list):
+    '''저장에 필요한 필드를 컬럼(리스트)으로 모음 (ROW_KEYS 순서)'''
+    return {key: [data.get(key) for data in data_list] for key in ROW_KEYS}
+
+def to_raw_row(data):
+    '''parking_lot_raw 저장용 튜플'''
+    return (*(data.get(key) for key in ROW_KEYS), data.get('error_yn'), data.get('error_msg'))
+
+def to_normal_rows(columns):
+    '''컬럼(to_columns)을 parking_lot 저장용 튜플 리스트로 변환'''
+    lats, lngs = columns['prk_plce_entrc_la'], columns['prk_plce_entrc_lo']
+    return list(zip(*columns.values(), to_geohashes(lats, lngs)))
+
+def to_regions(rows):
+    '''저장용 튜플 리스트의 (시도, 시군구) set'''
+    sido, sigungu = REGION_INDEX
+    return {(row[sido], row[sigungu]) for row in rows}
+
+def to_rows(columns, result):
+    '''검증한 컬럼을 (parking_lot_raw 저장용 튜플 리스트, parking_lot 저장용 튜플 리스트)로 변환'''
+    raw_rows = list(zip(*columns.values(), result.error_yn.tolist(), result.error_msg.tolist()))
+    valid = result.valid.tolist()
+    normal_rows = to_normal_rows({key: list(itertools.compress(values, valid)) for key, values in columns.items()})
+    return raw_rows, normal_rows
+
+def content_hash(data):
+    '''변경 여부 판단용 해시 (HASH_KEYS 필드 값으로 계산)'''
+    text = '\x1f'.join('' if data.get(key) is None else str(data.get(key)) for key in HASH_KEYS)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def chunks(items, size=1000):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class SyncError(Exception):
+    '''변경분 반영 중 DB 변경이 실패했을 때 발생'''
+    pass
+
+class DeltaSync:
+    '''
+    변경분만 반영하는 적재.
+    prk_center_id 별로 저장 필드의 해시를 parking_lot_fingerprint에 저장해 두고,
+    해시가 달라진(새로 생긴) 주차장만 parking_lot에 upsert 한다.
+    전체 조회가 끝나면 이번에 보이지 않은 주차장은 use_yn = 'N'으로 바꾼다.
+    '''
+    def __init__(self):
+        self.__seen = set()
+        self.__regions = set()      # parking_lot이 바뀐 (시도, 시군구)
+        self.__lock = threading.Lock()
+        self.__counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'error': 0, 'retired': 0}
+
+    @property
+    def counts(self):
+        return dict(self.__counts)
+
+    def __load_fingerprints(self, ids):
+        fingerprints = {}
+        for part in chunks(ids):
+            rows = run_query(
+                f"SELECT prk_center_id, content_hash FROM parking_lot_fingerprint WHERE prk_center_id IN ({', '.join(['%s'] * len(part))})",
+                tuple(part))
+            if rows is None:
+                return None
+            fingerprints.update({row['prk_center_id']: row['content_hash'] for row in rows})
+        return fingerprints
+
+    def __load_regions(self, ids):
+        '''이미 저장된 주차장들의 (시도, 시군구) set (변경 전 지역)'''
+        regions = set()
+        for part in chunks(ids):
+            rows = run_query(
+                f"SELECT DISTINCT sido, sigungu FROM parking_lot WHERE reg_id IN ({', '.join(['%s'] * len(part))})",
+                tuple(part))
+            if rows is None:
+                return None
+            regions.update((row['sido'], row['sigungu']) for row in rows)
+        return regions
+
+    def take_regions(self):
+        '''지금까지 parking_lot이 바뀐 (시도, 시군구) set을 반환하고 비움'''
+        with self.__lock:
+            regions, self.__regions = self.__regions, set()
+        return regions
+
+    def write(self, validated_list):
+        """
+        검증(valid_check_with_logging)을 거친 데이터 중 변경분만 반영
+        (반영한 건수, 정상 데이터 반영 건수) 반환. 실패하면 (None, None)
+        DB 작업은 단계마다 따로 재시도(with_retry)한다. 이미 저장한 단계(parking_lot_raw 등)는 다시 실행하지 않는다.
+        """
+
+        # 같은 배치 안에 중복된 주차장은 마지막 값만 사용
+        latest = {}
+        for data in validated_list:
+            if data.get('prk_center_id') not in (None, ''):
+                latest[str(data.get('prk_center_id'))] = data
+
+        fingerprints = with_retry(lambda: self.__load_fingerprints(latest.keys()))
+        if fingerprints is None:
+            return None, None
+
+        changed = {id: data for id, data in latest.items() if fingerprints.get(id) != content_hash(data)}
+        valid = [data for data in changed.values() if data.get('error_yn') == 'N']
+        invalid_ids = [id for id, data in changed.items() if data.get('error_yn') != 'N']
+
+        # 주소가 바뀌거나 사용 중지되는 주차장은 이전 지역도 다시 계산
+        regions = with_retry(lambda: self.__load_regions([id for id in changed if id in fingerprints]))
+        if regions is None:
+            return None, None
+        regions.update((data.get('prk_plce_adres_sido'), data.get('prk_plce_adres_sigungu')) for data in valid)
 
-    # 검증 함수 실행
-    validated_list = valid_check_with_logging(data_list, required)
+        if changed:
+            raw_rows = [to_raw_row(data) for data in changed.values()]
+            if with_retry(lambda: write_rows('raw', raw_rows)) is None:
+                return None, None
+        if valid:
+            normal_rows = to_normal_rows(to_columns(valid))
+            if with_retry(lambda: write_rows('upsert', normal_rows)) is None:
+                return None, None
+        for part in chunks(invalid_ids):     # 오류 데이터로 바뀐 주차장은 사용 중지
+            if with_retry(lambda: run_query(f"UPDATE parking_lot SET use_yn = 'N' WHERE reg_id IN ({', '.join(['%s'] * len(part))})",
+                                            tuple(part), is_select=False)) is None:
+                return None, None
+        if changed:
+            hashes = [(id, content_hash(data)) for id, data in changed.items()]
+            if with_retry(lambda: run_bulk_insert_query(fingerprint_sql, hashes)) is None:
+                return None, None
 
-    # DB에 저장하기 좋게 가공 (튜플 형태로 변환)
-    processed_data = [
-        (data.get('prk_center_id'), data.get('prk_plce_nm'), data.get('prk_plce_entrc_la'),
-         data.get('prk_plce_entrc_lo')
-             , data.get('prk_plce_adres_sido'), data.get('prk_plce_adres_sigungu'), data.get('prk_plce_adres')
-             , data.get('prk_cmprt_co'), data.get('error_yn'), data.get('error_msg'))
-        for data in validated_list
-    ]
+        inserted = sum(1 for id, data in changed.items() if id not in fingerprints and data.get('error_yn') == 'N')
+        with self.__lock:   # 여러 write worker가 함께 사용
+            self.__seen.update(id for id, data in latest.items() if data.get('error_yn') == 'N')
+            self.__regions.update(regions)
+            self.__counts['inserted'] += inserted
+            self.__counts['updated'] += len(valid) - inserted
+            self.__counts['error'] += len(invalid_ids)
+            self.__counts['unchanged'] += len(latest) - len(changed)
+        return len(changed), len(valid)
 
-    # DB 저장 함수 호출 (이미 만들어둔 bulk_insert 사용)
-    inserted_count = run_bulk_insert_query(sql, processed_data)
+    def retire_missing(self):
+        """
+        이번 전체 조회에서 보이지 않은 주차장을 use_yn = 'N'으로 변경하고 건수 반환
+        중간에 실패하면 SyncError (일부만 반영된 상태이므로 data_version을 올리지 않는다)
+        """
+        if not self.__seen:
+            return 0
+        rows = run_query("SELECT reg_id, sido, sigungu FROM parking_lot WHERE use_yn = 'Y'")
+        if rows is None:
+            raise SyncError("사용 중인 주차장 조회 실패.")
+        missing = [row['reg_id'] for row in rows if row['reg_id'] not in self.__seen]
+        with self.__lock:
+            self.__regions.update((row['sido'], row['sigungu']) for row in rows if row['reg_id'] not in self.__seen)
+        retired = 0
+        for part in chunks(missing):
+            placeholders = ', '.join(['%s'] * len(part))
+            # 다시 나타나면 변경분으로 인식되도록 fingerprint를 먼저 삭제 (사용 중지가 실패해도 다음 적재에서 다시 반영됨)
+            if run_query(f"DELETE FROM parking_lot_fingerprint WHERE prk_center_id IN ({placeholders})",
+                         tuple(part), is_select=False) is None:
+                raise SyncError(f"fingerprint 삭제 실패 ({retired}/{len(missing)}건 사용 중지 후).")
+            if run_query(f"UPDATE parking_lot SET use_yn = 'N' WHERE reg_id IN ({placeholders})",
+                         tuple(part), is_select=False) is None:
+                raise SyncError(f"사용 중지 실패 ({retired}/{len(missing)}건 사용 중지 후).")
+            retired += len(part)
+            with self.__lock:
+                self.__counts['retired'] += len(part)
+        return retired
 
-    normal_data = [
-        (data.get('prk_center_id'), data.get('prk_plce_nm'), data.get('prk_plce_entrc_la'),
-         data.get('prk_plce_entrc_lo')
-             , data.get('prk_plce_adres_sido'), data.get('prk_plce_adres_sigungu'), data.get('prk_plce_adres')
-             , data.get('prk_cmprt_co'), data.get('prk_plce_entrc_lo'),
-         data.get('prk_plce_entrc_la'))
-        for data in validated_list if data.get('error_yn') == 'N'
-    ]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='공공데이터 주차장 정보 적재')
+    parser.add_argument('--workers', type=int, default=1, help='동시에 조회할 페이지 수')
+    parser.add_argument('--validate-workers', type=int, default=1, help='검증/변환 thread 수')
+    parser.add_argument('--write-workers', type=int, default=1, help='동시에 DB에 저장할 batch 수')
+    parser.add_argument('--queue-size', type=int, default=2, help='단계 사이에 쌓아둘 수 있는 최대 batch 수')
+    parser.add_argument('--delta', action='store_true', help='변경된 주차장만 반영하고 사라진 주차장은 사용 중지')
+    parser.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                        help='중단된 run을 이어서 진행 (RUN_ID를 생략하면 마지막에 끝나지 않은 run)')
+    parser.add_argument('--replay', action='store_true', help='dead letter로 보관된 batch만 다시 저장')
+    args = parser.parse_args()
 
-    inserted_normal_count = run_bulk_insert_query(normal_sql, normal_data)
+    start = time.time()
+    state = IngestState(config_ingest_state_path)
+    sync = DeltaSync() if args.delta else None
+    if args.replay:
+        print(f"dead letter 저장 완료 (총 {replay_dead_letters(state, sync)}건)")
+        print(f"소요 시간: {time.time() - start:.1f}초")
+        raise SystemExit
 
-    return (inserted_count, inserted_normal_count)
+    ingest = Ingest(fetch_workers=args.workers, validate_workers=args.validate_workers,
+                    write_workers=args.write_workers, queue_size=args.queue_size, sync=sync,
+                    state=state, resume=args.resume)
+    complete = ingest.run()
 
-fetch_parking_api()
\ No newline at end of file
+    if sync:
+        if complete and not ingest.resumed:
+            try:
+                if sync.retire_missing():
+                    refresh_region_catalog(sync.take_regions())
+                    publish_changes()
+            except SyncError as err:
+                print(f"사라진 주차장 처리 실패: {err} data_version은 올리지 않습니다.")
+        else:
+            print("전체 데이터를 한 번에 반영하지 못해 사라진 주차장 처리(use_yn = 'N')는 건너뜁니다.")
+        print("변경분 반영 결과: " + ", ".join(f"{k} {v}건" for k, v in sync.counts.items()))
+    print(f"소요 시간: {time.time() - start:.1f}초")
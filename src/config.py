@@ -10,12 +10,61 @@ load_dotenv()
 
 class Config:
     API_KEY = os.getenv("API_KEY")
+    API_RATE = float(os.getenv("API_RATE", 10))                # 공공데이터 API key 당 초당 최대 호출 수
     DB = json.loads(os.getenv('DB_CONFIG', '{}'))
     OPINET = os.getenv("OPINET")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))           # 동시에 열어둘 최대 connection 수
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # connection 대기 최대 시간(초)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # idle connection 재연결 기준(초)
+    BULK_LOAD_THRESHOLD = int(os.getenv("BULK_LOAD_THRESHOLD", 0))  # 이 건수 이상이면 LOAD DATA LOCAL INFILE로 적재 (0: 사용 안 함, executemany보다 빠른지 측정 후 설정)
+    SPATIAL_INDEX = os.getenv("SPATIAL_INDEX", "N")            # Y: 주변 주차장 검색을 메모리 색인으로 처리
+    NEAR_PLANNER = os.getenv("NEAR_PLANNER", "geohash")        # 주변 주차장 SQL 검색 방식 (geohash: 반경을 덮는 geohash 범위 최대 32개, mbr: ±0.023° 사각형)
+    NEAR_CACHE_SIZE = int(os.getenv("NEAR_CACHE_SIZE", 512))   # 주변 주차장 검색 결과 캐시 최대 개수
+    NEAR_CACHE_TTL = float(os.getenv("NEAR_CACHE_TTL", 600))   # 주변 주차장 검색 결과 캐시 유효시간(초)
+    NEAR_CACHE_GRID = float(os.getenv("NEAR_CACHE_GRID", 0.001))  # 캐시 key로 쓸 좌표 격자 크기(도, 약 100m)
+    GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")       # 목적지 검색 캐시 SQLite 파일 (기본: data/geocode_cache.sqlite3)
+    GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", 30 * 86400))        # 찾은 결과 유효시간(초)
+    GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", 86400))       # 찾지 못한 결과 유효시간(초)
+    GEOCODE_RATE = float(os.getenv("GEOCODE_RATE", 1))         # Nominatim 초당 최대 호출 수
+    INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH")         # 적재 checkpoint / dead letter SQLite 파일 (기본: data/ingest_state.sqlite3)
+    VIEWPORT_LIMIT = int(os.getenv("VIEWPORT_LIMIT", 1000))    # 지도 범위 보기에서 한 번에 표시할 최대 주차장 수
+    TILE_LIMIT = int(os.getenv("TILE_LIMIT", 300))             # 지도 tile 하나에서 조회할 최대 주차장 수
+    TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", 2048))  # 지도 tile 조회 결과 캐시 최대 개수
+    TILE_CACHE_TTL = float(os.getenv("TILE_CACHE_TTL", 600))   # 지도 tile 조회 결과 캐시 유효시간(초)
+    PYRAMID_CELL_LIMIT = int(os.getenv("PYRAMID_CELL_LIMIT", 2000))  # 축소된 지도에서 한 번에 표시할 최대 집계 격자 수
+    MAP_CACHE_SIZE = int(os.getenv("MAP_CACHE_SIZE", 32))     # 검색 결과 지도 HTML 캐시 최대 개수
+    MAP_CACHE_TTL = float(os.getenv("MAP_CACHE_TTL", 600))     # 검색 결과 지도 HTML 캐시 유효시간(초)
+    OIL_CACHE_SIZE = int(os.getenv("OIL_CACHE_SIZE", 256))     # 주유소 검색 결과 캐시 최대 개수
+    OIL_CACHE_TTL = float(os.getenv("OIL_CACHE_TTL", 600))     # 주유소 검색 결과 캐시 유효시간(초)
+    OIL_CACHE_GRID = float(os.getenv("OIL_CACHE_GRID", 100))   # 캐시 key로 쓸 KATEC 좌표 격자 크기(m)
 
 config_db = Config.DB
 config_api_key = Config.API_KEY
+config_api_rate = Config.API_RATE
 config_opinet = Config.OPINET
+config_db_pool_size = Config.DB_POOL_SIZE
+config_db_pool_timeout = Config.DB_POOL_TIMEOUT
+config_db_pool_recycle = Config.DB_POOL_RECYCLE
+config_bulk_load_threshold = Config.BULK_LOAD_THRESHOLD
+config_spatial_index = Config.SPATIAL_INDEX == 'Y'
+config_near_planner = Config.NEAR_PLANNER
+config_near_cache_size = Config.NEAR_CACHE_SIZE
+config_near_cache_ttl = Config.NEAR_CACHE_TTL
+config_near_cache_grid = Config.NEAR_CACHE_GRID
+config_geocode_cache_ttl = Config.GEOCODE_CACHE_TTL
+config_geocode_negative_ttl = Config.GEOCODE_NEGATIVE_TTL
+config_geocode_rate = Config.GEOCODE_RATE
+config_viewport_limit = Config.VIEWPORT_LIMIT
+config_tile_limit = Config.TILE_LIMIT
+config_tile_cache_size = Config.TILE_CACHE_SIZE
+config_tile_cache_ttl = Config.TILE_CACHE_TTL
+config_pyramid_cell_limit = Config.PYRAMID_CELL_LIMIT
+config_map_cache_size = Config.MAP_CACHE_SIZE
+config_map_cache_ttl = Config.MAP_CACHE_TTL
+config_oil_cache_size = Config.OIL_CACHE_SIZE
+config_oil_cache_ttl = Config.OIL_CACHE_TTL
+config_oil_cache_grid = Config.OIL_CACHE_GRID
 # root directory
 config_base_dir = Path(__file__).resolve().parent.parent
-
+config_geocode_cache_path = Config.GEOCODE_CACHE_PATH or config_base_dir / 'data' / 'geocode_cache.sqlite3'
+config_ingest_state_path = Config.INGEST_STATE_PATH or config_base_dir / 'data' / 'ingest_state.sqlite3'
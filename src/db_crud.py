@@ -1,147 +1,579 @@
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+
 import mysql.connector
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from src.model import ParkingLot
+from src.model import ParkingLotBatch
 from src.model import Destination
+from src.model import RegionPage
 
 from src.utils import get_mbr_polygon
 
 from src.config import config_db
+from src.config import config_db_pool_size, config_db_pool_timeout, config_db_pool_recycle
+from src.config import config_bulk_load_threshold
+from src.config import config_spatial_index, config_near_planner
+from src.config import config_near_cache_size, config_near_cache_ttl, config_near_cache_grid
+from src.config import config_viewport_limit, config_tile_limit, config_tile_cache_size, config_tile_cache_ttl
+from src.config import config_pyramid_cell_limit
+from src.geohash import cover_ranges
+from src.cache import LRUCache
+from src.db_pool import ConnectionPool
+from src.spatial_index import ParkingLotIndex, IndexHolder, haversine
+from src.viewport import Viewport, tile_bounds, cell_range, pyramid_level, PYRAMID_LEVELS
+
+NEAR_RADIUS = 2000      # 주변 주차장 검색 반경(m)
 
 @st.cache_resource
+def get_pool():
+    '''프로세스 당 하나의 connection pool (모든 세션이 공유)'''
+    db_config = config_db
+    if config_bulk_load_threshold:     # LOAD DATA LOCAL INFILE 사용 시 client 쪽 허용 필요
+        db_config = {**config_db, 'allow_local_infile': True}
+    return ConnectionPool(db_config, size=config_db_pool_size, timeout=config_db_pool_timeout,
+                          recycle=config_db_pool_recycle)
+
+
+@contextmanager
 def get_connection():
+    '''pool에서 connection을 빌려오고, with 블록이 끝나면 반납'''
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def get_pool_stats():
+    '''pool 사용 현황 (in_use, waiters, wait_avg/max/p99 등)'''
+    return get_pool().stats()
+
+
+@st.cache_data(ttl=30)
+def get_data_version():
+    '''parking_lot 데이터 버전. 적재(collect_data)가 끝날 때마다 증가 (30초마다 확인)'''
+    rows = run_query("SELECT version FROM data_version WHERE name = 'parking_lot'")
+    return rows[0]['version'] if rows else 0
+
+
+def bump_data_version():
+    '''parking_lot이 변경되었음을 기록 (메모리 색인 등이 새로 빌드되도록)'''
+    return run_query("UPDATE data_version SET version = version + 1 WHERE name = 'parking_lot'", is_select=False)
+
+
+def load_parking_index(version=None):
+    '''use_yn = 'Y'인 주차장 전체를 읽어 메모리 색인 생성'''
+    sql = '''SELECT id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no
+               FROM parking_lot
+              WHERE use_yn = 'Y'
+          '''
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+            lots = ParkingLotBatch.from_cursor(cursor, size=10000)
+    return ParkingLotIndex(lots, version)
+
+
+@st.cache_resource
+def get_index_holder():
+    '''프로세스 당 하나의 색인 보관소 (모든 세션이 공유)'''
+    return IndexHolder(load_parking_index)
+
+
+def get_parking_index():
+    '''최신 data_version 기준의 주차장 메모리 색인'''
+    return get_index_holder().get(get_data_version())
+
+
+@st.cache_resource
+def get_near_cache():
+    '''주변 주차장 검색 결과 캐시 (프로세스 당 하나, 모든 세션/페이지가 공유)'''
+    return LRUCache(maxsize=config_near_cache_size, ttl=config_near_cache_ttl)
+
+
+def get_near_cache_stats():
+    '''주변 주차장 검색 캐시 사용 현황 (hits, misses, evictions 등)'''
+    return get_near_cache().stats()
+
+
+def get_near_parking_data(_dest: Destination, radius=NEAR_RADIUS):
+    if config_spatial_index:
+        try:
+            return get_parking_index().query_radius(_dest.lat, _dest.lng, radius)
+        except Exception as e:
+            st.error(f"주차장 색인 오류: {e}")
+            return ParkingLotBatch.empty()
+    if config_near_planner == 'mbr':
+        return _query_near_parking(*_near_sql_mbr(_dest)) or ParkingLotBatch.empty()
+
+    # 목적지 좌표를 격자에 맞춰 key로 사용하고, 격자 오차만큼 넓힌 반경의 후보를 캐시에 보관.
+    # 반환할 때는 실제 목적지 기준으로 거리를 다시 계산해서 반경 안의 주차장만 돌려준다.
+    grid = config_near_cache_grid
+    cell_lat, cell_lng = round(_dest.lat / grid), round(_dest.lng / grid)
+    key = (get_data_version(), cell_lat, cell_lng, radius)
+
+    cache = get_near_cache()
+    candidates = cache.get(key)
+    if candidates is None:
+        margin = grid * 111195 * math.sqrt(2) / 2      # 격자 중심과 실제 좌표 사이의 최대 거리(m)
+        center = Destination(None, None, cell_lat * grid, cell_lng * grid)
+        candidates = _query_near_parking(*_near_sql_geohash(center, radius + margin))
+        if candidates is None:
+            return ParkingLotBatch.empty()
+        cache.put(key, candidates)
+    return _rank_near(candidates, _dest, radius)
+
+
+def _rank_near(candidates, _dest: Destination, radius):
+    '''후보 주차장(ParkingLotBatch)을 목적지 기준 실제 거리로 다시 걸러서 가까운 순으로 정렬'''
+    if not len(candidates):
+        return candidates
+    dist = haversine(_dest.lat, _dest.lng, candidates.lats, candidates.lngs)
+    idx = np.flatnonzero(dist <= radius)
+    idx = idx[np.argsort(dist[idx], kind='stable')]
+    return candidates.take(idx, distances=dist[idx])
+
+
+def _query_near_parking(sql, params):
+    '''주변 주차장 SQL 실행 (SELECT 컬럼은 PARKING_LOT_FIELDS + dist 순서). 오류가 나면 None'''
     try:
-        conn = mysql.connector.connect(**config_db)
-        return conn
-    except mysql.connector.Error as err:
-        st.error(f"Error: {err}")
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return ParkingLotBatch.from_cursor(cursor)
+
+    except Exception as e:
+        st.error(f"DB 연결 오류: {e}")
         return None
 
 
-def get_near_parking_data(_dest: Destination):
+def _near_sql_mbr(_dest: Destination):
+    '''목적지 기준 ±0.023° 사각형(MBR) 안의 주차장 조회 (기존 방식)'''
+    delta = 0.023
+    min_lat, max_lat = _dest.lat - delta, _dest.lat + delta
+    min_lng, max_lng = _dest.lng - delta, _dest.lng + delta
+
+    sql = '''SELECT id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no, ST_Distance_Sphere(POINT(lng, lat), POINT(%s, %s)) as dist FROM parking_lot WHERE MBRContains(ST_GeomFromText(%s, 4326, 'axis-order=long-lat'), coord)
+             and use_yn = 'Y'
+          '''
+    polygon_str = get_mbr_polygon(min_lng, min_lat, max_lng, max_lat)
+    return sql, (_dest.lng, _dest.lat, polygon_str)
+
+
+def _near_sql_geohash(_dest: Destination, radius):
+    """
+    목적지 반경(radius, m)을 덮는 geohash 범위들을 범위 조건(geohash BETWEEN 시작 AND 끝)으로 조회한 뒤
+    실제 거리로 한 번 더 걸러서 가까운 순으로 정렬
+    거리 계산은 (use_yn, geohash, lat, lng) 인덱스에 있는 컬럼만 쓰는 derived table에서 하고, 반경 안에 든 행만
+    parking_lot과 join해서 나머지 컬럼을 읽는다. (실행 계획은 측정하지 않았음: EXPLAIN으로 확인)
+    """
+    ranges = cover_ranges(_dest.lat, _dest.lng, radius)
+    range_filter = ' OR '.join(['geohash BETWEEN %s AND %s'] * len(ranges))
+    sql = f'''SELECT p.id, p.reg_id, p.name, p.lat, p.lng, p.sido, p.sigungu, p.full_address, p.space_no, near.dist
+                FROM (SELECT id, ST_Distance_Sphere(POINT(lng, lat), POINT(%s, %s)) as dist
+                        FROM parking_lot
+                       WHERE use_yn = 'Y'
+                         AND ({range_filter})
+                      HAVING dist <= %s) near
+                JOIN parking_lot p ON p.id = near.id
+               ORDER BY near.dist
+           '''
+    return sql, (_dest.lng, _dest.lat, *[value for pair in ranges for value in pair], radius)
+
+
+region_catalog_sql = '''
+    INSERT INTO region_catalog (sido, sigungu, lot_count, space_total, min_lat, min_lng, max_lat, max_lng)
+    SELECT sido, sigungu, COUNT(*), COALESCE(SUM(space_no), 0), MIN(lat), MIN(lng), MAX(lat), MAX(lng)
+      FROM parking_lot
+     WHERE use_yn = 'Y'
+       AND sido = %s
+       AND sigungu = %s
+     GROUP BY sido, sigungu
+'''
+
+
+def refresh_region_catalog(regions):
+    """
+    변경된 지역의 region_catalog 행을 다시 계산하고, 처리한 지역 수 반환 (실패하면 None)
+        regions(필수): (시도, 시군구) iterable
+    지역마다 (use_yn, sido, sigungu, ...) 인덱스 범위만 읽으며, 주차장이 모두 없어진 지역은 행이 남지 않는다.
+    """
+    regions = {(sido, sigungu) for sido, sigungu in regions if sido and sigungu}
+    if not regions:
+        return 0
     try:
-        conn = get_connection()
-        if not conn:
-            return list()
-        if not conn.is_connected():
-            conn.reconnect(attempts=3, delay=2)
-        delta = 0.023
-        min_lat, max_lat = _dest.lat - delta, _dest.lat + delta
-        min_lng, max_lng = _dest.lng - delta, _dest.lng + delta
-
-        sql = '''SELECT id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no, use_yn, ST_Distance_Sphere(POINT(lng, lat), POINT(%s, %s)) as dist FROM parking_lot WHERE MBRContains(ST_GeomFromText(%s, 4326, 'axis-order=long-lat'), coord) 
-                 and use_yn = 'Y'
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                for sido, sigungu in regions:   # 한 transaction 안에서 지우고 다시 계산
+                    cursor.execute('DELETE FROM region_catalog WHERE sido = %s AND sigungu = %s', (sido, sigungu))
+                    cursor.execute(region_catalog_sql, (sido, sigungu))
+                conn.commit()
+                return len(regions)
+
+    except mysql.connector.Error as err:
+        print(f"SQL 에러: {err}")
+        return None
+
+
+@st.cache_resource
+def get_tile_cache():
+    '''지도에 표시할 조회 결과(tile별 주차장, 집계 격자, 지역 주차장) 캐시 (프로세스 당 하나, 모든 세션이 공유)'''
+    return LRUCache(maxsize=config_tile_cache_size, ttl=config_tile_cache_ttl)
+
+
+def get_tile_cache_stats():
+    '''지도 tile 캐시 사용 현황 (hits, misses, evictions 등)'''
+    return get_tile_cache().stats()
+
+
+def get_parking_tile(z, x, y, limit=config_tile_limit):
+    '''
+    tile 범위 안의 주차장 (주차면수가 많은 순으로 최대 limit개). 오류가 나면 None
+    결과는 (data_version, z, x, y) 기준으로 캐시한다.
+    '''
+    key = (get_data_version(), z, x, y, limit)
+    cache = get_tile_cache()
+    lots = cache.get(key)
+    if lots is not None:
+        return lots
+
+    south, west, north, east = tile_bounds(z, x, y)
+    if config_spatial_index:
+        try:
+            lots = get_parking_index().query_bbox(south, west, north, east, limit)
+        except Exception as e:
+            st.error(f"주차장 색인 오류: {e}")
+            return None
+    else:
+        sql = '''SELECT id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no
+                   FROM parking_lot
+                  WHERE MBRContains(ST_GeomFromText(%s, 4326, 'axis-order=long-lat'), coord)
+                    AND use_yn = 'Y'
+                  ORDER BY space_no DESC
+                  LIMIT %s
               '''
-        polygon_str = get_mbr_polygon(min_lng, min_lat, max_lng, max_lat)
-        with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(sql, (_dest.lng, _dest.lat, polygon_str))
-            rows = cursor.fetchall()
-            if not rows: return list()
-            print(ParkingLot)
-            return [ParkingLot(row['id'], row['reg_id'], row['name'], row['lat'], row['lng'], row['sido'], row['sigungu'], row['full_address'], row['space_no'], row["dist"])for row in rows]
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql, (get_mbr_polygon(west, south, east, north), limit))
+                    lots = ParkingLotBatch.from_cursor(cursor)
+        except Exception as e:
+            st.error(f"DB 연결 오류: {e}")
+            return None
+    cache.put(key, lots)
+    return lots
+
+
+def get_parking_in_viewport(viewport: Viewport, limit=config_viewport_limit):
+    """
+    지도에 보이는 범위의 주차장을 (ParkingLotBatch, 잘렸는지 여부)로 반환
+    범위를 덮는 tile들을 tile 단위로 조회(캐시)해서 합친 뒤, 주차면수가 많은 순으로 최대 limit개만 남긴다.
+    지도를 조금 움직이면 이미 불러온 tile은 캐시에서 가져오고, 조회량은 지도 면적에 비례한다.
+    """
+    tiles = [get_parking_tile(*tile) for tile in viewport.tiles]
+    lots = ParkingLotBatch.concat([tile for tile in tiles if tile is not None])
+    _, first = np.unique(lots.ids, return_index=True)    # tile 경계에 걸친 주차장 중복 제거
+    order = first[np.argsort(-np.nan_to_num(lots.space_nos[first], nan=-1.0), kind='stable')]
+    return lots.take(order[:limit]), len(order) > limit
+
+
+PYRAMID_COLUMNS = ['lat', 'lng', 'lot_count', 'space_total']
+
+# 가장 작은 격자: parking_lot의 좌표를 web mercator tile 번호로 변환해서 집계 (src/viewport.py lat_lng_to_tile과 같은 계산)
+pyramid_base_sql = '''
+    INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+    SELECT %(z)s, cell_x, cell_y, COUNT(*), COALESCE(SUM(space_no), 0), AVG(lat), AVG(lng)
+      FROM (SELECT FLOOR((lng + 180) / 360 * POW(2, %(z)s)) AS cell_x,
+                   FLOOR((1 - LN(TAN(RADIANS(lat)) + 1 / COS(RADIANS(lat))) / PI()) / 2 * POW(2, %(z)s)) AS cell_y,
+                   lat, lng, space_no
+              FROM parking_lot
+             WHERE use_yn = 'Y') cells
+     GROUP BY cell_x, cell_y
+'''
+
+# 큰 격자: 바로 아래 단계 격자를 합침 (중심 좌표는 주차장 수로 가중 평균)
+pyramid_level_sql = '''
+    INSERT INTO parking_lot_pyramid (z, x, y, lot_count, space_total, lat, lng)
+    SELECT %(z)s, x DIV %(factor)s, y DIV %(factor)s, SUM(lot_count), SUM(space_total),
+           SUM(lat * lot_count) / SUM(lot_count), SUM(lng * lot_count) / SUM(lot_count)
+      FROM parking_lot_pyramid
+     WHERE z = %(child)s
+     GROUP BY x DIV %(factor)s, y DIV %(factor)s
+'''
+
+
+def rebuild_parking_pyramid():
+    '''
+    집계 피라미드(parking_lot_pyramid) 전체를 다시 만들고 격자 수 반환 (실패하면 None)
+    parking_lot은 가장 작은 격자를 만들 때 한 번만 읽고, 나머지 단계는 바로 아래 단계에서 계산한다.
+    한 transaction으로 바꾸므로 조회하는 쪽은 이전 피라미드나 새 피라미드 중 하나만 본다.
+    '''
+    levels = sorted(PYRAMID_LEVELS, reverse=True)
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute('DELETE FROM parking_lot_pyramid')
+                cursor.execute(pyramid_base_sql, {'z': levels[0]})
+                for child, z in zip(levels, levels[1:]):
+                    cursor.execute(pyramid_level_sql, {'z': z, 'child': child, 'factor': 2 ** (child - z)})
+                cursor.execute('SELECT COUNT(*) FROM parking_lot_pyramid')
+                cells = cursor.fetchone()[0]
+                conn.commit()
+                return cells
+
+    except mysql.connector.Error as err:
+        print(f"SQL 에러: {err}")
+        return None
+
+
+def get_pyramid_cells(tile, level):
+    '''tile (z, x, y) 안의 level 집계 격자 DataFrame (lat, lng, lot_count, space_total). 오류가 나면 None'''
+    key = ('pyramid', get_data_version(), level, *tile)
+    cache = get_tile_cache()
+    cells = cache.get(key)
+    if cells is not None:
+        return cells
+    x0, x1, y0, y1 = cell_range(tile, level)
+    rows = run_query(f'''
+        SELECT {', '.join(PYRAMID_COLUMNS)}
+          FROM parking_lot_pyramid
+         WHERE z = %s
+           AND x BETWEEN %s AND %s
+           AND y BETWEEN %s AND %s
+    ''', (level, x0, x1, y0, y1))
+    if rows is None:
+        return None
+    cells = pd.DataFrame(rows, columns=PYRAMID_COLUMNS)
+    cache.put(key, cells)
+    return cells
+
+
+def get_parking_aggregates(viewport: Viewport, limit=config_pyramid_cell_limit):
+    """
+    지도에 보이는 범위의 집계 격자를 (DataFrame, 잘렸는지 여부)로 반환
+    zoom에 맞는 단계(pyramid_level)의 격자만 읽으므로 결과 크기는 화면의 격자 수를 넘지 않는다.
+    """
+    level = pyramid_level(viewport.zoom)
+    frames = [cells for cells in (get_pyramid_cells(tile, level) for tile in viewport.tiles) if cells is not None]
+    cells = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=PYRAMID_COLUMNS)
+    if len(cells) > limit:
+        return cells.nlargest(limit, 'lot_count'), True
+    return cells, False
+
+
+class QueryError(Exception):
+    '''st.cache_data 함수의 조회 실패. 예외는 캐시되지 않으므로 다음 호출에서 다시 조회한다.'''
+
 
-    except Exception as e:
-        st.error(f"DB 연결 오류: {e}")
-        return []
 @st.cache_data
+def get_region_catalog(version=None):
+    '''
+    {(시도, 시군구): {lot_count, space_total, min_lat, min_lng, max_lat, max_lng}} (version이 바뀌면 다시 읽음)
+    조회에 실패하면 빈 목록을 캐시하지 않도록 QueryError를 발생시킨다.
+    '''
+    rows = run_query('''
+        SELECT sido, sigungu, lot_count, space_total, min_lat, min_lng, max_lat, max_lng
+          FROM region_catalog
+         WHERE lot_count > 0
+    ''')
+    if rows is None:
+        raise QueryError('region_catalog 조회 실패')
+    return {(row.pop('sido'), row.pop('sigungu')): row for row in rows}
+
+
 def get_sido_sigungu():
+    '''{시도: [시군구, ...]} (region_catalog 기준, 조회에 실패하면 빈 dict)'''
     try:
-        conn = get_connection()
-        if not conn:
-            return list()
-        if not conn.is_connected():
-            conn.reconnect(attempts=3, delay=2)
-        sql = '''
-            select 
-                  distinct sido, sigungu
-                from parking_lot
-               where use_yn = 'Y'
-              '''
-        with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(sql)
-            result = {}
-            rows = cursor.fetchall()
-            for row in rows:
-                if row['sido'] not in result:
-                    result[row['sido']] = []
-                else:
-                    result[row['sido']].append(row['sigungu'])
-            return result
-    except Exception as e:
-        st.error(f"DB 연결 오류: {e}")
-        return dict()
+        catalog = get_region_catalog(get_data_version())
+    except QueryError:
+        return {}
+    result = {}
+    for sido, sigungu in catalog:
+        result.setdefault(sido, []).append(sigungu)
+    return result
+
+
+def get_region_bounds(sido, sigungu):
+    '''지역의 좌표 범위 [[최소 위도, 최소 경도], [최대 위도, 최대 경도]] (없거나 조회에 실패하면 None)'''
+    try:
+        region = get_region_catalog(get_data_version()).get((sido, sigungu))
+    except QueryError:
+        return None
+    if region is None or region['min_lat'] is None:
+        return None
+    return [[region['min_lat'], region['min_lng']], [region['max_lat'], region['max_lng']]]
+
+
+REGION_PAGE_SIZE = 4     # 지역 검색 한 페이지의 주차장 수
+REGION_COLUMNS = ['id', 'name', 'lat', 'lng', 'sido', 'sigungu', 'full_address', 'space_no']
 
 
 @st.cache_data
-def get_region_parking_data():
-    return pd.DataFrame(run_query('''
-        SELECT name, \
-               lat, \
-               lng, \
-               sido, \
-               sigungu,\
-               full_address, \
-               space_no
+def count_region_parking(sido, sigungu, version=None):
+    '''시도/시군구의 주차장 수 ((use_yn, sido, sigungu) 인덱스만 읽음, version이 바뀌면 다시 계산, 실패하면 QueryError)'''
+    rows = run_query('''
+        SELECT COUNT(*) AS cnt
           FROM parking_lot
          WHERE use_yn = 'Y'
-    '''))
+           AND sido = %s
+           AND sigungu = %s
+    ''', (sido, sigungu))
+    if rows is None:
+        raise QueryError(f'{sido} {sigungu} 주차장 수 조회 실패')
+    return rows[0]['cnt'] if rows else 0
 
-def run_query(query, params=None, is_select=True):
+
+def get_region_parking_page(sido, sigungu, cursor=None, descending=False, limit=REGION_PAGE_SIZE):
     """
-    query를 실행하는 함수.
+    시도/시군구의 주차장을 이름순으로 limit 건씩 조회 (keyset pagination)
+        sido, sigungu(필수): 조회할 지역
+        cursor(추가): 이전 페이지의 next_cursor (name, id). None이면 첫 페이지
+        descending(추가): True면 이름 내림차순
+    OFFSET 없이 (use_yn, sido, sigungu, name, id) 인덱스에서 cursor 다음 위치부터 읽으므로
+    몇 번째 페이지든 limit + 1 건만 읽는다.
     """
-    conn = get_connection()
-    if not conn:
+    op, order = ('<', 'DESC') if descending else ('>', 'ASC')
+    params = [sido, sigungu]
+    after = ''
+    if cursor is not None:
+        after = f'AND (name {op} %s OR (name = %s AND id {op} %s))'
+        params += [cursor[0], cursor[0], cursor[1]]
+    rows = run_query(f'''
+        SELECT {', '.join(REGION_COLUMNS)}
+          FROM parking_lot
+         WHERE use_yn = 'Y'
+           AND sido = %s
+           AND sigungu = %s
+           {after}
+         ORDER BY name {order}, id {order}
+         LIMIT %s
+    ''', (*params, limit + 1)) or []
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = (rows[-1]['name'], rows[-1]['id']) if has_next else None
+    try:
+        total = count_region_parking(sido, sigungu, get_data_version())
+    except QueryError:
+        total = len(rows)
+    return RegionPage(pd.DataFrame(rows, columns=REGION_COLUMNS), total, cursor, next_cursor, has_next)
+
+
+def get_region_parking(sido, sigungu):
+    '''
+    시도/시군구의 주차장 전체 (지역 지도에 표시할 marker). 오류가 나면 None
+    목록 페이지와 따로 조회하고, 결과는 (data_version, 시도, 시군구) 기준으로 캐시한다.
+    '''
+    key = ('region', get_data_version(), sido, sigungu)
+    cache = get_tile_cache()
+    lots = cache.get(key)
+    if lots is not None:
+        return lots
+
+    sql = '''SELECT id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no
+               FROM parking_lot
+              WHERE use_yn = 'Y'
+                AND sido = %s
+                AND sigungu = %s
+          '''
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, (sido, sigungu))
+                lots = ParkingLotBatch.from_cursor(cursor)
+    except Exception as e:
+        st.error(f"DB 연결 오류: {e}")
         return None
+    cache.put(key, lots)
+    return lots
 
-    # 연결이 끊겼는지 확인하고 필요시 재연결
-    if not conn.is_connected():
-        conn.reconnect()
 
-    cursor = conn.cursor(dictionary=True)  # 결과를 딕셔너리 형태(k-v)로 반환
+def run_query(query, params=None, is_select=True):
+    """
+    query를 실행하는 함수.
+    """
     try:
-        cursor.execute(query, params or ())
+        with get_connection() as conn:
+            with conn.cursor(dictionary=True) as cursor:  # 결과를 딕셔너리 형태(k-v)로 반환
+                cursor.execute(query, params or ())
 
-        if is_select:
-            result = cursor.fetchall()
-            return result
-        else:
-            conn.commit()  # INSERT, UPDATE, DELETE는 commit 필수
-            return cursor.rowcount  # 영향을 받은 행의 수 반환
+                if is_select:
+                    result = cursor.fetchall()
+                    return result
+                else:
+                    conn.commit()  # INSERT, UPDATE, DELETE는 commit 필수
+                    return cursor.rowcount  # 영향을 받은 행의 수 반환
 
     except mysql.connector.Error as err:
         st.error(f"SQL 에러: {err}")
         return None
-    finally:
-        cursor.close()
 
 def run_bulk_insert_query(query, params=None):
     """
     대량의 insert query를 실행하는 함수.
     """
-    conn = get_connection()
-    if not conn:
+    try:
+        with get_connection() as conn:
+            with conn.cursor(buffered=True) as cursor:
+                # 대량 데이터 execute
+                cursor.executemany(query, params or ())
+                conn.commit()
+                return cursor.rowcount  # 영향을 받은 행의 수 반환
+
+    except mysql.connector.Error as err:
+        print(f"SQL 에러: {err}")
         return None
+    except Exception as err:
+        print(f"에러: {err}")
+
+
+def _tsv_field(val):
+    '''LOAD DATA 기본 형식(ESCAPED BY '\\\\')에 맞게 값 변환'''
+    if val is None:
+        return '\\N'
+    return str(val).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
 
-    # 연결이 끊겼는지 확인하고 필요시 재연결
-    if not conn.is_connected():
-        conn.reconnect()
-    else:
-        # 기존 연결의 잔여 결과물을 강제로 비우기 (안전장치)
-        conn.consume_results()
 
-    cursor = conn.cursor(dictionary=True, buffered=True)  # 결과를 딕셔너리 형태(k-v)로 반환
+def run_bulk_load(stage_columns, rows, move_sql, stage_table='bulk_stage'):
+    """
+    대량의 데이터를 LOAD DATA LOCAL INFILE로 적재하는 함수.
+        stage_columns(필수): 임시(staging) 테이블 컬럼명 리스트 (rows 튜플 순서와 같아야 함)
+        rows(필수): 저장할 튜플 iterable
+        move_sql(필수): staging 테이블에서 대상 테이블로 옮기는 SQL (INSERT ... SELECT ... FROM stage_table)
+    rows를 임시 TSV 파일로 쓴 뒤 staging 테이블에 한 번에 올리고, move_sql 한 문장으로 옮긴다.
+    move_sql이 반영한 행의 수를 반환. 실패하면 None
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, encoding='utf-8', newline='') as f:
+        path = f.name
+        for row in rows:
+            f.write('\t'.join(_tsv_field(val) for val in row) + '\n')
+
+    columns = ', '.join(stage_columns)
     try:
-        # 대량 데이터 execute
-        cursor.executemany(query, params or ())
-        conn.commit()
-        return cursor.rowcount  # 영향을 받은 행의 수 반환
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {stage_table}")
+                cursor.execute(f"CREATE TEMPORARY TABLE {stage_table} ({', '.join(f'{col} text' for col in stage_columns)})")
+                cursor.execute(f"""
+                    LOAD DATA LOCAL INFILE %s INTO TABLE {stage_table}
+                    CHARACTER SET utf8mb4
+                    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                    LINES TERMINATED BY '\\n'
+                    ({columns})
+                """, (path,))
+                cursor.execute(move_sql)
+                moved = cursor.rowcount
+                cursor.execute(f"DROP TEMPORARY TABLE {stage_table}")
+                conn.commit()
+                return moved
 
     except mysql.connector.Error as err:
         print(f"SQL 에러: {err}")
         return None
     except Exception as err:
         print(f"에러: {err}")
+        return None
     finally:
-        cursor.close()
+        os.remove(path)
@@ -0,0 +1,181 @@
+# DB CONNECTION POOL
+# streamlit 세션(thread)마다 connection을 빌려 쓰고 반납하는 pool.
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+class PoolTimeout(mysql.connector.Error):
+    '''timeout 안에 connection을 빌리지 못했을 때 발생'''
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, db_config: dict, size: int = 5, timeout: float = 10, recycle: int = 1800, connect=None):
+        """
+        db_config(필수): mysql.connector.connect에 넘길 접속 정보
+        size(추가): 동시에 열어둘 수 있는 최대 connection 수
+        timeout(추가): connection이 모두 사용 중일 때 기다리는 최대 시간(초)
+        recycle(추가): 이 시간(초) 이상 놀고 있던 connection은 닫고 새로 연결
+        connect(추가): connection 생성 함수 (기본: mysql.connector.connect)
+        """
+        self.__db_config = db_config
+        self.__size = size
+        self.__timeout = timeout
+        self.__recycle = recycle
+        self.__connect = connect or (lambda: mysql.connector.connect(**self.__db_config))
+
+        self.__cond = threading.Condition()
+        self.__idle = deque()       # (connection, 마지막 반납 시각)
+        self.__created = 0          # 현재 열려있는(혹은 여는 중인) connection 수
+        self.__in_use = 0
+        self.__waiters = 0
+        self.__closed = False
+
+        # 통계
+        self.__checkouts = 0
+        self.__timeouts = 0
+        self.__recycled = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+        self.__recent_waits = deque(maxlen=1000)    # p99 계산용 최근 대기시간
+
+    @property
+    def size(self):
+        return self.__size
+
+    def acquire(self):
+        '''connection 빌리기. 모두 사용 중이면 timeout까지 대기'''
+        start = time.monotonic()
+        deadline = start + self.__timeout
+        conn, last_used = None, None
+
+        with self.__cond:
+            if self.__closed:
+                raise PoolTimeout(msg="connection pool이 닫혀 있습니다.")
+            self.__waiters += 1
+            try:
+                while True:
+                    if self.__idle:
+                        conn, last_used = self.__idle.pop()     # 가장 최근에 쓴 connection 우선
+                        break
+                    if self.__created < self.__size:
+                        self.__created += 1                     # 자리 먼저 확보 후 lock 밖에서 연결
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.__timeouts += 1
+                        raise PoolTimeout(msg=f"{self.__timeout}초 안에 DB connection을 얻지 못했습니다.")
+                    self.__cond.wait(remaining)
+            finally:
+                self.__waiters -= 1
+
+        # 연결/검사는 네트워크를 타므로 lock 밖에서 수행
+        try:
+            conn, recycled = self.__checkout_ready(conn, last_used)
+        except Exception:
+            with self.__cond:
+                self.__created -= 1
+                self.__cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self.__cond:
+            self.__in_use += 1
+            self.__checkouts += 1
+            self.__recycled += recycled
+            self.__wait_total += waited
+            self.__wait_max = max(self.__wait_max, waited)
+            self.__recent_waits.append(waited)
+        return conn
+
+    def __checkout_ready(self, conn, last_used):
+        '''
+        새 connection을 열거나, idle connection의 상태(오래됨/끊김)를 확인해서 (connection, 재연결 여부) 반환
+        (통계는 lock 안에서 갱신해야 하므로 여기서는 세지 않음)
+        '''
+        if conn is None:
+            return self.__connect(), False
+
+        # 오래된 connection 또는 서버 쪽에서 끊긴 connection은 닫고 다시 연결
+        if time.monotonic() - last_used > self.__recycle or not conn.is_connected():
+            self.__close_quietly(conn)
+            return self.__connect(), True
+        return conn, False
+
+    def release(self, conn, discard: bool = False):
+        '''connection 반납. discard=True이면 닫고 버림'''
+        if not discard:
+            try:
+                # 읽다 만 결과와 열린 트랜잭션 정리 (다음 사용자가 이전 snapshot을 보지 않도록)
+                conn.consume_results()
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self.__cond:
+            self.__in_use -= 1
+            if discard or self.__closed:
+                self.__created -= 1
+            else:
+                self.__idle.append((conn, time.monotonic()))
+            self.__cond.notify()
+
+        if discard or self.__closed:
+            self.__close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        '''with 블록 동안 connection을 빌려주고, 블록이 끝나면 반납'''
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+            discard = True      # 연결 자체에 문제가 생긴 경우 재사용하지 않음
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def stats(self):
+        '''pool 상태 및 대기시간 통계'''
+        with self.__cond:
+            waits = sorted(self.__recent_waits)
+            p99 = waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0
+            return {
+                'size': self.__size,
+                'created': self.__created,
+                'idle': len(self.__idle),
+                'in_use': self.__in_use,
+                'waiters': self.__waiters,
+                'checkouts': self.__checkouts,
+                'timeouts': self.__timeouts,
+                'recycled': self.__recycled,
+                'wait_avg': self.__wait_total / self.__checkouts if self.__checkouts else 0.0,
+                'wait_max': self.__wait_max,
+                'wait_p99': p99,
+            }
+
+    def close(self):
+        '''idle connection을 모두 닫음. 사용 중인 connection은 반납 시 닫힘'''
+        with self.__cond:
+            self.__closed = True
+            idle = list(self.__idle)
+            self.__idle.clear()
+            self.__created -= len(idle)
+            self.__cond.notify_all()
+        for conn, _ in idle:
+            self.__close_quietly(conn)
+
+    @staticmethod
+    def __close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def __repr__(self):
+        return f'ConnectionPool(size = {self.__size}, timeout = {self.__timeout}, recycle = {self.__recycle})'
@@ -0,0 +1,84 @@
+# GEOCODE CACHE
+# 목적지 검색어 -> 주소/좌표 결과를 SQLite 파일에 저장해 재시작 후에도 재사용.
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalize_query(query: str):
+    '''검색어 정규화 (유니코드 NFKC, 앞뒤/중복 공백 제거, 소문자)'''
+    text = unicodedata.normalize('NFKC', str(query))
+    return ' '.join(text.split()).casefold()
+
+
+class GeocodeCache:
+    '''
+    정규화된 검색어를 key로 geocoding 결과를 저장.
+    결과가 없었던 검색어도 저장해서(negative cache) 같은 검색어로 API를 반복 호출하지 않는다.
+    '''
+    def __init__(self, path, ttl: float = 30 * 86400, negative_ttl: float = 86400):
+        """
+        path(필수): SQLite 파일 경로
+        ttl(추가): 찾은 결과의 유효시간(초)
+        negative_ttl(추가): 찾지 못한 결과의 유효시간(초)
+        """
+        self.__ttl = ttl
+        self.__negative_ttl = negative_ttl
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('''
+            CREATE TABLE IF NOT EXISTS geocode (
+                query     TEXT PRIMARY KEY,
+                address   TEXT,
+                lat       REAL,
+                lng       REAL,
+                found     INTEGER NOT NULL,
+                cached_at REAL NOT NULL
+            )
+        ''')
+        self.__conn.commit()
+
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, query: str):
+        """
+        (hit 여부, (address, lat, lng) 또는 None) 반환
+        hit이고 값이 None이면 '찾을 수 없는 장소'로 저장된 검색어
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                'SELECT address, lat, lng, found, cached_at FROM geocode WHERE query = ?', (query,)
+            ).fetchone()
+            if row is None:
+                self.__misses += 1
+                return False, None
+
+            address, lat, lng, found, cached_at = row
+            ttl = self.__ttl if found else self.__negative_ttl
+            if time.time() - cached_at > ttl:
+                self.__misses += 1
+                return False, None
+
+            self.__hits += 1
+            return True, ((address, lat, lng) if found else None)
+
+    def put(self, query: str, value):
+        '''value: (address, lat, lng) 또는 찾지 못한 경우 None'''
+        address, lat, lng = value if value else (None, None, None)
+        with self.__lock:
+            self.__conn.execute(
+                'REPLACE INTO geocode (query, address, lat, lng, found, cached_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (query, address, lat, lng, 1 if value else 0, time.time())
+            )
+            self.__conn.commit()
+
+    def stats(self):
+        with self.__lock:
+            size = self.__conn.execute('SELECT COUNT(*) FROM geocode').fetchone()[0]
+            return {'size': size, 'hits': self.__hits, 'misses': self.__misses}
+
+    def __repr__(self):
+        return f'GeocodeCache(ttl = {self.__ttl}, negative_ttl = {self.__negative_ttl})'
@@ -0,0 +1,166 @@
+# GEOHASH
+# 위도/경도를 계층형 문자열 cell id로 변환하고, 원형 반경을 덮는 cell 목록을 계산.
+# geohash 문자열 순서는 cell의 Z-order 순서이므로, 이웃한 cell들은 B-tree 인덱스의 범위 검색(BETWEEN) 하나로 조회할 수 있다.
+import math
+
+import numpy as np
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS = 6370986      # ST_Distance_Sphere 기본 지구 반지름(m)
+STORE_PRECISION = 8         # DB에 저장하는 geohash 길이 (약 38m x 19m)
+MAX_RANGES = 32             # 한 번의 검색에 사용할 최대 범위(BETWEEN) 수
+
+
+def encode(lat: float, lng: float, precision: int = STORE_PRECISION):
+    '''위도/경도를 geohash 문자열로 변환'''
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:    # 짝수 번째 bit는 경도
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch = ch << 1
+                lng_hi = mid
+        else:       # 홀수 번째 bit는 위도
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch = ch << 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return ''.join(chars)
+
+
+def _quantize(values, low, span, bits):
+    '''encode의 이분 탐색과 같은 결과가 되도록 [low, low + span) 구간을 2^bits 칸으로 나눈 칸 번호 계산'''
+    cells = 1 << bits
+    step = span / cells         # 2의 거듭제곱으로 나누므로 경계값(low + k * step)은 float으로 정확히 표현됨
+    with np.errstate(invalid='ignore'):
+        index = np.floor((values - low) / step)
+        index = np.clip(np.nan_to_num(index, nan=0.0), 0, cells - 1)
+        # 나눗셈 반올림으로 경계에서 한 칸 어긋난 경우 보정
+        index -= (values < low + index * step) & (index > 0)
+        index += (values >= low + (index + 1) * step) & (index < cells - 1)
+    return index.astype(np.int64)
+
+
+def _interleave(lat_index, lng_index, precision):
+    '''위도/경도 칸 번호를 경도 bit부터 번갈아 이어 붙인 정수 code (geohash 문자열과 같은 순서)'''
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    code = np.zeros(len(lat_index), dtype=np.int64)
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            bit = (lng_index >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_index >> (lat_bits - 1 - i // 2)) & 1
+        code = (code << 1) | bit
+    return code
+
+
+def _to_strings(code, precision):
+    '''정수 code 배열을 5 bit씩 문자로 바꾼 geohash 문자열 리스트'''
+    shifts = 5 * np.arange(precision - 1, -1, -1)
+    chars = np.frombuffer(BASE32.encode(), dtype=np.uint8)[(code[:, None] >> shifts) & 31]
+    return np.ascontiguousarray(chars).view(f'S{precision}').ravel().astype(str).tolist()
+
+
+def encode_many(lat, lng, precision: int = STORE_PRECISION):
+    '''위도/경도 배열을 geohash 문자열 리스트로 한 번에 변환 (encode와 같은 결과)'''
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    lat_index = _quantize(lat, -90.0, 180.0, lat_bits)
+    lng_index = _quantize(lng, -180.0, 360.0, lng_bits)
+    return _to_strings(_interleave(lat_index, lng_index, precision), precision)
+
+
+def bbox(geohash: str):
+    '''geohash cell의 (남쪽 위도, 서쪽 경도, 북쪽 위도, 동쪽 경도)'''
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in geohash:
+        ch = BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (ch >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision: int):
+    '''precision 길이의 cell 하나의 (위도 폭, 경도 폭) (도)'''
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _cell_min_distance(lat, lng, cell_lat, cell_lng, lat_step, lng_step):
+    '''중심점에서 cell(남서쪽 좌표 배열) 안의 가장 가까운 점까지의 대원 거리(m) 배열'''
+    near_lat = np.clip(lat, cell_lat, cell_lat + lat_step)
+    near_lng = np.clip(lng, cell_lng, cell_lng + lng_step)
+    p1, p2 = math.radians(lat), np.radians(near_lat)
+    a = np.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(np.radians(near_lng - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell_codes(lat, lng, radius, precision):
+    '''원과 겹치는 precision 길이 cell들의 정수 code (정렬됨)'''
+    lat_step, lng_step = cell_size(precision)
+    lat_cells, lng_cells = round(180.0 / lat_step), round(360.0 / lng_step)
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    d_lng = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+
+    # 반경의 bounding box와 겹치는 cell 번호
+    lat_index = np.arange(max(math.floor((lat - d_lat + 90.0) / lat_step), 0),
+                          min(math.floor((lat + d_lat + 90.0) / lat_step), lat_cells - 1) + 1)
+    lng_index = np.arange(max(math.floor((lng - d_lng + 180.0) / lng_step), 0),
+                          min(math.floor((lng + d_lng + 180.0) / lng_step), lng_cells - 1) + 1)
+    lat_index, lng_index = (index.ravel() for index in np.meshgrid(lat_index, lng_index, indexing='ij'))
+
+    # 원과 겹치지 않는 모서리 cell 제외
+    near = _cell_min_distance(lat, lng, lat_index * lat_step - 90.0, lng_index * lng_step - 180.0,
+                              lat_step, lng_step) <= radius
+    return np.sort(_interleave(lat_index[near], lng_index[near], precision))
+
+
+def cover_ranges(lat: float, lng: float, radius: float, max_ranges: int = MAX_RANGES):
+    """
+    (lat, lng) 중심, radius(m) 반경의 원을 덮는 geohash 범위 [(시작, 끝), ...] (STORE_PRECISION 길이, 양 끝 포함)
+    1. 원과 겹치는 STORE_PRECISION cell들을 geohash 순서로 정렬하고, 이어지는 cell들을 한 범위로 합친다.
+    2. 범위가 max_ranges개를 넘으면 범위 사이의 간격(읽게 되는 원 밖 cell 수)이 작은 곳부터 메워서 합친다.
+    cell 크기는 그대로 두고 범위 수만 줄이므로, 원 밖에서 더 읽는 cell은 메운 간격뿐이다.
+    """
+    codes = _cell_codes(lat, lng, radius, STORE_PRECISION)
+    gaps = np.diff(codes) - 1
+    breaks = np.flatnonzero(gaps > 0)
+    if len(breaks) >= max_ranges:
+        # 간격이 큰 max_ranges - 1곳에서만 범위를 나눔
+        breaks = np.sort(breaks[np.argsort(-gaps[breaks], kind='stable')[:max_ranges - 1]])
+    starts = np.concatenate([codes[:1], codes[breaks + 1]])
+    ends = np.concatenate([codes[breaks], codes[-1:]])
+    return list(zip(_to_strings(starts, STORE_PRECISION), _to_strings(ends, STORE_PRECISION)))
@@ -0,0 +1,144 @@
+# INGEST STATE
+# 적재 실행(run) 이력, 저장이 끝난 페이지(checkpoint), 저장에 실패한 batch(dead letter)를 SQLite 파일에 기록.
+# 중간에 멈춘 적재를 처음부터 다시 하지 않고 이어서 진행하거나, 실패한 batch만 다시 저장할 수 있다.
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class IngestState:
+    '''
+    run: 적재 한 번의 실행 (run_id, 방식, 전체 페이지 수, 상태)
+    page: run에서 모든 데이터가 저장(또는 dead letter로 보관)된 페이지
+    dead letter: 재시도 후에도 저장하지 못한 batch (종류와 데이터를 JSON으로 보관)
+    '''
+    def __init__(self, path):
+        """
+        path(필수): SQLite 파일 경로
+        """
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.executescript('''
+            CREATE TABLE IF NOT EXISTS ingest_run (
+                run_id      TEXT PRIMARY KEY,
+                mode        TEXT NOT NULL,
+                total_pages INTEGER,
+                status      TEXT NOT NULL,
+                watermark   INTEGER NOT NULL DEFAULT 0,
+                started_at  REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS ingest_page (
+                run_id  TEXT NOT NULL,
+                page_no INTEGER NOT NULL,
+                done_at REAL NOT NULL,
+                PRIMARY KEY (run_id, page_no)
+            );
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id      TEXT NOT NULL,
+                kind        TEXT NOT NULL,
+                payload     TEXT NOT NULL,
+                error       TEXT,
+                created_at  REAL NOT NULL,
+                replayed_at REAL
+            );
+        ''')
+        self.__conn.commit()
+
+    def start_run(self, mode: str, total_pages: int = None):
+        '''새 run을 기록하고 run_id 반환'''
+        run_id = time.strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        with self.__lock:
+            self.__conn.execute(
+                'INSERT INTO ingest_run (run_id, mode, total_pages, status, started_at) VALUES (?, ?, ?, ?, ?)',
+                (run_id, mode, total_pages, 'running', time.time())
+            )
+            self.__conn.commit()
+        return run_id
+
+    def find_run(self, mode: str, run_id: str = None):
+        '''이어서 진행할 run_id. run_id를 주지 않으면 같은 방식으로 마지막에 끝나지 않은 run (없으면 None)'''
+        with self.__lock:
+            if run_id:
+                row = self.__conn.execute('SELECT run_id, mode FROM ingest_run WHERE run_id = ?', (run_id,)).fetchone()
+                if row is None:
+                    return None
+                if row[1] != mode:
+                    raise ValueError(f"run {run_id}는 '{row[1]}' 방식으로 실행되었습니다.")
+                return row[0]
+            row = self.__conn.execute(
+                "SELECT run_id FROM ingest_run WHERE mode = ? AND status != 'complete' ORDER BY started_at DESC LIMIT 1",
+                (mode,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_total_pages(self, run_id: str, total_pages: int):
+        with self.__lock:
+            self.__conn.execute('UPDATE ingest_run SET total_pages = ?, status = ? WHERE run_id = ?',
+                                (total_pages, 'running', run_id))
+            self.__conn.commit()
+
+    def mark_pages(self, run_id: str, pages):
+        '''저장이 끝난 페이지 기록'''
+        now = time.time()
+        with self.__lock:
+            self.__conn.executemany('INSERT OR IGNORE INTO ingest_page (run_id, page_no, done_at) VALUES (?, ?, ?)',
+                                    [(run_id, page_no, now) for page_no in pages])
+            self.__conn.commit()
+
+    def done_pages(self, run_id: str):
+        '''저장이 끝난 페이지 번호 set'''
+        with self.__lock:
+            rows = self.__conn.execute('SELECT page_no FROM ingest_page WHERE run_id = ?', (run_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def watermark(self, run_id: str):
+        '''1페이지부터 빠짐없이 저장이 끝난 마지막 페이지 번호'''
+        done = self.done_pages(run_id)
+        page_no = 0
+        while page_no + 1 in done:
+            page_no += 1
+        return page_no
+
+    def finish_run(self, run_id: str, complete: bool):
+        watermark = self.watermark(run_id)
+        with self.__lock:
+            self.__conn.execute('UPDATE ingest_run SET status = ?, watermark = ?, finished_at = ? WHERE run_id = ?',
+                                ('complete' if complete else 'incomplete', watermark, time.time(), run_id))
+            self.__conn.commit()
+        return watermark
+
+    def add_dead_letter(self, run_id: str, kind: str, payload, error=None):
+        '''저장에 실패한 batch 보관. payload는 JSON으로 변환 가능한 값'''
+        with self.__lock:
+            self.__conn.execute(
+                'INSERT INTO dead_letter (run_id, kind, payload, error, created_at) VALUES (?, ?, ?, ?, ?)',
+                (run_id, kind, json.dumps(payload, ensure_ascii=False), None if error is None else str(error), time.time())
+            )
+            self.__conn.commit()
+
+    def dead_letters(self):
+        '''아직 다시 저장하지 않은 dead letter의 (id, run_id, kind, payload) 리스트'''
+        with self.__lock:
+            rows = self.__conn.execute(
+                'SELECT id, run_id, kind, payload FROM dead_letter WHERE replayed_at IS NULL ORDER BY id'
+            ).fetchall()
+        return [(id, run_id, kind, json.loads(payload)) for id, run_id, kind, payload in rows]
+
+    def mark_replayed(self, id: int):
+        with self.__lock:
+            self.__conn.execute('UPDATE dead_letter SET replayed_at = ? WHERE id = ?', (time.time(), id))
+            self.__conn.commit()
+
+    def stats(self):
+        with self.__lock:
+            runs = self.__conn.execute('SELECT COUNT(*) FROM ingest_run').fetchone()[0]
+            pending = self.__conn.execute('SELECT COUNT(*) FROM dead_letter WHERE replayed_at IS NULL').fetchone()[0]
+        return {'runs': runs, 'dead_letters': pending}
+
+    def __repr__(self):
+        return f'IngestState(stats = {self.stats()})'
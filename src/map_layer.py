@@ -0,0 +1,210 @@
+# MAP LAYER
+# 검색 결과(주차장/주유소)를 지도에 표시하는 marker layer.
+# 결과마다 folium.Marker + Popup HTML을 만드는 대신, 좌표와 표시할 값만 담은 배열 하나를 지도에 넘기고
+# marker와 popup은 브라우저에서 template으로 만든다. (FastMarkerCluster)
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import folium
+from folium.plugins import FastMarkerCluster, HeatMap
+
+from src.model import ParkingLot, ParkingLotBatch, GasStation
+
+# 종류별 popup에 넘기는 값 (배열의 3번째 값부터 이 순서로 들어감, 첫 값은 주차장 id/주유소 id)
+PARKING = 0
+OIL = 1
+FIELDS = {
+    PARKING: ['id', 'name', 'full_addr', 'space_no'],
+    OIL: ['id', 'name', 'price', 'brand_name', 'distance'],
+}
+
+COORD_DIGITS = 6    # 배열에 넣는 좌표 소수점 자리수 (약 0.1m)
+
+# 종류별 marker 아이콘 (leaflet.awesome-markers 옵션, folium.Icon과 같은 값)
+ICONS = {
+    PARKING: {'icon': 'info-sign', 'markerColor': 'blue', 'prefix': 'glyphicon'},
+    OIL: {'icon': 'tint', 'markerColor': 'green', 'prefix': 'fa'},
+}
+
+# 종류별 popup HTML. {필드}는 브라우저에서 값으로 치환(HTML escape)하고, {url}은 카카오맵 길찾기 주소
+POPUPS = {
+    PARKING: '''
+        <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
+            <h4 style="margin:0 0 5px 0; color:#333;">{name}</h4>
+            <div style="font-size:13px; color:#666; margin-bottom:10px;">
+                <b>📍 주소:</b> {full_addr}<br>
+                <b>🅿️ 주차면수:</b> <span style="color:#007BFF; font-weight:bold;">{space_no}면</span>
+            </div>
+            <a href="{url}" target="_blank"
+               style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
+               🚕 자동으로 길찾기 시작
+            </a>
+        </div>''',
+    OIL: '''
+        <div style="width:220px; font-family: 'Nanum Gothic', sans-serif; line-height:1.5;">
+            <h4 style="margin:0 0 5px 0; color:#333;">{name}</h4>
+            <div style="font-size:13px; color:#666; margin-bottom:10px;">
+                <b>💰 가격:</b> <span style="color:#ff4b4b; font-weight:bold;">{price}원</span><br>
+                <b>™️ 브랜드:</b> {brand_name}<br>
+                <b>📏 거리:</b> {distance}m
+            </div>
+            <a href="{url}" target="_blank"
+               style="display:block; text-align:center; padding:8px; background-color:#FAE100; color:#3C1E1E; text-decoration:none; border-radius:5px; font-size:13px; font-weight:bold;">
+               🚕 자동으로 길찾기 시작
+            </a>
+        </div>''',
+}
+
+# 행마다 호출되는 marker 생성 함수 (template, 아이콘, popup 객체는 layer에 하나씩만 만듦)
+# popup은 marker마다 bindPopup하지 않고, 클릭했을 때 그 행의 값으로 HTML을 만들어 공유 popup 하나에 넣는다.
+_CALLBACK = '''(function () {
+    var fields = %(fields)s, icons = %(icons)s, popups = %(popups)s, origin = %(origin)s;
+    var markerIcons = {}, popup = null;
+    var escape = function (text) {
+        return text.replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    var render = function (row) {
+        var kind = row[2], props = {};
+        fields[kind].forEach(function (key, i) { props[key] = row[i + 3] === null ? '' : String(row[i + 3]); });
+        var to = encodeURIComponent(props.name) + ',' + row[0] + ',' + row[1];
+        props.url = origin
+            ? 'https://map.kakao.com/link/from/' + encodeURIComponent(origin[0]) + ',' + origin[1] + ',' + origin[2] + '/to/' + to
+            : 'https://map.kakao.com/link/to/' + to;
+        return popups[kind].replace(/\\{(\\w+)\\}/g, function (match, key) { return escape(props[key]); });
+    };
+    return function (row) {
+        var kind = row[2];
+        markerIcons[kind] = markerIcons[kind] || L.AwesomeMarkers.icon(icons[kind]);
+        var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: markerIcons[kind]});
+        marker.on('click', function (e) {   // 클릭했을 때 popup HTML 생성
+            popup = popup || L.popup({maxWidth: 300, offset: [0, -30]});
+            popup.setLatLng(e.target.getLatLng()).setContent(render(row)).openOn(e.target._map);
+        });
+        return marker;
+    };
+})()'''
+
+
+def _text(val):
+    return None if val is None else str(val)
+
+
+def _rows_of_batch(lots: ParkingLotBatch):
+    '''ParkingLotBatch를 컬럼 단위로 변환 (행 view를 만들지 않음)'''
+    usable = np.flatnonzero(~(np.isnan(lots.lats) | np.isnan(lots.lngs)))
+    lots = lots.take(usable)
+    space_nos = [None if math.isnan(val) else int(val) for val in lots.space_nos.tolist()]
+    return [[lat, lng, PARKING, id, name, addr, space_no]
+            for lat, lng, id, name, addr, space_no
+            in zip(lots.lats.round(COORD_DIGITS).tolist(), lots.lngs.round(COORD_DIGITS).tolist(), lots.ids.tolist(),
+                   lots.names, lots.full_addrs, space_nos)]
+
+
+def _rows_of_frame(frame: pd.DataFrame):
+    '''주차장 DataFrame (id, name, lat, lng, full_address, space_no 컬럼)을 변환'''
+    frame = frame.dropna(subset=['lat', 'lng'])
+    ids = frame['id'].tolist() if 'id' in frame else [None] * len(frame)
+    space_nos = [None if pd.isna(val) else int(val) for val in frame['space_no'].tolist()]
+    return [[round(float(lat), COORD_DIGITS), round(float(lng), COORD_DIGITS), PARKING,
+             None if pd.isna(id) else int(id), _text(name), _text(addr), space_no]
+            for lat, lng, id, name, addr, space_no
+            in zip(frame['lat'].tolist(), frame['lng'].tolist(), ids, frame['name'].tolist(),
+                   frame['full_address'].tolist(), space_nos)]
+
+
+def _row(item):
+    '''ParkingLot/GasStation 하나를 [위도, 경도, 종류, 값...] 배열로 변환 (좌표가 없으면 None)'''
+    try:
+        lat, lng = float(item.lat), float(item.lng)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng):
+        return None
+    lat, lng = round(lat, COORD_DIGITS), round(lng, COORD_DIGITS)
+    distance = None if item.distance is None else round(float(item.distance), 2)
+    if isinstance(item, ParkingLot):
+        return [lat, lng, PARKING, item.id, _text(item.name), _text(item.full_addr), item.space_no]
+    if isinstance(item, GasStation):
+        price = f'{item.price:,}' if isinstance(item.price, (int, float)) else _text(item.price)
+        return [lat, lng, OIL, _text(item.reg_id), _text(item.station_name), price, _text(item.brand_name), distance]
+    raise TypeError(f'지도에 표시할 수 없는 값: {type(item).__name__}')
+
+
+def to_marker_rows(*results):
+    '''검색 결과(ParkingLotBatch, 주차장 DataFrame, ParkingLot/GasStation 리스트)들을 marker 배열 리스트로 변환'''
+    rows = []
+    for result in results:
+        if isinstance(result, ParkingLotBatch):
+            rows.extend(_rows_of_batch(result))
+        elif isinstance(result, pd.DataFrame):
+            rows.extend(_rows_of_frame(result))
+        else:
+            rows.extend(row for row in map(_row, result) if row is not None)
+    return rows
+
+
+class MarkerRowsCluster(FastMarkerCluster):
+    '''
+    to_marker_rows로 만든 배열을 그대로 쓰는 FastMarkerCluster.
+    FastMarkerCluster는 받은 data를 행마다 validate_location으로 검사하지만(2만 행에 약 85ms),
+    to_marker_rows가 좌표를 숫자로 바꾸고 NaN인 행을 뺐으므로 이 layer는 rows를 검사 없이 data로 사용한다.
+    '''
+    def __init__(self, rows, callback, name=None):
+        """
+        rows(필수): to_marker_rows로 만든 배열 [위도, 경도, 종류, 값...]
+        callback(필수): 행마다 marker를 만드는 JS 함수
+        name(추가): layer 이름
+        """
+        super().__init__([], callback=callback, name=name)
+        self.data = rows
+
+
+def marker_layer(*results, origin=None, name=None, rows=None):
+    """
+    검색 결과들을 하나의 marker cluster layer로 변환
+        results: ParkingLotBatch, 주차장 DataFrame, ParkingLot/GasStation 리스트 (여러 개를 주면 한 layer에 함께 표시)
+        origin(추가): 길찾기 출발지 (이름, 위도, 경도). 없으면 도착지만 지정한 길찾기 주소 사용
+        name(추가): layer 이름
+        rows(추가): 이미 to_marker_rows로 변환한 배열 (주면 results 대신 사용)
+    반환한 layer를 .add_to(folium.Map)으로 지도에 추가한다.
+    """
+    callback = _CALLBACK % {
+        'fields': json.dumps(FIELDS),
+        'icons': json.dumps(ICONS),
+        'popups': json.dumps(POPUPS, ensure_ascii=False),
+        'origin': json.dumps(list(origin) if origin else None, ensure_ascii=False),
+    }
+    return MarkerRowsCluster(to_marker_rows(*results) if rows is None else rows, callback, name=name)
+
+
+def aggregate_layer(cells: pd.DataFrame, heatmap=False, name=None):
+    """
+    집계 격자(lat, lng, lot_count, space_total)를 지도 layer로 변환
+        heatmap(추가): True면 주차장 수를 가중치로 한 heatmap, False면 주차장 수에 비례한 원
+    격자 하나가 점 하나이므로 layer 크기는 격자 수에만 비례한다.
+    """
+    if heatmap:
+        peak = max(int(cells['lot_count'].max()), 1) if len(cells) else 1
+        data = [[lat, lng, count / peak] for lat, lng, count
+                in zip(cells['lat'].tolist(), cells['lng'].tolist(), cells['lot_count'].tolist())]
+        return HeatMap(data, name=name, min_opacity=0.3, radius=25)
+
+    features = [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+        'properties': {'lot_count': int(count), 'space_total': f'{int(space):,}',
+                       'radius': min(6 + int(math.log2(max(count, 1)) * 3), 36)},
+    } for lat, lng, count, space in zip(cells['lat'].tolist(), cells['lng'].tolist(),
+                                        cells['lot_count'].tolist(), cells['space_total'].tolist())]
+    return folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        name=name,
+        marker=folium.CircleMarker(fill=True),
+        style_function=lambda feature: {'radius': feature['properties']['radius'], 'color': '#1f5fbf', 'weight': 1,
+                                        'fillColor': '#3388ff', 'fillOpacity': 0.5},
+        tooltip=folium.GeoJsonTooltip(fields=['lot_count', 'space_total'], aliases=['주차장 수', '주차면수']),
+    )
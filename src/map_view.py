@@ -0,0 +1,71 @@
+# MAP VIEW
+# 검색 결과 지도를 HTML로 한 번만 만들어 두고, 같은 결과(목적지, 표시 옵션 포함)를 다시 그릴 때는 재사용.
+# 목록의 페이지/정렬만 바꾸는 rerun에서는 folium.Map 생성과 render를 다시 하지 않는다.
+# (folium.Map 객체는 render할 때마다 script가 덧붙어서 재사용할 수 없으므로 render한 HTML 문자열을 캐시)
+import hashlib
+import json
+
+import folium
+import streamlit as st
+import streamlit.components.v1 as components
+
+from src.cache import LRUCache
+from src.config import config_map_cache_size, config_map_cache_ttl
+from src.map_layer import marker_layer, to_marker_rows
+from src.panel import timed
+
+MAP_HEIGHT = 600    # 지도 높이(px)
+
+
+@st.cache_resource
+def get_map_cache():
+    '''검색 결과 지도 HTML 캐시 (프로세스 당 하나, 모든 세션이 공유)'''
+    return LRUCache(maxsize=config_map_cache_size, ttl=config_map_cache_ttl)
+
+
+def map_fingerprint(rows, center, zoom, destination=None, origin=None):
+    '''지도를 결정하는 값(marker 배열, 중심, zoom, 목적지, 길찾기 출발지)의 digest'''
+    payload = json.dumps([rows, center, zoom, destination, origin], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@timed("지도 생성")
+def build_result_map(rows, center, zoom, destination=None, origin=None):
+    '''marker 배열로 검색 결과 지도(folium.Map)를 만들어 HTML로 반환'''
+    m = folium.Map(location=center, zoom_start=zoom)
+    if destination:
+        folium.Marker(location=destination, icon=folium.Icon(color="red", icon="star")).add_to(m)
+    marker_layer(rows=rows, origin=origin).add_to(m)
+    return m.get_root().render()
+
+
+def render_result_map(*results, center, zoom, destination=None, origin=None):
+    """
+    검색 결과 지도의 HTML 반환 (같은 지도를 만든 적이 있으면 캐시에서 반환)
+        results: marker_layer에 주는 검색 결과들
+        center(필수): 지도 중심 (위도, 경도)
+        zoom(필수): 지도 zoom
+        destination(추가): 목적지 마커 좌표 (위도, 경도)
+        origin(추가): 길찾기 출발지 (이름, 위도, 경도)
+    """
+    rows = to_marker_rows(*results)
+    center = [float(center[0]), float(center[1])]
+    destination = [float(destination[0]), float(destination[1])] if destination else None
+    origin = [str(origin[0]), float(origin[1]), float(origin[2])] if origin else None
+
+    cache = get_map_cache()
+    key = map_fingerprint(rows, center, zoom, destination, origin)
+    html = cache.get(key)
+    if html is None:
+        html = build_result_map(rows, center, zoom, destination, origin)
+        cache.put(key, html)
+    return html
+
+
+def show_result_map(*results, center, zoom, destination=None, origin=None, height=MAP_HEIGHT):
+    """
+    검색 결과 지도를 화면에 표시 (render_result_map과 같은 인자)
+    지도에서 값(범위, zoom 등)을 돌려받아야 하는 경우에는 st_folium을 사용한다.
+    """
+    components.html(render_result_map(*results, center=center, zoom=zoom, destination=destination, origin=origin),
+                    height=height)
@@ -0,0 +1,159 @@
+# MIGRATE
+# data/migrations/의 버전별 SQL(NNNN_이름.sql)을 순서대로 적용하고, 적용한 버전을 schema_version 테이블에 기록.
+# 프로젝트 루트에서 python -m src.migrate 로 실행한다.
+#   --status: 버전별 적용 여부 확인
+#   --to N: N 버전까지만 적용
+#   --baseline N: 이미 같은 스키마로 운영 중인 DB에서 N 버전까지 실행하지 않고 적용된 것으로 기록
+#   --dry-run: 실행할 SQL만 출력
+import argparse
+import hashlib
+import re
+
+import mysql.connector
+
+from src.config import config_db, config_base_dir
+
+MIGRATIONS_DIR = config_base_dir / 'data' / 'migrations'
+FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+version_table_sql = '''
+    CREATE TABLE IF NOT EXISTS schema_version
+    (
+        version    int primary key,
+        name       varchar(100) not null,
+        checksum   char(40) not null,
+        applied_at datetime default CURRENT_TIMESTAMP
+    )
+'''
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path):
+        self.__version = version
+        self.__name = name
+        self.__path = path
+        self.__text = path.read_text(encoding='utf-8')
+
+    @property
+    def version(self):
+        return self.__version
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def checksum(self):
+        return hashlib.sha1(self.__text.encode('utf-8')).hexdigest()
+
+    @property
+    def statements(self):
+        '''주석(--)을 뺀 뒤 ;로 나눈 SQL 문 리스트'''
+        lines = [line for line in self.__text.splitlines() if not line.strip().startswith('--')]
+        return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+    def __repr__(self):
+        return f'Migration(version = {self.__version}, name = {self.__name})'
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    '''버전 순으로 정렬한 Migration 리스트 (버전이 중복되면 ValueError)'''
+    migrations = {}
+    for path in sorted(directory.glob('*.sql')):
+        match = FILE_PATTERN.match(path.name)
+        if match is None:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f'중복된 migration 버전: {path.name}, {migrations[version].name}')
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_versions(cursor):
+    '''{버전: checksum}'''
+    cursor.execute(version_table_sql)
+    cursor.execute('SELECT version, checksum FROM schema_version')
+    return dict(cursor.fetchall())
+
+
+def record(cursor, migration: Migration):
+    cursor.execute('INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)',
+                   (migration.version, migration.name, migration.checksum))
+
+
+def migrate(conn, migrations, target=None, baseline=None, dry_run=False):
+    """
+    아직 적용하지 않은 migration을 순서대로 적용하고 적용한 Migration 리스트 반환
+        target(추가): 이 버전까지만 적용
+        baseline(추가): 이 버전까지는 SQL을 실행하지 않고 적용된 것으로 기록
+        dry_run(추가): 실행하지 않고 SQL만 출력
+    MySQL의 DDL은 transaction으로 되돌릴 수 없으므로, 실패하면 그 버전에서 멈추고 이후 버전은 실행하지 않는다.
+    """
+    done = []
+    with conn.cursor() as cursor:
+        applied = applied_versions(cursor)
+        for migration in migrations:
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied:
+                if applied[migration.version] != migration.checksum:
+                    print(f'경고: {migration.version:04d}_{migration.name}.sql 파일이 적용 후 변경되었습니다.')
+                continue
+
+            if baseline is not None and migration.version <= baseline:
+                print(f'[baseline] {migration.version:04d}_{migration.name}')
+                if not dry_run:
+                    record(cursor, migration)
+                    conn.commit()
+                done.append(migration)
+                continue
+
+            print(f'[apply] {migration.version:04d}_{migration.name}')
+            for stmt in migration.statements:
+                if dry_run:
+                    print(stmt + ';\n')
+                    continue
+                cursor.execute(stmt)
+                if cursor.with_rows:
+                    cursor.fetchall()
+            if not dry_run:
+                record(cursor, migration)
+                conn.commit()
+            done.append(migration)
+    return done
+
+
+def status(conn, migrations):
+    '''버전별 (Migration, 적용 여부, checksum 일치 여부) 리스트'''
+    with conn.cursor() as cursor:
+        applied = applied_versions(cursor)
+    return [(migration, migration.version in applied, applied.get(migration.version) in (None, migration.checksum))
+            for migration in migrations]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DB 스키마 migration')
+    parser.add_argument('--to', type=int, default=None, help='이 버전까지만 적용')
+    parser.add_argument('--baseline', type=int, default=None,
+                        help='이 버전까지는 실행하지 않고 적용된 것으로 기록 (기존 DB에 처음 도입할 때)')
+    parser.add_argument('--status', action='store_true', help='버전별 적용 여부 출력')
+    parser.add_argument('--dry-run', action='store_true', help='실행할 SQL만 출력')
+    args = parser.parse_args()
+
+    migrations = load_migrations()
+    conn = mysql.connector.connect(**config_db)
+    try:
+        if args.status:
+            for migration, applied, same in status(conn, migrations):
+                mark = 'applied' if applied else 'pending'
+                print(f"{migration.version:04d}_{migration.name}: {mark}{'' if same else ' (변경됨)'}")
+            return
+        done = migrate(conn, migrations, target=args.to, baseline=args.baseline, dry_run=args.dry_run)
+        print(f'{len(done)}개 migration 처리 완료')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
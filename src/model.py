@@ -1,3 +1,8 @@
+import sys
+
+import numpy as np
+
+
 class ParkingLot:
     def __init__(self, id: int ,reg_id: str, name: str, lat: str, lng: str, sido: str, sigungu: str, full_addr: str, space_no: int, distance: float):
         self.__id = id
@@ -54,6 +59,255 @@ class ParkingLot:
     def __repr__(self):
         return f'ParkingLot(id = {self.__id}, reg_id = "{self.__reg_id}", name = "{self.__name}", lat = "{self.__lat}", lng = "{self.__lng}", sido = "{self.__sido}", sigungu = {self.__sigungu}, full_addr = {self.__full_addr}, space_no = {self.__space_no}, distance = {self.__distance})'
 
+# 주차장 검색 결과를 컬럼(배열) 단위로 보관
+# 숫자는 numpy 배열, 시도/시군구는 종류가 적으므로 코드 배열 + 값 목록으로 저장하고,
+# 행(ParkingLot)은 꺼낼 때마다 배열을 가리키는 view로 만든다.
+PARKING_LOT_FIELDS = ['id', 'reg_id', 'name', 'lat', 'lng', 'sido', 'sigungu', 'full_address', 'space_no']
+
+
+def _encode(values):
+    '''문자열 리스트를 (코드 배열, 값 목록)으로 변환 (같은 값은 하나의 str 객체로 공유)'''
+    table = {}
+    codes = np.fromiter((table.setdefault(sys.intern(val) if isinstance(val, str) else val, len(table)) for val in values),
+                        dtype=np.int32, count=len(values))
+    return codes, list(table)
+
+
+def _to_float(val):
+    '''숫자로 변환 (None이거나 숫자가 아니면 nan)'''
+    try:
+        return np.nan if val is None else float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_floats(values):
+    '''float64 배열로 변환. 한 번에 변환할 수 없는 값(None, 문자 등)이 있으면 값마다 변환'''
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter(map(_to_float, values), dtype=np.float64, count=len(values))
+
+
+class ParkingLotBatch:
+    '''
+    주차장 검색 결과 (ParkingLot 리스트처럼 len, 반복, index/slice 사용 가능).
+    id/lat/lng/space_no/distance는 numpy 배열, 시도/시군구는 코드 배열로 저장한다.
+    '''
+    def __init__(self, ids, reg_ids, names, lats, lngs, sido_codes, sidos, sigungu_codes, sigungus, addrs, space_nos,
+                 distances):
+        self.__ids = ids
+        self.__reg_ids = reg_ids
+        self.__names = names
+        self.__lats = lats
+        self.__lngs = lngs
+        self.__sido_codes = sido_codes
+        self.__sidos = sidos
+        self.__sigungu_codes = sigungu_codes
+        self.__sigungus = sigungus
+        self.__addrs = addrs
+        self.__space_nos = space_nos
+        self.__distances = distances
+        self.__getters = {      # 행(view)의 속성 값을 읽는 함수
+            'id': lambda i: int(ids[i]),
+            'reg_id': reg_ids.__getitem__,
+            'name': names.__getitem__,
+            'lat': lambda i: float(lats[i]),
+            'lng': lambda i: float(lngs[i]),
+            'sido': lambda i: sidos[sido_codes[i]],
+            'sigungu': lambda i: sigungus[sigungu_codes[i]],
+            'full_addr': addrs.__getitem__,
+            'space_no': lambda i: None if np.isnan(space_nos[i]) else int(space_nos[i]),
+            'distance': lambda i: None if np.isnan(distances[i]) else float(distances[i]),
+        }
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        rows: (id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no[, distance]) 튜플 리스트
+        """
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        columns = list(zip(*rows))
+        if len(columns) == len(PARKING_LOT_FIELDS):
+            columns.append([None] * len(rows))
+        ids, reg_ids, names, lats, lngs, sidos, sigungus, addrs, space_nos, distances = columns
+        sido_codes, sidos = _encode(sidos)
+        sigungu_codes, sigungus = _encode(sigungus)
+        return cls(np.array(ids, dtype=np.int64), list(reg_ids), list(names), _to_floats(lats), _to_floats(lngs),
+                   sido_codes, sidos, sigungu_codes, sigungus, list(addrs), _to_floats(space_nos), _to_floats(distances))
+
+    @classmethod
+    def from_cursor(cls, cursor, size=1000):
+        '''tuple cursor에서 size 건씩 읽어서 생성 (SELECT 컬럼 순서는 from_rows와 같아야 함)'''
+        rows = []
+        while True:
+            chunk = cursor.fetchmany(size)
+            if not chunk:
+                break
+            rows.extend(chunk)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def concat(cls, batches):
+        '''여러 batch를 이어 붙인 batch (시도/시군구 값 목록은 합쳐서 다시 코드화)'''
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        def merge(codes_of, table_of):
+            table, codes = {}, []
+            for batch in batches:
+                remap = np.array([table.setdefault(val, len(table)) for val in table_of(batch)], dtype=np.int32)
+                codes.append(remap[codes_of(batch)] if len(remap) else codes_of(batch))
+            return np.concatenate(codes), list(table)
+
+        sido_codes, sidos = merge(lambda b: b.__sido_codes, lambda b: b.__sidos)
+        sigungu_codes, sigungus = merge(lambda b: b.__sigungu_codes, lambda b: b.__sigungus)
+        join = lambda values_of: [val for batch in batches for val in values_of(batch)]
+        stack = lambda values_of: np.concatenate([values_of(batch) for batch in batches])
+        return cls(stack(lambda b: b.__ids), join(lambda b: b.__reg_ids), join(lambda b: b.__names),
+                   stack(lambda b: b.__lats), stack(lambda b: b.__lngs), sido_codes, sidos, sigungu_codes, sigungus,
+                   join(lambda b: b.__addrs), stack(lambda b: b.__space_nos), stack(lambda b: b.__distances))
+
+    @classmethod
+    def empty(cls):
+        floats = np.empty(0, dtype=np.float64)
+        codes = np.empty(0, dtype=np.int32)
+        return cls(np.empty(0, dtype=np.int64), [], [], floats, floats, codes, [], codes, [], [], floats, floats)
+
+    @property
+    def ids(self):
+        return self.__ids
+
+    @property
+    def lats(self):
+        return self.__lats
+
+    @property
+    def lngs(self):
+        return self.__lngs
+
+    @property
+    def space_nos(self):
+        '''주차면수 (값이 없으면 nan)'''
+        return self.__space_nos
+
+    @property
+    def distances(self):
+        '''목적지까지 거리(m) (값이 없으면 nan)'''
+        return self.__distances
+
+    @property
+    def names(self):
+        return self.__names
+
+    @property
+    def full_addrs(self):
+        return self.__addrs
+
+    def take(self, idx, distances=None):
+        '''idx(정수 배열) 순서의 행만 모은 batch. distances를 주면 거리를 바꿔서 저장'''
+        idx = np.asarray(idx, dtype=np.int64)
+        pick = lambda values: [values[i] for i in idx.tolist()]
+        return ParkingLotBatch(self.__ids[idx], pick(self.__reg_ids), pick(self.__names), self.__lats[idx],
+                               self.__lngs[idx], self.__sido_codes[idx], self.__sidos, self.__sigungu_codes[idx],
+                               self.__sigungus, pick(self.__addrs), self.__space_nos[idx],
+                               self.__distances[idx] if distances is None else np.asarray(distances, dtype=np.float64))
+
+    def value(self, field, i):
+        '''i번째 행의 field 값 (ParkingLot 속성과 같은 형식)'''
+        return self.__getters[field](i)
+
+    def column(self, field):
+        '''모든 행의 field 값 리스트 (value(field, i)와 같은 형식, 문자열 컬럼은 복사만 함)'''
+        texts = {'reg_id': self.__reg_ids, 'name': self.__names, 'full_addr': self.__addrs}
+        if field in texts:
+            return list(texts[field])
+        getter = self.__getters[field]
+        return [getter(i) for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(key)
+        return ParkingLotRow(self, key)
+
+    def __iter__(self):
+        return (ParkingLotRow(self, i) for i in range(len(self)))
+
+    def __add__(self, other):
+        '''다른 결과(주유소 리스트 등)와 합치면 일반 리스트'''
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f'ParkingLotBatch(size = {len(self)}, sido = {len(self.__sidos)}, sigungu = {len(self.__sigungus)})'
+
+
+class ParkingLotRow(ParkingLot):
+    '''ParkingLotBatch의 한 행 (값을 복사하지 않고 batch에서 읽음)'''
+    __slots__ = ('__batch', '__index')
+
+    def __init__(self, batch: ParkingLotBatch, index: int):
+        self.__batch = batch
+        self.__index = index
+
+    @property
+    def id(self):
+        return self.__batch.value('id', self.__index)
+
+    @property
+    def reg_id(self):
+        return self.__batch.value('reg_id', self.__index)
+
+    @property
+    def name(self):
+        return self.__batch.value('name', self.__index)
+
+    @property
+    def lat(self):
+        return self.__batch.value('lat', self.__index)
+
+    @property
+    def lng(self):
+        return self.__batch.value('lng', self.__index)
+
+    @property
+    def sido(self):
+        return self.__batch.value('sido', self.__index)
+
+    @property
+    def sigungu(self):
+        return self.__batch.value('sigungu', self.__index)
+
+    @property
+    def full_addr(self):
+        return self.__batch.value('full_addr', self.__index)
+
+    @property
+    def space_no(self):
+        return self.__batch.value('space_no', self.__index)
+
+    @property
+    def distance(self):
+        return self.__batch.value('distance', self.__index)
+
+    def __repr__(self):
+        return f'ParkingLotRow(id = {self.id}, name = "{self.name}", lat = {self.lat}, lng = {self.lng}, distance = {self.distance})'
+
+
 class Destination:
     def __init__(self, name: str, address: str, lat: float, lng: float):
         self.__name = name
@@ -79,6 +333,37 @@ class Destination:
         return f'Destination(name = "{self.__name}", address = "{self.__address}", lat = {self.__lat}, lng = {self.__lng})'
 
 
+# 지역 검색 결과 한 페이지
+class RegionPage:
+    def __init__(self, rows, total: int, cursor, next_cursor, has_next: bool):
+        self.__rows = rows
+        self.__total = total
+        self.__cursor = cursor
+        self.__next_cursor = next_cursor
+        self.__has_next = has_next
+
+    @property
+    def rows(self):
+        '''이 페이지의 주차장 (DataFrame)'''
+        return self.__rows
+    @property
+    def total(self):
+        '''조건에 맞는 전체 주차장 수'''
+        return self.__total
+    @property
+    def cursor(self):
+        return self.__cursor
+    @property
+    def next_cursor(self):
+        '''다음 페이지 조회에 넘길 (name, id). 마지막 페이지면 None'''
+        return self.__next_cursor
+    @property
+    def has_next(self):
+        return self.__has_next
+
+    def __repr__(self):
+        return f'RegionPage(rows = {len(self.__rows)}, total = {self.__total}, cursor = {self.__cursor}, next_cursor = {self.__next_cursor}, has_next = {self.__has_next})'
+
 # 주유소 API 관련
 class GasStation:
     def __init__(self, reg_id: str, station_name: str, price: int, brand_name: str,  lat: str, lng: str, distance: float):
@@ -0,0 +1,133 @@
+# PANEL
+# 페이지를 검색 폼 / 목록 / 지도 panel(st.fragment)로 나누어 실행할 때 쓰는 도구.
+# panel 안의 버튼/위젯을 누르면 그 panel만 다시 실행되고, 다른 panel과 주고받는 값은 session_state로만 전달한다.
+#   timed: 페이지 전체 실행과 panel 실행의 시간/횟수 기록 (어떤 interaction이 무엇을 다시 실행했는지 확인용)
+#   rerun_panel: 지금 실행 중인 panel만 다시 실행
+#   page_buttons: 목록 페이지 이동 버튼 (목록 panel만 다시 실행)
+import functools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+TIMINGS_KEY = 'run_timings'     # session_state에 실행 기록을 저장하는 key
+HISTORY = 30                    # 보관할 최근 실행 수
+
+
+class RunTimings:
+    '''
+    세션의 실행 기록.
+    recent: 최근 실행 (이름, 걸린 시간(초)) / calls: 이름별 실행 횟수 / total: 이름별 누적 시간(초)
+    '''
+    def __init__(self, history: int = HISTORY):
+        self.__recent = deque(maxlen=history)
+        self.__calls = {}
+        self.__total = {}
+
+    def add(self, name: str, seconds: float):
+        self.__recent.append((name, seconds))
+        self.__calls[name] = self.__calls.get(name, 0) + 1
+        self.__total[name] = self.__total.get(name, 0.0) + seconds
+
+    @property
+    def recent(self):
+        return list(self.__recent)
+
+    @property
+    def calls(self):
+        return dict(self.__calls)
+
+    @property
+    def total(self):
+        return dict(self.__total)
+
+    def summary(self):
+        '''이름별 (실행 횟수, 평균(ms), 마지막(ms)) 표'''
+        last = dict(self.__recent)
+        return pd.DataFrame(
+            [(name, calls, self.__total[name] / calls * 1000, last[name] * 1000 if name in last else None)
+             for name, calls in self.__calls.items()],
+            columns=['name', 'calls', 'avg_ms', 'last_ms'],
+        )
+
+    def __repr__(self):
+        return f'RunTimings(calls = {self.__calls})'
+
+
+def get_run_timings():
+    '''현재 세션의 실행 기록 (없으면 생성)'''
+    if TIMINGS_KEY not in st.session_state:
+        st.session_state[TIMINGS_KEY] = RunTimings()
+    return st.session_state[TIMINGS_KEY]
+
+
+@contextmanager
+def run_timer(name: str):
+    '''with 블록의 실행 시간을 기록 (st.rerun 등으로 중간에 끝나도 기록)'''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_run_timings().add(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    '''함수 실행 시간을 기록하는 decorator. st.fragment와 함께 쓸 때는 @st.fragment 아래에 둔다.'''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with run_timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def show_run_timings():
+    '''사이드바에 이름별 실행 횟수와 시간 표시'''
+    timings = get_run_timings()
+    with st.sidebar.expander('실행 시간'):
+        st.dataframe(timings.summary(), hide_index=True)
+
+
+def rerun_panel():
+    '''지금 실행 중인 panel(fragment)만 다시 실행. 페이지 전체를 실행하는 중이면 페이지 전체를 다시 실행'''
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def _set_value(key, value):
+    st.session_state[key] = value
+
+
+def page_buttons(total_pages: int, key: str = 'current_page'):
+    """
+    ◀, 페이지 번호 5개, ▶ 버튼 표시 (누르면 session_state[key]를 바꾸고 버튼이 있는 panel만 다시 실행)
+        total_pages(필수): 전체 페이지 수
+        key(추가): 현재 페이지를 저장하는 session_state key
+    """
+    current_page = st.session_state[key]
+    current_group = (current_page - 1) // 5
+    start_page = current_group * 5 + 1
+    end_page = min(start_page + 4, total_pages)
+
+    # 화살표 + 숫자 5개 버튼 UI (겹침 방지 비율 적용)
+    page_cols = st.columns([1.1, 1, 1, 1, 1, 1, 1.5])
+
+    with page_cols[0]:
+        if current_group > 0:
+            st.button("◀", key="prev_group", on_click=_set_value, args=(key, start_page - 1))
+
+    for i, p in enumerate(range(start_page, end_page + 1)):
+        with page_cols[i + 1]:
+            btn_type = "primary" if current_page == p else "secondary"
+            st.button(str(p), key=f"p_{p}", type=btn_type, use_container_width=True,
+                      on_click=_set_value, args=(key, p))
+
+    with page_cols[6]:
+        if end_page < total_pages:
+            st.button("▶", key="next_group", on_click=_set_value, args=(key, end_page + 1))
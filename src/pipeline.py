@@ -0,0 +1,172 @@
+# PIPELINE
+# 여러 단계(stage)를 크기 제한이 있는 queue로 연결해서 데이터를 흘려보내며 처리.
+# 뒤 단계가 느리면 queue가 가득 차서 앞 단계가 기다리므로(backpressure) 전체 데이터 크기와 관계없이
+# 메모리에는 queue 크기만큼의 데이터만 올라온다.
+import queue
+import threading
+import time
+
+_DONE = object()    # 입력이 끝났음을 알리는 표시
+
+
+class Stage:
+    '''
+    pipeline의 한 단계.
+    fn(item)의 반환값을 다음 단계로 넘기고, None을 반환하면 다음 단계로 넘기지 않는다.
+    '''
+    def __init__(self, name: str, fn, workers: int = 1, queue_size: int = 2, batch_size: int = None):
+        """
+        name(필수): 단계 이름 (통계 key)
+        fn(필수): 입력 하나를 처리하는 함수
+        workers(추가): 동시에 실행할 thread 수
+        queue_size(추가): 이 단계 앞의 입력 queue 최대 크기
+        batch_size(추가): 입력 리스트들을 이어 붙여 batch_size 건씩 fn에 전달 (None이면 받은 그대로 전달)
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = batch_size
+
+    def __repr__(self):
+        return f'Stage(name = {self.name}, workers = {self.workers}, queue_size = {self.queue_size}, batch_size = {self.batch_size})'
+
+
+class _StageStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0          # fn 호출 수
+        self.records = 0        # fn에 전달한 건수 (리스트면 길이, 아니면 1)
+        self.emitted = 0        # 다음 단계로 넘긴 수
+        self.errors = 0         # fn에서 예외가 난 수
+        self.busy = 0.0         # fn 실행 시간 합계(초)
+        self.blocked = 0.0      # 다음 단계 queue가 가득 차서 기다린 시간 합계(초)
+        self.max_queue = 0      # 입력 queue의 최대 길이
+
+    def to_dict(self, elapsed):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'records': self.records,
+                'emitted': self.emitted,
+                'errors': self.errors,
+                'busy': self.busy,
+                'blocked': self.blocked,
+                'max_queue': self.max_queue,
+                'records_per_sec': self.records / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class Pipeline:
+    '''
+    source에서 나온 데이터를 stage 순서대로 처리.
+    fn에서 난 예외는 해당 입력만 건너뛰고(errors에 기록) 나머지는 계속 처리한다.
+    '''
+    def __init__(self, stages: list, on_error=None):
+        """
+        stages(필수): Stage 리스트 (실행 순서)
+        on_error(추가): fn에서 예외가 났을 때 호출할 함수 (stage 이름, 입력, 예외)
+        """
+        self.__stages = stages
+        self.__on_error = on_error
+        self.__stopped = threading.Event()
+        self.__stats = [_StageStats() for _ in stages]
+        self.__started = None
+        self.__finished = None
+
+    def stop(self):
+        '''source에서 더 이상 읽지 않음. 이미 들어온 데이터는 끝까지 처리한다.'''
+        self.__stopped.set()
+
+    @property
+    def stopped(self):
+        return self.__stopped.is_set()
+
+    def run(self, source):
+        '''source(iterable)의 데이터를 모두 처리할 때까지 기다린 뒤 단계별 통계 반환'''
+        self.__started = time.perf_counter()
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.__stages]
+        remaining = [stage.workers for stage in self.__stages]      # 단계별로 아직 끝나지 않은 worker 수
+        remaining_lock = threading.Lock()
+
+        def finish_worker(index):
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(self.__stages):
+                for _ in range(self.__stages[index + 1].workers):
+                    queues[index + 1].put(_DONE)
+
+        def process(index, item):
+            stage, stats = self.__stages[index], self.__stats[index]
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                result = None
+                with stats.lock:
+                    stats.errors += 1
+                if self.__on_error:
+                    self.__on_error(stage.name, item, e)
+            busy = time.perf_counter() - start
+            with stats.lock:
+                stats.calls += 1
+                stats.records += len(item) if hasattr(item, '__len__') else 1
+                stats.busy += busy
+            if result is None or index + 1 == len(self.__stages):
+                return
+            start = time.perf_counter()
+            queues[index + 1].put(result)   # 가득 차 있으면 다음 단계가 꺼내갈 때까지 대기
+            with stats.lock:
+                stats.emitted += 1
+                stats.blocked += time.perf_counter() - start
+
+        def worker(index):
+            stage, stats = self.__stages[index], self.__stats[index]
+            pending = []
+            while True:
+                item = queues[index].get()
+                if item is _DONE:
+                    break
+                with stats.lock:
+                    stats.max_queue = max(stats.max_queue, queues[index].qsize() + 1)
+                if stage.batch_size is None:
+                    process(index, item)
+                    continue
+                pending.extend(item)
+                while len(pending) >= stage.batch_size:
+                    batch, pending = pending[:stage.batch_size], pending[stage.batch_size:]
+                    process(index, batch)
+            if pending:
+                process(index, pending)
+            finish_worker(index)
+
+        threads = [threading.Thread(target=worker, args=(index,), name=f'{stage.name}-{n}', daemon=True)
+                   for index, stage in enumerate(self.__stages)
+                   for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for item in source:
+                if self.__stopped.is_set():
+                    break
+                queues[0].put(item)
+        finally:
+            for _ in range(self.__stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            self.__finished = time.perf_counter()
+        return self.stats()
+
+    def stats(self):
+        '''단계별 처리 건수, 실행/대기 시간, 초당 처리 건수'''
+        if self.__started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.__finished or time.perf_counter()) - self.__started
+        return {stage.name: stats.to_dict(elapsed) for stage, stats in zip(self.__stages, self.__stats)}
+
+    def __repr__(self):
+        return f"Pipeline(stages = {[stage.name for stage in self.__stages]})"
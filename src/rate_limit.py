@@ -0,0 +1,58 @@
+# RATE LIMIT
+# 외부 API 호출 간격을 프로세스 전체에서 지키기 위한 token bucket.
+import threading
+import time
+
+
+class TokenBucket:
+    '''
+    초당 rate개의 token이 채워지고 최대 capacity개까지 쌓이는 bucket.
+    token이 없으면 호출한 순서대로 대기열에 줄을 세워 차례가 올 때까지 기다린다.
+    '''
+    def __init__(self, rate: float, capacity: float = 1, timer=time.monotonic, sleep=time.sleep):
+        """
+        rate(필수): 초당 허용 호출 수 (예: 1 -> 1초에 1번)
+        capacity(추가): 한 번에 몰아서 쓸 수 있는 최대 호출 수
+        """
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__timer = timer
+        self.__sleep = sleep
+        self.__tokens = capacity
+        self.__updated = timer()
+        self.__lock = threading.Lock()
+
+        self.__acquired = 0
+        self.__waited = 0           # 대기가 필요했던 호출 수
+        self.__wait_total = 0.0
+
+    def acquire(self):
+        '''token 하나를 사용. 부족하면 차례가 올 때까지 대기하고, 대기한 시간(초)을 반환'''
+        with self.__lock:
+            now = self.__timer()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            # token을 미리 빼 두어(음수 허용) 뒤에 온 호출은 그만큼 더 기다리게 함 (도착 순서 보장)
+            self.__tokens -= 1
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0.0
+
+            self.__acquired += 1
+            if wait > 0:
+                self.__waited += 1
+                self.__wait_total += wait
+
+        if wait > 0:
+            self.__sleep(wait)
+        return wait
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'rate': self.__rate,
+                'acquired': self.__acquired,
+                'waited': self.__waited,
+                'wait_total': self.__wait_total,
+            }
+
+    def __repr__(self):
+        return f'TokenBucket(rate = {self.__rate}, capacity = {self.__capacity})'
@@ -0,0 +1,121 @@
+# RESULT VIEW
+# 검색 결과 목록을 정렬 방식별로 페이지 단위로 보여주는 view.
+# 정렬 순서는 결과마다 한 번만 index 배열(permutation)로 계산해 두고, 페이지는 그 배열을 잘라서 만든다.
+# 이미 거리순인 결과 여러 개(주차장 + 주유소)는 heapq.merge로 필요한 페이지까지만 합친다.
+import heapq
+import itertools
+import math
+import operator
+
+import numpy as np
+
+from src.model import ParkingLotBatch
+
+
+class MergedResults:
+    '''
+    key(기본: 거리) 순으로 정렬된 결과 여러 개를 같은 순서로 합친 목록.
+    앞에서부터 필요한 만큼만 합치고(k-way merge), 합친 부분은 보관해서 다시 합치지 않는다.
+    값이 같으면 앞에 준 결과의 항목이 먼저 온다. (sorted(a + b, key=...)와 같은 순서)
+    '''
+    def __init__(self, *results, key='distance'):
+        self.__size = sum(len(result) for result in results)
+        self.__merged = []
+        self.__source = heapq.merge(*results, key=operator.attrgetter(key))
+
+    def __fill(self, end):
+        '''앞에서부터 end개까지 합쳐 둠'''
+        if end > len(self.__merged):
+            self.__merged.extend(itertools.islice(self.__source, end - len(self.__merged)))
+
+    def __len__(self):
+        return self.__size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.__size)
+            self.__fill(self.__size if step < 0 else stop)
+            return self.__merged[key]
+        if key < 0:
+            key += self.__size
+        if not 0 <= key < self.__size:
+            raise IndexError(key)
+        self.__fill(key + 1)
+        return self.__merged[key]
+
+    def __iter__(self):
+        self.__fill(self.__size)
+        return iter(self.__merged)
+
+    def __repr__(self):
+        return f'MergedResults(size = {self.__size}, merged = {len(self.__merged)})'
+
+
+def _column(items, field):
+    '''정렬 기준 값 리스트 (ParkingLotBatch는 행 view를 만들지 않고 컬럼에서 읽음)'''
+    if isinstance(items, ParkingLotBatch):
+        return items.column(field)
+    return [getattr(item, field) for item in items]
+
+
+class ResultView:
+    '''
+    검색 결과(ParkingLotBatch, 리스트, MergedResults)와 정렬 방식별 순서.
+    orders: {정렬 이름: (field, 내림차순 여부)}
+    순서(index 배열)는 정렬 이름마다 처음 요청할 때 한 번만 계산하고, 페이지는 그 배열을 잘라서 만든다.
+    '''
+    def __init__(self, items, orders=None):
+        """
+        items(필수): 검색 결과
+        orders(추가): 정렬 방식. 없는 정렬 이름(None 등)으로 요청하면 결과 순서 그대로
+        """
+        self.__items = items
+        self.__orders = dict(orders or {})
+        self.__perms = {}
+
+    @property
+    def items(self):
+        return self.__items
+
+    def order(self, name):
+        '''정렬한 결과의 i번째 항목이 items[order[i]]인 index 배열 (같은 값은 원래 순서 유지)'''
+        if name not in self.__perms:
+            field, descending = self.__orders[name]
+            values = _column(self.__items, field)
+            self.__perms[name] = np.array(sorted(range(len(values)), key=values.__getitem__, reverse=descending),
+                                          dtype=np.int64)
+        return self.__perms[name]
+
+    def page(self, page_no: int, size: int, order=None):
+        '''order 순서로 page_no(1부터) 페이지의 항목 리스트'''
+        start = (page_no - 1) * size
+        if order not in self.__orders:
+            return list(self.__items[start:start + size])
+        return [self.__items[i] for i in self.order(order)[start:start + size].tolist()]
+
+    def total_pages(self, size: int):
+        return math.ceil(len(self.__items) / size)
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __repr__(self):
+        return f'ResultView(items = {len(self.__items)}, orders = {list(self.__orders)}, computed = {list(self.__perms)})'
+
+
+def get_result_view(state, key, *results, orders=None):
+    """
+    state[key]에 보관한 view를 반환. 결과가 바뀌었으면(다른 객체) 새로 만들어 보관
+        state(필수): st.session_state 등 dict
+        results(필수): 검색 결과. 여러 개면 MergedResults로 거리순으로 합쳐서 사용
+        orders(추가): ResultView의 정렬 방식
+    """
+    saved = state.get(key)
+    if saved is not None:
+        sources, view = saved
+        if len(sources) == len(results) and all(a is b for a, b in zip(sources, results)):
+            return view
+    items = results[0] if len(results) == 1 else MergedResults(*results)
+    view = ResultView(items, orders)
+    state[key] = (results, view)
+    return view
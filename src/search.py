@@ -0,0 +1,91 @@
+# SEARCH
+# 목적지 검색 -> 주변 주차장(DB) / 주유소(Opinet) 조회를 묶어서 실행.
+# 목적지 좌표가 나오면 두 조회는 서로 독립적이므로 동시에 실행한다.
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from src.db_crud import get_near_parking_data
+from src.utils import find_address_and_point, get_oil_stations
+
+
+class SearchResult:
+    def __init__(self, destination, parking_lots: list, oil_stations: list, timings: dict, errors: dict):
+        self.__destination = destination
+        self.__parking_lots = parking_lots
+        self.__oil_stations = oil_stations
+        self.__timings = timings
+        self.__errors = errors
+
+    @property
+    def destination(self):
+        return self.__destination
+
+    @property
+    def parking_lots(self):
+        return self.__parking_lots
+
+    @property
+    def oil_stations(self):
+        return self.__oil_stations
+
+    @property
+    def timings(self):
+        '''단계별 소요 시간(초): geocode, parking, oil, total'''
+        return self.__timings
+
+    @property
+    def errors(self):
+        '''실패한 단계와 예외 (실패한 단계의 결과는 빈 리스트)'''
+        return self.__errors
+
+    def __repr__(self):
+        return f'SearchResult(destination = {self.__destination}, parking_lots = {len(self.__parking_lots)}, oil_stations = {len(self.__oil_stations)}, timings = {self.__timings}, errors = {self.__errors})'
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def search_parking_and_oil(destination_name, find_destination=find_address_and_point,
+                           find_parking=get_near_parking_data, find_oil=get_oil_stations):
+    """
+    목적지를 찾은 뒤 주변 주차장과 주유소를 동시에 조회
+        destination_name(필수): 검색어
+        find_destination/find_parking/find_oil(추가): 각 단계에서 사용할 함수
+    한 단계가 실패해도 나머지 결과는 그대로 반환하고, 실패 내용은 errors에 담는다.
+    """
+    start = time.perf_counter()
+    timings, errors = {}, {}
+
+    try:
+        destination, timings['geocode'] = _timed(find_destination, destination_name)
+    except Exception as e:
+        destination, timings['geocode'] = None, time.perf_counter() - start
+        errors['geocode'] = e
+    if destination is None:
+        timings['total'] = time.perf_counter() - start
+        return SearchResult(None, [], [], timings, errors)
+
+    # worker thread에서도 st.error 등이 현재 세션 화면에 출력되도록 script context 전달
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='search',
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        legs = {
+            'parking': executor.submit(_timed, find_parking, destination),
+            'oil': executor.submit(_timed, find_oil, destination.lat, destination.lng),
+        }
+
+    results = {}
+    for name, future in legs.items():
+        try:
+            results[name], timings[name] = future.result()
+        except Exception as e:
+            results[name] = []
+            errors[name] = e
+    timings['total'] = time.perf_counter() - start
+    return SearchResult(destination, results['parking'] or [], results['oil'] or [], timings, errors)
@@ -0,0 +1,241 @@
+# SPATIAL INDEX
+# 주차장 좌표를 단위 구(unit sphere) 위의 3차원 점으로 바꿔 KD-tree로 색인.
+# DB를 거치지 않고 프로세스 메모리 안에서 반경/최근접 검색을 수행한다.
+import heapq
+import threading
+
+import numpy as np
+
+from src.model import ParkingLotBatch
+
+EARTH_RADIUS = 6370986      # ST_Distance_Sphere 기본 지구 반지름(m)와 동일하게 맞춤
+LEAF_SIZE = 32              # leaf 노드 하나에 담는 최대 점 개수
+
+
+def to_unit_xyz(lat, lng):
+    '''위도/경도(도) 배열을 단위 구 위의 (n, 3) 좌표로 변환'''
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lng = np.radians(np.asarray(lng, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    '''두 지점 사이의 대원 거리(m). lat2/lng2는 배열 가능'''
+    lat1, lng1 = np.radians(lat1), np.radians(lng1)
+    lat2, lng2 = np.radians(lat2), np.radians(lng2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def radius_to_chord(radius):
+    '''대원 거리(m)를 단위 구 위의 직선(chord) 거리로 변환'''
+    theta = min(radius / EARTH_RADIUS, np.pi)
+    return 2 * np.sin(theta / 2)
+
+
+class SphereKDTree:
+    '''
+    (n, 3) 단위 구 좌표에 대한 KD-tree.
+    노드마다 bounding box를 저장해 두고, 질의점과 box 사이의 최소 거리로 가지치기 한다.
+    '''
+    def __init__(self, xyz):
+        self.__xyz = np.ascontiguousarray(xyz, dtype=np.float64)
+        self.__build()
+
+    def __len__(self):
+        return len(self.__perm)
+
+    def __build(self):
+        n = len(self.__xyz)
+        perm = np.arange(n)
+        starts, ends, lefts, rights, lows, highs = [], [], [], [], [], []
+
+        def new_node(start, end):
+            pts = self.__xyz[perm[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lows.append(pts.min(axis=0) if end > start else np.zeros(3))
+            highs.append(pts.max(axis=0) if end > start else np.zeros(3))
+            return len(starts) - 1
+
+        stack = [new_node(0, n)]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= LEAF_SIZE:
+                continue
+            # 가장 넓게 퍼진 축을 기준으로 중앙값 분할
+            axis = int(np.argmax(highs[node] - lows[node]))
+            mid = (start + end) // 2
+            segment = perm[start:end]
+            order = np.argpartition(self.__xyz[segment, axis], mid - start)
+            perm[start:end] = segment[order]
+
+            lefts[node] = new_node(start, mid)
+            rights[node] = new_node(mid, end)
+            stack.append(lefts[node])
+            stack.append(rights[node])
+
+        self.__perm = perm
+        self.__start = np.array(starts)
+        self.__end = np.array(ends)
+        self.__left = np.array(lefts)
+        self.__right = np.array(rights)
+        self.__low = np.array(lows).reshape(-1, 3)
+        self.__high = np.array(highs).reshape(-1, 3)
+        # leaf 단위로 연속 접근할 수 있도록 좌표를 정렬된 순서로 복사
+        self.__sorted_xyz = self.__xyz[perm]
+
+    def __box_dist2(self, node, q):
+        '''질의점 q와 노드 bounding box 사이의 최소 거리 제곱'''
+        d = np.maximum(0.0, np.maximum(self.__low[node] - q, q - self.__high[node]))
+        return float(d @ d)
+
+    def __box_max_dist2(self, node, q):
+        '''질의점 q와 노드 bounding box 사이의 최대 거리 제곱'''
+        d = np.maximum(np.abs(q - self.__low[node]), np.abs(q - self.__high[node]))
+        return float(d @ d)
+
+    def query_radius(self, q, chord):
+        '''q로부터 chord 거리 이내의 점 index 배열'''
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+        q = np.asarray(q, dtype=np.float64)
+        r2 = chord * chord
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self.__box_dist2(node, q) > r2:
+                continue
+            start, end = self.__start[node], self.__end[node]
+            if self.__left[node] == -1 or self.__box_max_dist2(node, q) <= r2:
+                # leaf이거나 box 전체가 반경 안에 들어오면 구간 전체를 한 번에 검사
+                diff = self.__sorted_xyz[start:end] - q
+                hit = np.einsum('ij,ij->i', diff, diff) <= r2
+                found.append(self.__perm[start:end][hit])
+            else:
+                stack.append(self.__left[node])
+                stack.append(self.__right[node])
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def query_knn(self, q, k):
+        '''q에 가장 가까운 k개 점의 index 배열 (가까운 순)'''
+        if len(self) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64)
+        q = np.asarray(q, dtype=np.float64)
+        best = []       # (-거리제곱, index) max-heap
+        frontier = [(0.0, 0)]
+        while frontier:
+            dist2, node = heapq.heappop(frontier)
+            if len(best) == k and dist2 > -best[0][0]:
+                break
+            if self.__left[node] == -1:
+                start, end = self.__start[node], self.__end[node]
+                diff = self.__sorted_xyz[start:end] - q
+                d2 = np.einsum('ij,ij->i', diff, diff)
+                for i in np.argsort(d2)[:k]:
+                    item = (-float(d2[i]), int(self.__perm[start + i]))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+                    else:
+                        break
+            else:
+                for child in (self.__left[node], self.__right[node]):
+                    heapq.heappush(frontier, (self.__box_dist2(child, q), child))
+        return np.array([i for _, i in sorted(best, reverse=True)], dtype=np.int64)
+
+
+class ParkingLotIndex:
+    '''
+    use_yn = 'Y'인 주차장 전체에 대한 메모리 색인.
+    version: 색인을 만들 때 사용한 data_version (바뀌면 새로 빌드)
+    '''
+    def __init__(self, rows, version=None):
+        """
+        rows: ParkingLotBatch 또는 (id, reg_id, name, lat, lng, sido, sigungu, full_address, space_no) 튜플의 iterable
+        """
+        self.__version = version
+        lots = rows if isinstance(rows, ParkingLotBatch) else ParkingLotBatch.from_rows(rows)
+        usable = ~(np.isnan(lots.lats) | np.isnan(lots.lngs))   # 좌표가 없는 행은 색인에서 제외
+        if not usable.all():
+            lots = lots.take(np.flatnonzero(usable))
+        self.__lots = lots
+        self.__lat = lots.lats
+        self.__lng = lots.lngs
+        self.__tree = SphereKDTree(to_unit_xyz(self.__lat, self.__lng))
+
+    @property
+    def version(self):
+        return self.__version
+
+    def __len__(self):
+        return len(self.__lots)
+
+    def __to_lots(self, idx, dist):
+        return self.__lots.take(idx, distances=dist)
+
+    def query_radius(self, lat, lng, radius):
+        '''(lat, lng)에서 radius(m) 이내의 주차장을 가까운 순으로 반환'''
+        q = to_unit_xyz([lat], [lng])[0]
+        # chord 비교는 근사 없이 대원 거리와 단조 관계이므로 여유분 없이 사용 가능
+        idx = self.__tree.query_radius(q, radius_to_chord(radius))
+        dist = haversine(lat, lng, self.__lat[idx], self.__lng[idx])
+        keep = dist <= radius
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')
+        return self.__to_lots(idx[order], dist[order])
+
+    def query_bbox(self, south, west, north, east, limit=None):
+        '''범위 안의 주차장 (주차면수가 많은 순으로 최대 limit개, 거리는 없음)'''
+        inside = np.flatnonzero((self.__lat >= south) & (self.__lat <= north) &
+                                (self.__lng >= west) & (self.__lng <= east))
+        order = np.argsort(-np.nan_to_num(self.__lots.space_nos[inside], nan=-1.0), kind='stable')
+        idx = inside[order][:limit]
+        return self.__lots.take(idx, distances=np.full(len(idx), np.nan))
+
+    def query_knn(self, lat, lng, k):
+        '''(lat, lng)에서 가장 가까운 k개의 주차장을 가까운 순으로 반환'''
+        q = to_unit_xyz([lat], [lng])[0]
+        idx = self.__tree.query_knn(q, k)
+        dist = haversine(lat, lng, self.__lat[idx], self.__lng[idx])
+        return self.__to_lots(idx, dist)
+
+    def __repr__(self):
+        return f'ParkingLotIndex(size = {len(self)}, version = {self.__version})'
+
+
+class IndexHolder:
+    '''
+    현재 사용 중인 색인을 들고 있다가 data_version이 바뀌면 새 색인으로 교체.
+    빌드는 한 스레드만 수행하고, 그동안 다른 세션은 기존 색인을 그대로 사용한다.
+    '''
+    def __init__(self, loader):
+        """
+        loader: version을 받아 ParkingLotIndex를 만들어 반환하는 함수
+        """
+        self.__loader = loader
+        self.__index = None
+        self.__lock = threading.Lock()
+
+    def get(self, version):
+        index = self.__index
+        if index is not None and index.version == version:
+            return index
+
+        # 기존 색인이 있으면 빌드 중인 다른 스레드를 기다리지 않고 이전 색인을 사용
+        if not self.__lock.acquire(blocking=index is None):
+            return index
+        try:
+            index = self.__index
+            if index is None or index.version != version:
+                index = self.__loader(version)
+                self.__index = index    # 참조 교체는 원자적
+            return index
+        finally:
+            self.__lock.release()
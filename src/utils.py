@@ -1,21 +1,38 @@
-from geopy.geocoders import Nominatim
-
-from pyproj import Transformer
+from functools import lru_cache
+import math
+import numpy as np
 import requests
 import time
 
 from src.config import config_opinet
+from src.config import config_geocode_cache_path, config_geocode_cache_ttl, config_geocode_negative_ttl, config_geocode_rate
 from src.model import Destination, GasStation
+from src.geocode_cache import GeocodeCache, normalize_query
+from src.config import config_oil_cache_size, config_oil_cache_ttl, config_oil_cache_grid
+from src.rate_limit import TokenBucket
+from src.cache import CachedLoader
 
 
 # 좌표계 변환 관련
 KATEC_STR = "+proj=tmerc +lat_0=38 +lon_0=128 +k=0.9999 +x_0=400000 +y_0=600000 +ellps=bessel +units=m +no_defs +towgs84=-115.80,483.35,664.43,0,0,0,0"
 WGS84_STR = "epsg:4326"
 
-to_katec = Transformer.from_crs(WGS84_STR, KATEC_STR, always_xy=True)
-to_wgs84 = Transformer.from_crs(KATEC_STR, WGS84_STR, always_xy=True)
+@lru_cache(maxsize=None)
+def get_transformer(from_crs, to_crs):
+    '''좌표계 변환기 (처음 사용할 때 생성하고 프로세스 안에서 재사용)'''
+    from pyproj import Transformer     # pyproj 로딩이 무거워서 실제로 필요할 때 import
+    return Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+def wgs84_to_katec(lng, lat):
+    '''WGS84 경도/위도(스칼라 또는 배열)를 KATEC X/Y로 한 번에 변환'''
+    return get_transformer(WGS84_STR, KATEC_STR).transform(np.asarray(lng, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+
+def katec_to_wgs84(x, y):
+    '''KATEC X/Y(스칼라 또는 배열)를 WGS84 경도/위도로 한 번에 변환'''
+    return get_transformer(KATEC_STR, WGS84_STR).transform(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
 
 GAS_SATION_URL = "https://www.opinet.co.kr/api/aroundAll.do"
+OPINET_MAX_RADIUS = 5000    # Opinet 반경 검색 최대값(m)
 
 #주유소 브랜드 코드 - 브랜드명
 BRAND_MAP = {
@@ -24,43 +41,100 @@ BRAND_MAP = {
     'NHO': '농협알뜰', 'ETC': '자가상표', 'E1G': 'E1', 'SKG': 'SK가스', 'RTO': '자영알뜰'
 }
 
-geolocator = Nominatim(user_agent="chagokchagok")
+@lru_cache(maxsize=None)
+def get_geolocator():
+    '''Nominatim client (처음 검색할 때 생성)'''
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent="chagokchagok")
+
+@lru_cache(maxsize=None)
+def get_geocode_cache():
+    '''목적지 검색 결과 캐시 (SQLite, 프로세스 당 하나)'''
+    return GeocodeCache(config_geocode_cache_path, ttl=config_geocode_cache_ttl, negative_ttl=config_geocode_negative_ttl)
+
+@lru_cache(maxsize=None)
+def get_geocode_limiter():
+    '''Nominatim 호출 간격 제한 (프로세스 당 하나, 모든 세션이 공유)'''
+    return TokenBucket(rate=config_geocode_rate, capacity=1)
 
 # 목적지를 검색하고 해당 목적지의 주소와 위도/경도 반환
-# 연속 요청 시 1초 이상의 간격으로
+# 연속 요청 시 1초 이상의 간격으로 (get_geocode_limiter가 모든 세션의 호출 순서를 맞춰 대기시킴)
 def find_address_and_point(destination_name):
+    query = normalize_query(destination_name)
+    cache = get_geocode_cache()
+    hit, cached = cache.get(query)
+    if hit:
+        return Destination(destination_name, *cached) if cached else None
+
     try:
-        result_data = geolocator.geocode(destination_name, exactly_one=True)
+        get_geocode_limiter().acquire()
+        result_data = get_geolocator().geocode(destination_name, exactly_one=True)
         if result_data:
+            cache.put(query, (result_data.address, result_data.latitude, result_data.longitude))
             return Destination(destination_name, result_data.address, result_data.latitude, result_data.longitude)
         else:
+            cache.put(query, None)
             return None
     except Exception as e:
         raise e
 
-# 찾은 목적지 주변의 주유소 리스트 반환
-def get_oil_stations(lat, lon, radius=3000):
-    OPINET_KEY = config_opinet
-    kx, ky = to_katec.transform(lon, lat)
+@lru_cache(maxsize=None)
+def get_oil_loader():
+    '''Opinet 조회 결과 캐시 (프로세스 당 하나, 동시에 들어온 같은 조회는 한 번만 호출)'''
+    return CachedLoader(maxsize=config_oil_cache_size, ttl=config_oil_cache_ttl)
+
+def get_oil_cache_stats():
+    '''Opinet 캐시 통계 (upstream_calls, saved, served_age_avg/max 등)'''
+    return get_oil_loader().stats()
+
+def fetch_oil_stations(kx, ky, radius, prodcd):
+    '''Opinet에서 KATEC 좌표 (kx, ky) 반경 radius(m) 안의 주유소 원본 데이터 조회'''
     params = {
-        "code": OPINET_KEY,
+        "code": config_opinet,
         "out": "json",
         "x": kx,
         "y": ky,
         "radius": radius,
-        "prodcd": "B027",  # 휘발유 기준
+        "prodcd": prodcd,
         "sort": 2  # 거리순
     }
+    res = requests.get(GAS_SATION_URL, params=params, timeout=10)
+    data = res.json()
+    return data.get('RESULT', {}).get('OIL', [])
+
+# 찾은 목적지 주변의 주유소 리스트 반환
+# KATEC 좌표를 격자에 맞춰 캐시 key로 사용하고, 격자 오차만큼 넓힌 반경으로 조회한 뒤
+# 실제 목적지 기준 거리로 다시 걸러서 가까운 순으로 반환
+def get_oil_stations(lat, lon, radius=3000, prodcd="B027"):    # B027: 휘발유
+    kx, ky = wgs84_to_katec(lon, lat)
+    kx, ky = float(kx), float(ky)
+    grid = config_oil_cache_grid
+    margin = grid * math.sqrt(2) / 2
+    if radius + margin <= OPINET_MAX_RADIUS:
+        cx, cy = round(kx / grid) * grid, round(ky / grid) * grid
+        query_radius = radius + margin
+    else:
+        cx, cy, query_radius = kx, ky, radius   # 최대 반경을 넘으면 격자에 맞추지 않음
     try:
-        res = requests.get(GAS_SATION_URL, params=params)
-        data = res.json()
-        stations = data.get('RESULT', {}).get('OIL', [])
+        stations = get_oil_loader().get((cx, cy, radius, prodcd),
+                                        lambda: fetch_oil_stations(cx, cy, query_radius, prodcd))
+
+        if not stations:
+            return list()
+
+        # 거리 계산과 좌표 변환을 주유소 전체에 대해 한 번에 수행
+        xs = np.array([s['GIS_X_COOR'] for s in stations], dtype=np.float64)
+        ys = np.array([s['GIS_Y_COOR'] for s in stations], dtype=np.float64)
+        distances = np.round(np.hypot(xs - kx, ys - ky), 1)
+        keep = np.flatnonzero(distances <= radius)
+        keep = keep[np.argsort(distances[keep], kind='stable')]
+        lngs, lats = katec_to_wgs84(xs[keep], ys[keep])
 
         gas_stations = list()
-        for s in stations:
-            s['lng'], s['lat'] = to_wgs84.transform(s['GIS_X_COOR'], s['GIS_Y_COOR'])
-            s['brand_nm'] = BRAND_MAP.get(s['POLL_DIV_CD'], '기타')
-            gas_stations.append(GasStation(s['UNI_ID'], s['OS_NM'], s['PRICE'], s['brand_nm'], s['lat'], s['lng'], s['DISTANCE']))
+        for i, lat, lng in zip(keep, lats.tolist(), lngs.tolist()):
+            s = stations[i]
+            brand_nm = BRAND_MAP.get(s['POLL_DIV_CD'], '기타')
+            gas_stations.append(GasStation(s['UNI_ID'], s['OS_NM'], s['PRICE'], brand_nm, lat, lng, float(distances[i])))
         return gas_stations
     except Exception as e:
         raise e
@@ -97,12 +171,15 @@ def fetch_from_api(url:str, params: dict, retries: int=3):
             break
     return None
 
-def valid_check_with_logging(target_list, required_keys, number_keys=None):
+def valid_check_with_logging(target_list, required_keys, number_keys=None, ranges=None):
     """
     데이터를 체크해서 error msg를 추가
     target_list: 데이터 체크할 리스트
     required_keys: 필요한 key값
     number_keys: number type이 필요한 key값
+    ranges: {key: (최소값, 최대값)} 숫자 값의 허용 범위 (NaN/inf는 범위 밖, 숫자가 아닌 값은 검사하지 않음)
+    dict 리스트는 컬럼으로 모았다가 결과를 다시 기록하는 비용이 검사 비용보다 커서 한 번의 순회로 검사한다.
+    (컬럼으로 가지고 있는 batch는 validation.BatchValidator 사용. 규칙과 메시지는 같음)
     """
     for item in target_list:
         errors = []
@@ -128,7 +205,18 @@ def valid_check_with_logging(target_list, required_keys, number_keys=None):
                 except (ValueError, TypeError):
                     errors.append(f"Invalid number format: {n_key}({val})")
 
-        # 3. 결과 기록
+        # 3. 범위 체크
+        if ranges:
+            for g_key, (low, high) in ranges.items():
+                val = item.get(g_key)
+                try:
+                    number = float(val)
+                except (ValueError, TypeError):
+                    continue
+                if not math.isfinite(number) or number < low or number > high:
+                    errors.append(f"Out of range: {g_key}({val})")
+
+        # 4. 결과 기록
         if not errors:
             item['error_yn'] = 'N'
             item['error_msg'] = ''
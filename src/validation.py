@@ -0,0 +1,178 @@
+# VALIDATION
+# 데이터를 행(dict) 단위가 아니라 컬럼(배열) 단위로 한 번에 검증.
+# 규칙마다 전체 batch에 대한 mask를 만들고, 오류 메시지는 오류가 있는 행에 대해서만 만든다.
+import numpy as np
+import pandas as pd
+from numpy.dtypes import StringDType
+
+
+class ValidationResult:
+    '''
+    batch 검증 결과.
+    valid: 행별 통과 여부(bool 배열), error_yn/error_msg: 행별 'Y'/'N'과 오류 메시지
+    errors: 오류 한 건당 한 행인 표 (row, key, rule, value)
+    '''
+    def __init__(self, valid, error_msg, errors):
+        self.__valid = valid
+        self.__error_msg = error_msg
+        self.__errors = errors
+
+    @property
+    def valid(self):
+        return self.__valid
+
+    @property
+    def error_yn(self):
+        return np.where(self.__valid, 'N', 'Y')
+
+    @property
+    def error_msg(self):
+        return self.__error_msg
+
+    @property
+    def errors(self):
+        return self.__errors
+
+    def valid_subset(self, frame: pd.DataFrame):
+        '''검증한 batch(DataFrame) 중 통과한 행'''
+        return frame[self.__valid]
+
+    def __len__(self):
+        return len(self.__valid)
+
+    def __repr__(self):
+        return f'ValidationResult(rows = {len(self.__valid)}, invalid = {int((~self.__valid).sum())}, errors = {len(self.__errors)})'
+
+
+def to_column(values):
+    """
+    리스트/Series/배열을 1차원 배열로 변환
+    StringDType(numpy 문자열) 배열은 그대로 사용하고, 나머지는 object 배열로 변환 (값이 리스트 등이어도 원소 하나로 다룸)
+    """
+    if isinstance(values, pd.Series):
+        values = values.to_numpy(dtype=object)
+    if isinstance(values, np.ndarray) and values.ndim == 1 and (values.dtype == object or _is_text(values)):
+        return values
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _is_text(values):
+    '''None이 없는 StringDType 배열이면 True (모든 값이 str)'''
+    return isinstance(values.dtype, StringDType) and not hasattr(values.dtype, 'na_object')
+
+
+def _is_none(values):
+    if _is_text(values):
+        return np.zeros(len(values), dtype=bool)
+    return values == None   # noqa: E711 (object 배열의 원소별 비교)
+
+
+def _is_missing(values, is_none):
+    '''None이거나 공백 문자열이면 True (str(val).strip() == "" 와 같은 기준)'''
+    if _is_text(values):
+        return (values == '') | np.strings.isspace(values)
+    # Python 객체 배열은 다른 형식으로 변환하는 비용이 검사 비용보다 커서 한 번에 순회하며 확인
+    blank = np.array([not str(val).strip() for val in values], dtype=bool)
+    return is_none | blank
+
+
+def to_floats(values, is_none=None):
+    """
+    값 배열을 float() 규칙으로 변환한 (float64 배열, 변환 실패 mask) 반환 (None과 실패한 값은 nan)
+    1. object/StringDType 배열의 float64 변환은 float()과 같은 규칙을 쓰므로 먼저 한 번에 변환해 보고,
+    2. 하나라도 실패하면 pandas로 변환한 뒤 pandas가 읽지 못한 값만 float()으로 다시 확인한다.
+       (pandas는 float()이 거부하는 값을 받아들이지 않지만 '1_000', 전각 숫자처럼 float()만 읽는 값은 있음)
+    """
+    values = to_column(values)
+    if is_none is None:
+        is_none = _is_none(values)
+    numbers = np.full(len(values), np.nan)
+    invalid = np.zeros(len(values), dtype=bool)
+    present = np.flatnonzero(~is_none)
+    try:
+        numbers[present] = values[present].astype(np.float64)
+        return numbers, invalid
+    except (ValueError, TypeError):
+        pass
+
+    try:
+        numbers[present] = pd.to_numeric(pd.Series(values[present].astype(object)), errors='coerce').to_numpy(dtype=np.float64)
+        recheck = present[np.isnan(numbers[present])]
+    except (ValueError, TypeError):
+        recheck = present
+    for i in recheck:
+        try:
+            numbers[i] = float(values[i])
+        except (ValueError, TypeError):
+            invalid[i] = True
+    return numbers, invalid
+
+
+class BatchValidator:
+    '''
+    필수 값(required), 숫자 형식(number), 범위(ranges) 규칙으로 batch를 검증.
+    오류 메시지는 valid_check_with_logging과 같은 형식과 순서로 만든다.
+    '''
+    def __init__(self, required_keys, number_keys=None, ranges=None):
+        """
+        required_keys(필수): 비어 있으면 안 되는 key
+        number_keys(추가): 숫자로 변환 가능해야 하는 key
+        ranges(추가): {key: (최소값, 최대값)} 숫자 값의 허용 범위 (NaN/inf는 범위 밖, 숫자가 아닌 값은 검사하지 않음)
+        """
+        self.__required_keys = list(required_keys)
+        self.__number_keys = list(number_keys or [])
+        self.__ranges = dict(ranges or {})
+
+    def validate(self, columns):
+        """
+        columns: DataFrame 또는 {key: 값 배열} (모든 배열의 길이가 같아야 함, 없는 key는 None으로 간주)
+            문자열만 있는 컬럼을 StringDType 배열로 주면 Python 객체를 거치지 않고 검사한다.
+        """
+        size = len(columns) if isinstance(columns, pd.DataFrame) else len(next(iter(columns.values()), []))
+        keys = dict.fromkeys([*self.__required_keys, *self.__number_keys, *self.__ranges])
+        values_of = {key: to_column(columns[key]) if key in columns else np.full(size, None, dtype=object)
+                     for key in keys}
+        is_none_of = {key: _is_none(values) for key, values in values_of.items()}
+        numbers_of = {}
+
+        def numbers(key):
+            if key not in numbers_of:
+                numbers_of[key] = to_floats(values_of[key], is_none_of[key])
+            return numbers_of[key]
+
+        checks = []     # (rule, key, 오류 mask, 메시지 함수)
+        for key in self.__required_keys:
+            checks.append(('required', key, _is_missing(values_of[key], is_none_of[key]),
+                           lambda val, key=key: f"Missing required key: {key}"))
+        for key in self.__number_keys:
+            checks.append(('number_null', key, is_none_of[key], lambda val, key=key: f"Number key is null: {key}"))
+            checks.append(('number_format', key, numbers(key)[1], lambda val, key=key: f"Invalid number format: {key}({val})"))
+        for key, (low, high) in self.__ranges.items():
+            value, invalid_format = numbers(key)
+            # 숫자로 읽힌 값 중 NaN/inf도 범위 오류 (비교 연산으로는 걸리지 않음)
+            out = ~is_none_of[key] & ~invalid_format & (~np.isfinite(value) | (value < low) | (value > high))
+            checks.append(('range', key, out, lambda val, key=key: f"Out of range: {key}({val})"))
+
+        invalid = np.zeros(size, dtype=bool)
+        for _, _, mask, _ in checks:
+            invalid |= mask
+
+        # 메시지는 오류가 있는 행만, 규칙 순서대로 이어 붙임
+        error_msg = np.full(size, '', dtype=object)
+        records = []
+        bad_rows = np.flatnonzero(invalid)
+        if len(bad_rows):
+            parts = {i: [] for i in bad_rows}
+            for rule, key, mask, message in checks:
+                values = values_of[key]
+                for i in np.flatnonzero(mask):
+                    parts[i].append(message(values[i]))
+                    records.append((int(i), key, rule, values[i]))
+            for i, messages in parts.items():
+                error_msg[i] = ' | '.join(messages)
+
+        errors = pd.DataFrame(records, columns=['row', 'key', 'rule', 'value'])
+        return ValidationResult(~invalid, error_msg, errors)
+
+    def __repr__(self):
+        return f'BatchValidator(required_keys = {self.__required_keys}, number_keys = {self.__number_keys}, ranges = {self.__ranges})'
@@ -0,0 +1,121 @@
+# VIEWPORT
+# 지도에 보이는 범위(viewport)를 web mercator tile(z/x/y)로 나눠서 다룬다.
+# tile 단위로 조회/캐시하면 지도를 조금 움직였을 때 이미 불러온 tile은 다시 조회하지 않는다.
+import math
+
+TILE_ZOOM_MIN = 7       # 이보다 축소된 지도도 이 zoom의 tile로 조회
+TILE_ZOOM_MAX = 16      # 이보다 확대된 지도도 이 zoom의 tile로 조회
+MAX_TILES = 24          # viewport 하나를 덮는 최대 tile 수 (넘으면 한 단계 큰 tile 사용)
+MAX_LAT = 85.05112878   # web mercator 위도 범위
+PYRAMID_LEVELS = (8, 10, 12, 14)    # 집계 피라미드(parking_lot_pyramid)에 저장된 격자 zoom
+AGGREGATE_MAX_ZOOM = 12             # 지도 zoom이 이 값 이하이면 주차장 대신 집계 격자를 표시
+
+
+def lat_lng_to_tile(lat, lng, z):
+    '''좌표가 들어 있는 tile의 (x, y)'''
+    lat = min(max(lat, -MAX_LAT), MAX_LAT)
+    n = 2 ** z
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(z, x, y):
+    '''tile의 (남, 서, 북, 동) 경계 좌표'''
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def tiles_for_bounds(south, west, north, east, zoom):
+    '''범위를 덮는 tile (z, x, y) 리스트. tile 수가 MAX_TILES를 넘으면 더 큰 tile 사용'''
+    z = min(max(int(zoom), TILE_ZOOM_MIN), TILE_ZOOM_MAX)
+    while True:
+        x0, y0 = lat_lng_to_tile(north, west, z)     # tile y는 북쪽이 작음
+        x1, y1 = lat_lng_to_tile(south, east, z)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= MAX_TILES or z == 0:
+            return [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        z -= 1
+
+
+def pyramid_level(zoom):
+    '''지도 zoom에 맞는 집계 격자 zoom (tile 하나(256px)를 4x4 정도의 격자로 나누는 단계)'''
+    fits = [level for level in PYRAMID_LEVELS if level <= zoom + 2]
+    return fits[-1] if fits else PYRAMID_LEVELS[0]
+
+
+def cell_range(tile, level):
+    '''tile (z, x, y)을 덮는 level 격자의 (x 최소, x 최대, y 최소, y 최대)'''
+    z, x, y = tile
+    shift = level - z
+    if shift < 0:   # tile이 격자보다 작으면 tile을 포함하는 격자 하나
+        return x >> -shift, x >> -shift, y >> -shift, y >> -shift
+    return x << shift, ((x + 1) << shift) - 1, y << shift, ((y + 1) << shift) - 1
+
+
+class Viewport:
+    '''
+    지도에 보이는 범위와 zoom.
+    tiles: 범위를 덮는 tile (불러올 데이터 단위, 같으면 다시 조회할 필요 없음)
+    '''
+    def __init__(self, south: float, west: float, north: float, east: float, zoom: int):
+        self.__south = south
+        self.__west = west
+        self.__north = north
+        self.__east = east
+        self.__zoom = zoom
+        self.__tiles = tuple(tiles_for_bounds(south, west, north, east, zoom))
+
+    @classmethod
+    def from_map_state(cls, state):
+        '''st_folium 반환값(bounds, zoom)으로 생성. 범위를 알 수 없으면 None'''
+        try:
+            bounds = state['bounds']
+            south_west, north_east = bounds['_southWest'], bounds['_northEast']
+            return cls(float(south_west['lat']), float(south_west['lng']),
+                       float(north_east['lat']), float(north_east['lng']), int(state['zoom']))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @property
+    def bounds(self):
+        '''(남, 서, 북, 동)'''
+        return self.__south, self.__west, self.__north, self.__east
+
+    @property
+    def center(self):
+        return (self.__south + self.__north) / 2, (self.__west + self.__east) / 2
+
+    @property
+    def zoom(self):
+        return self.__zoom
+
+    @property
+    def tiles(self):
+        return self.__tiles
+
+    @property
+    def aggregated(self):
+        '''축소된 지도라서 집계 격자로 표시해야 하는지'''
+        return self.__zoom <= AGGREGATE_MAX_ZOOM
+
+    def __repr__(self):
+        return f'Viewport(bounds = {self.bounds}, zoom = {self.__zoom}, tiles = {len(self.__tiles)})'
+
+
+def update_viewport(session_state, map_state, key='viewport'):
+    """
+    st_folium 반환값으로 session_state[key]의 Viewport를 갱신
+    불러올 tile이 바뀌었으면(다시 그려야 하면) True. 같은 tile 안에서 움직였으면 기존 값을 유지하고 False
+    """
+    viewport = Viewport.from_map_state(map_state)
+    if viewport is None:
+        return False
+    current = session_state.get(key)
+    if current is not None and current.tiles == viewport.tiles and current.zoom == viewport.zoom:
+        return False
+    session_state[key] = viewport
+    return True
@@ -0,0 +1,66 @@
+# SPATIAL INDEX BENCHMARK
+# SphereKDTree와 전체 점 haversine 계산(brute force)의 빌드/반경/최근접 검색 시간 비교.
+# 프로젝트 루트에서 python tests/bench_spatial_index.py [--sizes 100000 1000000] 로 실행한다.
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.spatial_index import SphereKDTree, haversine, radius_to_chord, to_unit_xyz   # noqa: E402
+
+
+def korea_points(n, seed=0):
+    '''남한 범위에 고르게 흩어진 점'''
+    rng = np.random.default_rng(seed)
+    return 33 + rng.random(n) * 5, 126 + rng.random(n) * 4
+
+
+def per_query_ms(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench(n, radius, k, repeat):
+    lat, lng = korea_points(n)
+    queries = list(zip(*korea_points(repeat, seed=1)))
+
+    start = time.perf_counter()
+    tree = SphereKDTree(to_unit_xyz(lat, lng))
+    build = time.perf_counter() - start
+    chord = radius_to_chord(radius)
+
+    def tree_radius(qlat, qlng):
+        return tree.query_radius(to_unit_xyz([qlat], [qlng])[0], chord)
+
+    def brute_radius(qlat, qlng):
+        return np.flatnonzero(haversine(qlat, qlng, lat, lng) <= radius)
+
+    def tree_knn(qlat, qlng):
+        return tree.query_knn(to_unit_xyz([qlat], [qlng])[0], k)
+
+    def brute_knn(qlat, qlng):
+        dist = haversine(qlat, qlng, lat, lng)
+        idx = np.argpartition(dist, k)[:k]
+        return idx[np.argsort(dist[idx])]
+
+    hits = np.mean([len(brute_radius(*q)) for q in queries[:20]])
+    print(f"n = {n:,}: build {build:.2f}s, 반경 {radius}m 평균 {hits:.0f}건")
+    print(f"  radius  tree {per_query_ms(tree_radius, queries):8.3f} ms   brute {per_query_ms(brute_radius, queries):8.3f} ms")
+    print(f"  knn({k})  tree {per_query_ms(tree_knn, queries):8.3f} ms   brute {per_query_ms(brute_knn, queries):8.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SphereKDTree 검색 시간 비교')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000], help='점 개수')
+    parser.add_argument('--radius', type=float, default=2000, help='반경 검색 거리(m)')
+    parser.add_argument('--k', type=int, default=10, help='최근접 검색 개수')
+    parser.add_argument('--repeat', type=int, default=200, help='질의 수')
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.radius, args.k, args.repeat)
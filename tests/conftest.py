@@ -0,0 +1,9 @@
+# TEST 설정
+# 앱 코드는 `src.` 경로로, 적재 스크립트(collect_data)는 src 폴더 안에서 실행하는 경로로 import 하므로 둘 다 추가
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / 'src'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+
+from src.cache import LRUCache, SingleFlight, CachedLoader
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1      # a를 최근 사용으로
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'expirations': 0}
+
+
+def test_lru_ttl_and_age():
+    timer = FakeTimer()
+    cache = LRUCache(maxsize=4, ttl=10, timer=timer)
+    cache.put('a', 'value')
+    timer.now = 4
+    assert cache.get_entry('a') == ('value', 4)
+    timer.now = 10.5
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0 and cache.stats()['expirations'] == 1
+
+    cache.put('b', None)    # None도 값으로 저장 (get_entry로 구분)
+    assert cache.get_entry('b') == (None, 0)
+    assert cache.pop('b', 'gone') is None and cache.pop('b', 'gone') == 'gone'
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', slow))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()['shared'] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['result'] * 6
+    assert flight.stats() == {'executed': 1, 'shared': 5, 'in_flight': 0}
+
+
+def test_single_flight_shares_error_and_then_retries():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: (_ for _ in ()).throw(ValueError('fail')))
+    assert flight.do('k', lambda: 1) == 1     # 실패한 호출은 남지 않음
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_cached_loader_calls_upstream_once():
+    loader = CachedLoader(maxsize=8, ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.01)
+        return 'value'
+
+    threads = [threading.Thread(target=loader.get, args=('k', load)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.get('k', load) == 'value'
+
+    stats = loader.stats()
+    assert loads == [1]
+    assert stats['served'] == 9 and stats['upstream_calls'] == 1 and stats['saved'] == 8
+
+
+def test_near_cache_snaps_destination_and_reranks(monkeypatch):
+    import numpy as np
+    import src.db_crud as db_crud
+    from src.model import Destination, ParkingLotBatch
+    from src.spatial_index import haversine
+
+    rng = np.random.default_rng(0)
+    lat, lng = 37.49 + rng.random(3000) * 0.02, 126.99 + rng.random(3000) * 0.02
+    rows = [(i, f'P{i}', f'주차장{i}', lat[i], lng[i], '서울특별시', '강남구', '주소', 1) for i in range(len(lat))]
+    queries = []
+
+    def query_near_parking(sql, params):
+        '''SQL 대신 전체 주차장에서 (중심, 반경) 안의 주차장을 찾음'''
+        center_lng, center_lat, radius = params[0], params[1], params[-1]
+        queries.append((center_lat, center_lng, radius))
+        dist = haversine(center_lat, center_lng, lat, lng)
+        return ParkingLotBatch.from_rows([(*rows[i], dist[i]) for i in np.flatnonzero(dist <= radius)])
+
+    monkeypatch.setattr(db_crud, '_query_near_parking', query_near_parking)
+    cache = LRUCache(maxsize=8)
+    monkeypatch.setattr(db_crud, 'get_near_cache', lambda: cache)
+    monkeypatch.setattr(db_crud, 'get_data_version', lambda: 1)
+    monkeypatch.setattr(db_crud, 'config_spatial_index', False)
+    monkeypatch.setattr(db_crud, 'config_near_planner', 'geohash')
+    monkeypatch.setattr(db_crud, 'config_near_cache_grid', 0.001)
+
+    # 같은 격자 안의 서로 다른 목적지 두 개: DB 조회는 한 번, 결과는 각 목적지 기준으로 정확해야 함
+    for dest_lat, dest_lng in [(37.5001, 127.0001), (37.5004, 126.9996)]:
+        lots = db_crud.get_near_parking_data(Destination('dest', None, dest_lat, dest_lng), radius=500)
+        dist = haversine(dest_lat, dest_lng, lat, lng)
+        expected = np.flatnonzero(dist <= 500)
+        assert [lot.id for lot in lots] == expected[np.argsort(dist[expected], kind='stable')].tolist()
+        np.testing.assert_allclose([lot.distance for lot in lots], np.sort(dist[expected]))
+    assert len(queries) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_region_catalog_failure_is_not_cached(monkeypatch):
+    import src.db_crud as db_crud
+
+    responses = [None, [{'sido': '서울특별시', 'sigungu': '강남구', 'lot_count': 3, 'space_total': 30,
+                         'min_lat': 37.4, 'min_lng': 127.0, 'max_lat': 37.5, 'max_lng': 127.1}]]
+    monkeypatch.setattr(db_crud, 'run_query', lambda query, params=None: responses.pop(0))
+    monkeypatch.setattr(db_crud, 'get_data_version', lambda: 'test_region_catalog')
+    db_crud.get_region_catalog.clear()
+
+    assert db_crud.get_sido_sigungu() == {}      # 조회 실패
+    assert db_crud.get_sido_sigungu() == {'서울특별시': ['강남구']}
+    assert db_crud.get_region_bounds('서울특별시', '강남구') == [[37.4, 127.0], [37.5, 127.1]]
+    assert responses == []
+    db_crud.get_region_catalog.clear()
@@ -0,0 +1,221 @@
+import threading
+
+import mysql.connector
+import pytest
+
+import collect_data
+import db_crud
+from collect_data import Ingest, DeltaSync, SyncError, WRITE_SQL
+from db_pool import ConnectionPool
+
+
+class FakeDatabase:
+    '''parking_lot(reg_id unique)과 parking_lot_raw만 흉내내는 DB'''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.parking_lot = {}
+        self.raw = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def executemany(self, query, rows):
+        with self.lock:
+            if 'INSERT INTO parking_lot_raw' in query:
+                self.raw.extend(rows)
+                return len(rows)
+            if 'INSERT INTO parking_lot ' in query:
+                count = 0
+                for row in rows:
+                    if row[0] in self.parking_lot:
+                        if 'ON DUPLICATE KEY UPDATE' not in query:
+                            raise mysql.connector.IntegrityError(
+                                msg=f"Duplicate entry '{row[0]}' for key 'uq_parking_lot_reg_id'", errno=1062)
+                        count += 2
+                    else:
+                        count += 1
+                    self.parking_lot[row[0]] = row
+                return count
+        raise AssertionError(f'예상하지 못한 query: {query}')
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+
+    def executemany(self, query, rows):
+        self.rowcount = self.db.executemany(query, list(rows))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def api_items():
+    '''1페이지 응답: 같은 주차장(P1)이 두 번 포함되고, 좌표가 없는 오류 데이터 1건'''
+    return [
+        {'prk_center_id': 'P1', 'prk_plce_nm': '주차장1', 'prk_plce_entrc_la': '37.5', 'prk_plce_entrc_lo': '127.0',
+         'prk_plce_adres_sido': '서울특별시', 'prk_plce_adres_sigungu': '강남구', 'prk_plce_adres': '주소1', 'prk_cmprt_co': '10'},
+        {'prk_center_id': 'P2', 'prk_plce_nm': '주차장2', 'prk_plce_entrc_la': '37.6', 'prk_plce_entrc_lo': '127.1',
+         'prk_plce_adres_sido': '서울특별시', 'prk_plce_adres_sigungu': '서초구', 'prk_plce_adres': '주소2', 'prk_cmprt_co': '20'},
+        {'prk_center_id': 'P1', 'prk_plce_nm': '주차장1(변경)', 'prk_plce_entrc_la': '37.5', 'prk_plce_entrc_lo': '127.0',
+         'prk_plce_adres_sido': '서울특별시', 'prk_plce_adres_sigungu': '강남구', 'prk_plce_adres': '주소1', 'prk_cmprt_co': '12'},
+        {'prk_center_id': 'P3', 'prk_plce_nm': '주차장3', 'prk_plce_entrc_la': None, 'prk_plce_entrc_lo': None,
+         'prk_plce_adres_sido': '서울특별시', 'prk_plce_adres_sigungu': '종로구', 'prk_plce_adres': '주소3', 'prk_cmprt_co': '5'},
+    ]
+
+
+@pytest.fixture
+def published(monkeypatch):
+    '''API, region_catalog/집계 피라미드 갱신을 대신하고, publish_changes 호출 횟수를 기록'''
+    calls = []
+    monkeypatch.setattr(collect_data, 'fetch_page', lambda page_no, api_key=None: (api_items(), 4) if page_no == 1 else ([], 4))
+    monkeypatch.setattr(collect_data, 'refresh_region_catalog', lambda regions: len(regions))
+    monkeypatch.setattr(collect_data, 'publish_changes', lambda: calls.append(True))
+    monkeypatch.setattr(collect_data.time, 'sleep', lambda seconds: None)
+    return calls
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    pool = ConnectionPool({}, size=2, connect=db.connect)
+    monkeypatch.setattr(db_crud, 'get_pool', lambda: pool)
+    return db
+
+
+def test_full_ingest_twice_upserts(fake_db, published):
+    for _ in range(2):
+        ingest = Ingest()
+        assert ingest.run() is True
+        assert ingest.saved == 4
+
+    assert sorted(fake_db.parking_lot) == ['P1', 'P2']
+    assert fake_db.parking_lot['P1'][1] == '주차장1(변경)'     # 같은 run에서 나중에 온 값
+    assert len(fake_db.raw) == 8
+    assert len(published) == 2
+
+
+def test_bad_coordinate_marks_only_that_row(fake_db, published, monkeypatch):
+    def fetch_page(page_no, api_key=None):
+        items = api_items()
+        items[1]['prk_plce_entrc_la'] = '375.0'     # 위도 범위 밖
+        items[3]['prk_plce_entrc_la'], items[3]['prk_plce_entrc_lo'] = '37.7', '동경127'
+        return (items, 4) if page_no == 1 else ([], 4)
+
+    monkeypatch.setattr(collect_data, 'fetch_page', fetch_page)
+    assert Ingest().run() is True
+    assert sorted(fake_db.parking_lot) == ['P1']
+    errors = {row[0]: row[-1] for row in fake_db.raw if row[-2] == 'Y'}
+    assert errors == {'P2': 'Out of range: prk_plce_entrc_la(375.0)',
+                      'P3': 'Invalid number format: prk_plce_entrc_lo(동경127)'}
+
+
+def test_bulk_load_move_sql_upserts():
+    for kind in ('normal', 'upsert'):
+        query, _, move_sql = WRITE_SQL[kind]
+        assert 'ON DUPLICATE KEY UPDATE' in query
+        assert 'ON DUPLICATE KEY UPDATE' in move_sql
+
+
+def test_raw_failure_still_publishes_normal_rows(monkeypatch, published):
+    written = []
+
+    def write_rows(kind, rows):
+        if kind == 'raw':
+            return None
+        written.extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr(collect_data, 'write_rows', write_rows)
+    ingest = Ingest()
+    assert ingest.run() is False    # raw 저장 실패는 dead letter
+    assert ingest.saved == len(written) == 3
+    assert published == [True]
+
+
+def delta_item(id, error_yn):
+    return {'prk_center_id': id, 'prk_plce_nm': id, 'prk_plce_adres_sido': '서울특별시',
+            'prk_plce_adres_sigungu': '강남구', 'error_yn': error_yn, 'error_msg': None}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(collect_data.time, 'sleep', lambda seconds: None)
+
+
+def test_delta_write_fails_when_retire_update_fails(monkeypatch, no_sleep):
+    monkeypatch.setattr(collect_data, 'write_rows', lambda kind, rows: len(rows))
+    monkeypatch.setattr(collect_data, 'run_bulk_insert_query', lambda query, rows: len(rows))
+
+    def run_query(query, params=None, is_select=True):
+        if query.startswith('SELECT'):
+            return []
+        return None     # 오류 데이터로 바뀐 주차장 사용 중지 실패
+
+    monkeypatch.setattr(collect_data, 'run_query', run_query)
+    sync = DeltaSync()
+    assert sync.write([delta_item('A', 'N'), delta_item('B', 'Y')]) == (None, None)
+    assert sync.counts['error'] == 0
+
+
+def test_retire_missing_raises_on_partial_failure(monkeypatch, no_sleep):
+    monkeypatch.setattr(collect_data, 'write_rows', lambda kind, rows: len(rows))
+    monkeypatch.setattr(collect_data, 'run_bulk_insert_query', lambda query, rows: len(rows))
+    calls = []
+
+    def run_query(query, params=None, is_select=True):
+        if 'use_yn = \'Y\'' in query:
+            return [{'reg_id': id, 'sido': '서울특별시', 'sigungu': '강남구'} for id in ('A', 'GONE')]
+        if query.startswith('SELECT'):
+            return []
+        calls.append(query.split()[0])
+        return None if query.startswith('UPDATE') else 1
+
+    monkeypatch.setattr(collect_data, 'run_query', run_query)
+    sync = DeltaSync()
+    assert sync.write([delta_item('A', 'N')]) == (1, 1)
+    with pytest.raises(SyncError):
+        sync.retire_missing()
+    assert calls == ['DELETE', 'UPDATE']
+    assert sync.counts['retired'] == 0
+
+
+def test_delta_write_retries_only_the_failed_step(monkeypatch, no_sleep):
+    written = {'raw': 0, 'upsert': 0}
+    failures = {'upsert': 1}    # upsert만 처음 한 번 실패
+
+    def write_rows(kind, rows):
+        written[kind] += 1
+        if failures.get(kind):
+            failures[kind] -= 1
+            return None
+        return len(rows)
+
+    monkeypatch.setattr(collect_data, 'write_rows', write_rows)
+    monkeypatch.setattr(collect_data, 'run_bulk_insert_query', lambda query, rows: len(rows))
+    monkeypatch.setattr(collect_data, 'run_query', lambda query, params=None, is_select=True: [] if is_select else 1)
+    sync = DeltaSync()
+    assert sync.write([delta_item('A', 'N'), delta_item('B', 'N')]) == (2, 2)
+    assert written == {'raw': 1, 'upsert': 2}      # parking_lot_raw는 한 번만 저장
+    assert sync.counts['inserted'] == 2
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+import src.db_crud as db_crud
+from src.db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeServer:
+    '''mysql.connector.connect 대신 사용. 동시에 query를 실행 중인 connection 수를 기록'''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.active = 0
+        self.max_active = 0
+
+    def connect(self, **config):
+        with self.lock:
+            self.opened += 1
+        return FakeConnection(self)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 1
+        self.rows = []
+
+    def execute(self, query, params=()):
+        server = self.conn.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(0.002)
+            if query == 'FAIL':
+                raise mysql.connector.ProgrammingError(msg='syntax error')
+            if query == 'LOST':
+                raise mysql.connector.errors.OperationalError(msg='server has gone away')
+            if query == 'BUG':
+                raise RuntimeError('unexpected')
+            self.rows = [{'value': params[0] if params else None}]
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def fetchall(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def consume_results(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(mysql.connector, 'connect', server.connect)
+    pool = ConnectionPool({'host': 'fake'}, size=4, timeout=5)
+    monkeypatch.setattr(db_crud, 'get_pool', lambda: pool)
+    pool.server = server
+    return pool
+
+
+def run_threads(n, target):
+    errors = []
+
+    def wrapper(i):
+        try:
+            target(i)
+        except Exception as e:     # assert 실패를 main thread로 전달
+            errors.append(e)
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_run_query_threads_share_pool(pool):
+    def work(i):
+        for j in range(10):
+            assert db_crud.run_query('SELECT %s', (i * 100 + j,)) == [{'value': i * 100 + j}]
+
+    run_threads(32, work)
+    stats = pool.stats()
+    assert pool.server.max_active <= pool.size
+    assert pool.server.opened <= pool.size
+    assert stats['in_use'] == 0 and stats['checkouts'] == 320
+    assert stats['created'] == stats['idle'] <= pool.size
+
+
+def test_connections_returned_on_error(pool):
+    def work(i):
+        query = ['SELECT %s', 'FAIL', 'LOST', 'BUG'][i % 4]
+        if query == 'BUG':
+            with pytest.raises(RuntimeError):
+                db_crud.run_query(query, (i,))
+        else:
+            result = db_crud.run_query(query, (i,))
+            assert (result is None) == (query != 'SELECT %s')
+
+    run_threads(40, work)
+    stats = pool.stats()
+    assert pool.server.max_active <= pool.size
+    assert stats['in_use'] == 0 and stats['waiters'] == 0
+    assert stats['created'] == stats['idle'] <= pool.size
+    # 연결이 끊긴 connection(LOST)은 버리고 새로 연결
+    assert pool.server.opened > pool.size
+
+
+def test_timeout_when_pool_exhausted(monkeypatch):
+    server = FakeServer()
+    pool = ConnectionPool({}, size=1, timeout=0.05, connect=server.connect)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_recycled_count_under_concurrency():
+    server = FakeServer()
+    pool = ConnectionPool({}, size=4, timeout=5, recycle=0, connect=server.connect)     # idle connection은 모두 재연결
+
+    def work(i):
+        for _ in range(50):
+            with pool.connection() as conn:
+                assert not conn.closed
+
+    run_threads(16, work)
+    stats = pool.stats()
+    assert stats['checkouts'] == 800
+    # 처음 연결한 connection(created)을 뺀 나머지 연결은 모두 재연결
+    assert stats['recycled'] == server.opened - stats['created'] > 0
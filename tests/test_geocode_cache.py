@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import src.geocode_cache as geocode_cache
+import src.utils as utils
+from src.geocode_cache import GeocodeCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query('  강남역  ') == '강남역'
+    assert normalize_query('Gangnam   STATION') == 'gangnam station'
+    assert normalize_query('ＡＢＣ　역') == 'abc 역'      # 전각 문자, 전각 공백
+
+
+def test_geocode_cache_persists_and_expires(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(geocode_cache.time, 'time', lambda: now[0])
+    path = tmp_path / 'geocode.sqlite3'
+    cache = GeocodeCache(path, ttl=100, negative_ttl=10)
+    assert cache.get('강남역') == (False, None)
+    cache.put('강남역', ('서울 강남구', 37.49, 127.02))
+    cache.put('없는곳', None)
+
+    reopened = GeocodeCache(path, ttl=100, negative_ttl=10)     # 재시작 후에도 사용
+    assert reopened.get('강남역') == (True, ('서울 강남구', 37.49, 127.02))
+    assert reopened.get('없는곳') == (True, None)
+
+    now[0] += 50    # 찾지 못한 결과만 만료
+    assert reopened.get('없는곳') == (False, None)
+    assert reopened.get('강남역')[0] is True
+    assert reopened.stats() == {'size': 2, 'hits': 3, 'misses': 1}
+
+
+def test_find_address_and_point_uses_cache(tmp_path, monkeypatch):
+    calls = []
+
+    class Geolocator:
+        def geocode(self, name, exactly_one=True):
+            calls.append(name)
+            if name.strip() == '강남역':
+                return SimpleNamespace(address='서울 강남구', latitude=37.49, longitude=127.02)
+            return None
+
+    limiter = SimpleNamespace(acquire=lambda: calls.append('acquire'))
+    cache = GeocodeCache(tmp_path / 'geocode.sqlite3')
+    monkeypatch.setattr(utils, 'get_geolocator', lambda: Geolocator())
+    monkeypatch.setattr(utils, 'get_geocode_limiter', lambda: limiter)
+    monkeypatch.setattr(utils, 'get_geocode_cache', lambda: cache)
+
+    first = utils.find_address_and_point('강남역')
+    again = utils.find_address_and_point('  강남역 ')     # 정규화된 검색어가 같으면 캐시 사용
+    assert (first.lat, first.lng, first.address) == (again.lat, again.lng, again.address) == (37.49, 127.02, '서울 강남구')
+    assert utils.find_address_and_point('없는곳') is None
+    assert utils.find_address_and_point('없는곳') is None
+    assert calls == ['acquire', '강남역', 'acquire', '없는곳']
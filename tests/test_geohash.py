@@ -0,0 +1,69 @@
+import math
+import random
+
+import numpy as np
+
+from src.geohash import encode, encode_many, bbox, cover_ranges, MAX_RANGES, STORE_PRECISION
+from src.spatial_index import haversine
+
+
+def test_encode_known_value():
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert encode(37.5665, 126.9780, 5) == 'wydm9'
+
+
+def test_encode_many_matches_encode():
+    rng = random.Random(0)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(2000)]
+    points += [(90.0, 180.0), (-90.0, -180.0), (0.0, 0.0), (37.5, 127.0)]
+    # cell 경계 위의 점
+    south, west, north, east = bbox('wydm9q')
+    points += [(south, west), (north, east)]
+    lat, lng = zip(*points)
+    for precision in (1, 5, STORE_PRECISION):
+        assert encode_many(lat, lng, precision) == [encode(a, b, precision) for a, b in points]
+
+
+def test_bbox_contains_point():
+    code = encode(37.5665, 126.9780)
+    south, west, north, east = bbox(code)
+    assert south <= 37.5665 < north
+    assert west <= 126.9780 < east
+
+
+def in_ranges(codes, ranges):
+    starts, ends = (np.array(values) for values in zip(*ranges))
+    codes = np.array(codes)
+    return ((codes[:, None] >= starts) & (codes[:, None] <= ends)).any(axis=1)
+
+
+def test_cover_ranges_contain_every_point_in_radius():
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        lat0, lng0 = 33 + rng.random() * 5, 126 + rng.random() * 3
+        radius = float(rng.choice([300, 2000, 10000]))
+        ranges = cover_ranges(lat0, lng0, radius)
+        assert 0 < len(ranges) <= MAX_RANGES
+        assert all(len(start) == len(end) == STORE_PRECISION and start <= end for start, end in ranges)
+        assert all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))     # 정렬되어 있고 겹치지 않음
+
+        # 반경 근처의 점들 중 반경 안에 있는 점은 모두 어느 범위 안에 있어야 함
+        spread = radius / 111195 * 1.5
+        lat = lat0 + (rng.random(3000) * 2 - 1) * spread
+        lng = lng0 + (rng.random(3000) * 2 - 1) * spread / math.cos(math.radians(lat0))
+        inside = haversine(lat0, lng0, lat, lng) <= radius
+        assert in_ranges(encode_many(lat, lng), ranges)[inside].all()
+
+
+def test_cover_ranges_read_fewer_rows_than_mbr_box():
+    '''2km 검색에서 범위가 읽는 행 수는 ±0.023° 사각형(MBR)보다 적음 (균일한 합성 데이터)'''
+    rng = np.random.default_rng(0)
+    lat = 37.45 + rng.random(100_000) * 0.2
+    lng = 126.85 + rng.random(100_000) * 0.3
+    codes = encode_many(lat, lng)
+    for lat0, lng0 in [(37.55, 127.0), (37.52, 126.95), (37.6, 127.05)]:
+        read = in_ranges(codes, cover_ranges(lat0, lng0, 2000))
+        inside = haversine(lat0, lng0, lat, lng) <= 2000
+        box = (abs(lat - lat0) <= 0.023) & (abs(lng - lng0) <= 0.023)
+        assert read[inside].all()
+        assert read.sum() < box.sum()
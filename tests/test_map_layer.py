@@ -0,0 +1,51 @@
+import folium
+import numpy as np
+import pandas as pd
+
+from src.map_layer import PARKING, OIL, to_marker_rows, marker_layer, MarkerRowsCluster
+from src.model import ParkingLot, ParkingLotBatch, GasStation
+
+LOTS = [
+    (1, 'R1', '주차장1', '37.12345678', '127.1', '서울특별시', '강남구', '주소1', 10, 100.0),
+    (2, 'R2', '주차장2', None, '127.2', '서울특별시', '강남구', '주소2', None, 200.0),     # 좌표 없음
+    (3, 'R3', '주차장<3>', '37.3', '127.3', '서울특별시', '서초구', '주소3', None, 300.0),
+]
+EXPECTED = [
+    [37.123457, 127.1, PARKING, 1, '주차장1', '주소1', 10],
+    [37.3, 127.3, PARKING, 3, '주차장<3>', '주소3', None],
+]
+
+
+def test_rows_are_the_same_for_every_result_type():
+    batch = ParkingLotBatch.from_rows(LOTS)
+    frame = pd.DataFrame([(id, name, lat, lng, addr, space_no) for id, _, name, lat, lng, _, _, addr, space_no, _ in LOTS],
+                         columns=['id', 'name', 'lat', 'lng', 'full_address', 'space_no'])
+    frame['lat'] = pd.to_numeric(frame['lat'])
+    lots = [ParkingLot(*lot) for lot in LOTS]
+
+    assert to_marker_rows(batch) == EXPECTED
+    assert to_marker_rows(frame) == EXPECTED
+    assert to_marker_rows(lots) == EXPECTED
+    assert to_marker_rows(list(batch)) == EXPECTED
+
+
+def test_rows_of_several_results_and_gas_stations():
+    stations = [GasStation('G1', '주유소1', 1650, 'SK', '37.5', '127.5', 123.456),
+                GasStation('G2', '주유소2', '가격 없음', 'GS', 'nan', '127.6', None),
+                GasStation('G3', '주유소3', 1700, 'S-OIL', '', '127.7', None)]
+    rows = to_marker_rows(ParkingLotBatch.from_rows(LOTS[:1]), stations)
+    assert rows == [EXPECTED[0], [37.5, 127.5, OIL, 'G1', '주유소1', '1,650', 'SK', 123.46]]
+    assert to_marker_rows(ParkingLotBatch.empty(), []) == []
+
+
+def test_marker_layer_renders_rows_without_revalidating():
+    rows = to_marker_rows([ParkingLot(*lot) for lot in LOTS])
+    layer = marker_layer(rows=rows, origin=('강남역', 37.49, 127.02), name='주차장')
+    assert isinstance(layer, MarkerRowsCluster)
+    assert layer.data is rows
+
+    m = folium.Map(location=[37.5, 127.0])
+    layer.add_to(m)
+    html = m.get_root().render()
+    assert '37.123457' in html and '127.3' in html
+    assert 'var callback' in html and '강남역' in html
@@ -0,0 +1,97 @@
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import src.map_view as map_view
+from src.cache import LRUCache
+from src.model import Destination, GasStation, ParkingLotBatch
+
+PAGES = Path(__file__).resolve().parent.parent / 'pages'
+
+
+def results():
+    rng = random.Random(1)
+    stations = [GasStation(f'g{i}', f'주유소 {i}', 1600 + i, 'SK', 37.4 + rng.random() * 0.2,
+                           126.9 + rng.random() * 0.2, float(i)) for i in range(60)]
+    lots = ParkingLotBatch.from_rows([
+        (i, str(i), f'공영주차장 {i}', 37.4 + rng.random() * 0.2, 126.9 + rng.random() * 0.2, '서울특별시', '강남구',
+         f'서울특별시 강남구 테헤란로 {i}길', rng.randint(1, 300), float(i)) for i in range(60)])
+    return stations, lots
+
+
+@pytest.fixture
+def map_builds(monkeypatch):
+    '''검색 결과 지도를 새로 만든 횟수 (캐시는 테스트마다 비움)'''
+    calls = []
+    build = map_view.build_result_map
+
+    def counting_build(*args, **kwargs):
+        calls.append(args)
+        return build(*args, **kwargs)
+
+    cache = LRUCache(maxsize=8)
+    monkeypatch.setattr(map_view, 'build_result_map', counting_build)
+    monkeypatch.setattr(map_view, 'get_map_cache', lambda: cache)
+    return calls
+
+
+def page_state(page):
+    stations, lots = results()
+    destination = Destination('강남역', '서울', 37.5, 127.0)
+    return {
+        '02_nearby_parkinglots.py': {'search_results': lots, 'destination': destination},
+        '04_search_gas_station.py': {'oil_results': stations, 'destination': destination},
+        '05_search_parking_gas.py': {'oil_results': stations, 'parking_results': list(lots), 'destination': destination},
+    }[page]
+
+
+@pytest.mark.parametrize('page', ['02_nearby_parkinglots.py', '04_search_gas_station.py', '05_search_parking_gas.py'])
+def test_page_buttons_do_not_rebuild_map(page, map_builds):
+    at = AppTest.from_file(str(PAGES / page), default_timeout=60)
+    for key, value in page_state(page).items():
+        at.session_state[key] = value
+    at.run()
+    assert not at.exception, '\n'.join(at.exception[0].stack_trace)
+    assert len(map_builds) == 1
+
+    for label in ['2', '3', '1']:
+        [button] = [b for b in at.button if b.label == label]
+        button.click().run()
+        assert not at.exception
+        assert at.session_state['current_page'] == int(label)
+    assert len(map_builds) == 1
+
+    # 목적지가 바뀌면 지도를 다시 만듦
+    at.session_state['destination'] = Destination('역삼역', '서울', 37.5006, 127.0364)
+    at.run()
+    assert len(map_builds) == 2
+
+
+def test_region_map_shows_every_lot_in_region(monkeypatch):
+    '''지역 검색 지도는 목록의 현재 페이지(4건)가 아니라 지역의 주차장 전체를 표시'''
+    import streamlit_folium
+    import src.db_crud as db_crud
+    from folium.plugins import FastMarkerCluster
+    from src.model import RegionPage
+
+    _, lots = results()
+    maps = []
+    monkeypatch.setattr(streamlit_folium, 'st_folium', lambda m, **kwargs: maps.append(m))
+    monkeypatch.setattr(db_crud, 'get_region_parking', lambda sido, sigungu: lots)
+    monkeypatch.setattr(db_crud, 'get_region_bounds', lambda sido, sigungu: [[37.4, 126.9], [37.6, 127.1]])
+    monkeypatch.setattr(db_crud, 'get_region_parking_page', lambda sido, sigungu, cursor=None, descending=False: RegionPage(
+        pd.DataFrame([{'id': i, 'name': f'공영주차장 {i}', 'lat': 37.5, 'lng': 127.0, 'sido': '서울특별시',
+                       'sigungu': '강남구', 'full_address': '주소', 'space_no': 10} for i in range(4)]),
+        len(lots), cursor, ('공영주차장 3', 3), True))
+
+    at = AppTest.from_file(str(PAGES / '03_prototype_category_app.py'), default_timeout=60)
+    at.session_state['region_data'] = {'서울특별시': ['강남구']}
+    at.session_state['search_region'] = ('서울특별시', '강남구')
+    at.run()
+    assert not at.exception, '\n'.join(at.exception[0].stack_trace)
+
+    [layer] = [child for child in maps[-1]._children.values() if isinstance(child, FastMarkerCluster)]
+    assert len(layer.data) == len(lots) == 60
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from src.pipeline import Pipeline, Stage
+
+
+class SlowSink:
+    '''한 건 저장에 delay초가 걸리는 writer'''
+    def __init__(self, delay=0.005, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.written = []
+        self.lock = threading.Lock()
+
+    def __call__(self, item):
+        time.sleep(self.delay)
+        if item == self.fail_on:
+            raise ValueError(f'저장 실패: {item}')
+        with self.lock:
+            self.written.append(item)
+        return item
+
+
+def test_slow_writer_backpressure_keeps_order():
+    sink = SlowSink()
+    ahead = []
+
+    def source():
+        for i in range(100):
+            ahead.append(i - len(sink.written))     # 아직 저장되지 않았는데 읽어 온 건수
+            yield i
+
+    pipeline = Pipeline([Stage('transform', lambda x: x, queue_size=1), Stage('write', sink, queue_size=1)])
+    stats = pipeline.run(source())
+
+    assert sink.written == list(range(100))
+    # source 대기 1 + transform queue/실행 2 + write queue/실행 2를 넘게 앞서 읽지 않음
+    assert max(ahead) <= 5
+    assert stats['transform']['blocked'] > 0.1      # writer를 기다린 시간
+    assert stats['transform']['max_queue'] <= 1 and stats['write']['max_queue'] <= 1
+    assert stats['write']['records'] == 100
+
+
+def test_writer_exception_reaches_caller():
+    sink = SlowSink(delay=0.001, fail_on=7)
+    reported = []
+    pipeline = Pipeline([Stage('write', sink, workers=2)], on_error=lambda *args: reported.append(args))
+    stats = pipeline.run(range(20))
+
+    assert len(reported) == 1
+    stage, item, error = reported[0]
+    assert (stage, item) == ('write', 7)
+    assert isinstance(error, ValueError)
+    assert sorted(sink.written) == [i for i in range(20) if i != 7]
+    assert stats['write']['errors'] == 1
+
+
+def test_batches_and_stop():
+    batches = []
+    pipeline = Pipeline([Stage('batch', lambda items: batches.append(list(items)), batch_size=4)])
+
+    def source():
+        for i in range(10):
+            if i == 3:
+                pipeline.stop()
+            yield [i * 10, i * 10 + 1]
+
+    pipeline.run(source())
+    assert pipeline.stopped
+    assert batches == [[0, 1, 10, 11], [20, 21]]     # 남은 입력은 batch_size보다 작아도 처리
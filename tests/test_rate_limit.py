@@ -0,0 +1,57 @@
+import threading
+
+from src.rate_limit import TokenBucket
+
+
+class FakeClock:
+    '''timer/sleep을 대신해 실제로 기다리지 않고 시간만 진행'''
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+        self.sleeps = []
+
+    def timer(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+
+
+def test_token_bucket_spaces_calls():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=1, timer=clock.timer, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    # 시간이 흐르지 않았으면 도착 순서대로 0.5초씩 더 기다림
+    assert [bucket.acquire() for _ in range(3)] == [0.5, 1.0, 1.5]
+    assert clock.sleeps == [0.5, 1.0, 1.5]
+    assert bucket.stats() == {'rate': 2, 'acquired': 4, 'waited': 3, 'wait_total': 3.0}
+
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=3, timer=clock.timer, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == 1.0
+    clock.now = 100.0       # 오래 쉬어도 capacity 이상 쌓이지 않음
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_token_bucket_threads_get_distinct_slots():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=1, timer=clock.timer, sleep=clock.sleep)
+    waits = []
+    lock = threading.Lock()
+
+    def call():
+        wait = bucket.acquire()
+        with lock:
+            waits.append(round(wait, 6))
+
+    threads = [threading.Thread(target=call) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 동시에 들어와도 0.1초 간격의 서로 다른 차례를 받음
+    assert sorted(waits) == [round(i * 0.1, 6) for i in range(20)]
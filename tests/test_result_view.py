@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from src.model import GasStation, ParkingLotBatch
+from src.result_view import ResultView, MergedResults, get_result_view
+
+ORDERS = {'이름순▼': ('name', True), '이름순▲': ('name', False), '면수순▼': ('space_no', True)}
+
+
+def key_of(item):
+    return (type(item).__name__, getattr(item, 'id', None) or item.reg_id)
+
+
+@pytest.fixture
+def lots():
+    '''거리순 주차장 (이름/거리가 같은 항목이 섞여 있음)'''
+    rng = random.Random(3)
+    rows = [(i, str(i), f'주차장 {rng.randint(0, 30)}', 37.5, 127.0, '서울특별시', '강남구', f'주소 {i}',
+             rng.randint(1, 50), float(rng.randint(0, 300))) for i in range(1, 203)]
+    return ParkingLotBatch.from_rows(sorted(rows, key=lambda row: row[-1]))
+
+
+@pytest.fixture
+def stations():
+    rng = random.Random(4)
+    items = [GasStation(f'G{i}', f'주유소 {i}', rng.randint(1500, 1800), 'SK', '37.5', '127.0', float(rng.randint(0, 300)))
+             for i in range(101)]
+    return sorted(items, key=lambda item: item.distance)
+
+
+@pytest.mark.parametrize('order', list(ORDERS))
+def test_pages_follow_sorted(lots, order):
+    field, descending = ORDERS[order]
+    expected = [lot.id for lot in sorted(lots, key=lambda lot: getattr(lot, field), reverse=descending)]
+    view = ResultView(lots, ORDERS)
+    for size in (4, 7):
+        pages = [view.page(page_no, size, order=order) for page_no in range(1, view.total_pages(size) + 1)]
+        assert all(0 < len(page) <= size for page in pages)
+        assert [lot.id for page in pages for lot in page] == expected
+    assert view.page(view.total_pages(4) + 1, 4, order=order) == []
+
+
+def test_page_without_order_keeps_result_order(lots):
+    view = ResultView(lots, ORDERS)
+    assert [lot.id for lot in view.page(3, 4)] == [lot.id for lot in lots[8:12]]
+    assert [lot.id for lot in view.page(3, 4, order='가까운순 ▼')] == [lot.id for lot in lots[8:12]]
+    assert view.total_pages(4) == 51 and len(view) == 202
+
+
+def test_merged_results_match_sorted(lots, stations):
+    expected = [key_of(item) for item in sorted(list(lots) + stations, key=lambda item: item.distance)]
+    merged = MergedResults(lots, stations)
+    assert len(merged) == len(expected)
+    assert key_of(merged[10]) == expected[10]
+    assert key_of(merged[-1]) == expected[-1]
+    assert [key_of(item) for item in merged[40:44]] == expected[40:44]
+    assert [key_of(item) for item in merged[5:2]] == []
+    assert [key_of(item) for item in merged[::-50]] == expected[::-50]
+    assert [key_of(item) for item in merged] == expected
+    with pytest.raises(IndexError):
+        merged[len(expected)]
+
+
+def test_station_orders_keep_ties_in_result_order(stations):
+    orders = {'가격낮은순▼': ('price', False), '이름순▼': ('station_name', True)}
+    view = ResultView(stations, orders)
+    for order, (field, descending) in orders.items():
+        expected = [item.reg_id for item in sorted(stations, key=lambda item: getattr(item, field), reverse=descending)]
+        assert [item.reg_id for page_no in range(1, view.total_pages(10) + 1)
+                for item in view.page(page_no, 10, order=order)] == expected
+
+
+def test_get_result_view_reuses_view_for_same_results(lots, stations):
+    state = {}
+    view = get_result_view(state, 'view', lots, stations, orders=ORDERS)
+    assert get_result_view(state, 'view', lots, stations, orders=ORDERS) is view
+    assert isinstance(view.items, MergedResults)
+    assert get_result_view(state, 'view', lots, list(stations), orders=ORDERS) is not view
+    assert get_result_view(state, 'view', lots, orders=ORDERS).items is lots
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from src.model import ParkingLotBatch
+from src.spatial_index import SphereKDTree, ParkingLotIndex, IndexHolder, haversine, radius_to_chord, to_unit_xyz
+
+
+def random_points(n, seed=0):
+    '''대부분은 한국 주변, 일부는 전 세계(극지방, 날짜변경선 포함)에 흩어진 점'''
+    rng = np.random.default_rng(seed)
+    lat = 33 + rng.random(n) * 5
+    lng = 126 + rng.random(n) * 4
+    spread = n // 10
+    lat[:spread] = np.degrees(np.arcsin(rng.random(spread) * 2 - 1))
+    lng[:spread] = rng.random(spread) * 360 - 180
+    lat[0], lng[0] = 90.0, 0.0
+    lat[1], lng[1] = 10.0, 180.0
+    lat[2], lng[2] = 10.0, -179.9999
+    return lat, lng
+
+
+def queries(seed=1):
+    rng = np.random.default_rng(seed)
+    qs = [(33 + rng.random() * 5, 126 + rng.random() * 4) for _ in range(30)]
+    return qs + [(89.99, 45.0), (10.0, 179.99), (-45.0, -120.0)]
+
+
+@pytest.fixture(scope='module')
+def points():
+    lat, lng = random_points(20000)
+    return lat, lng, SphereKDTree(to_unit_xyz(lat, lng))
+
+
+@pytest.mark.parametrize('radius', [50, 500, 2000, 20000, 3_000_000])
+def test_query_radius_matches_brute_force(points, radius):
+    lat, lng, tree = points
+    for qlat, qlng in queries():
+        found = tree.query_radius(to_unit_xyz([qlat], [qlng])[0], radius_to_chord(radius))
+        dist = haversine(qlat, qlng, lat, lng)
+        expected = np.flatnonzero(dist <= radius)
+        # chord와 haversine의 반올림 차이로 경계에 걸친 점(1e-6 m 이내)만 다를 수 있음
+        diff = np.setxor1d(found, expected)
+        assert np.all(np.abs(dist[diff] - radius) < 1e-6)
+
+
+@pytest.mark.parametrize('k', [1, 5, 50, 500])
+def test_query_knn_matches_brute_force(points, k):
+    lat, lng, tree = points
+    for qlat, qlng in queries():
+        found = tree.query_knn(to_unit_xyz([qlat], [qlng])[0], k)
+        dist = haversine(qlat, qlng, lat, lng)
+        assert len(found) == k
+        assert np.all(np.diff(dist[found]) >= -1e-6)       # 가까운 순
+        np.testing.assert_allclose(dist[found], np.sort(dist)[:k], atol=1e-6)
+
+
+def test_small_and_empty_trees():
+    empty = SphereKDTree(np.empty((0, 3)))
+    q = to_unit_xyz([37.5], [127.0])[0]
+    assert len(empty.query_radius(q, 1.0)) == 0
+    assert len(empty.query_knn(q, 3)) == 0
+
+    lat, lng = random_points(10, seed=3)
+    tree = SphereKDTree(to_unit_xyz(lat, lng))
+    assert sorted(tree.query_knn(q, 100).tolist()) == list(range(10))
+    assert len(tree.query_knn(q, 0)) == 0
+
+
+def test_parking_lot_index_radius_and_knn():
+    lat, lng = random_points(5000, seed=4)
+    lat[5] = np.nan     # 좌표가 없는 주차장은 색인에서 제외
+    rows = [(i, f'P{i}', f'주차장{i}', lat[i], lng[i], '서울특별시', '강남구', '주소', i % 50) for i in range(len(lat))]
+    index = ParkingLotIndex(rows, version=7)
+    assert len(index) == 4999 and index.version == 7
+
+    dist = haversine(37.5, 127.0, lat, lng)
+    lots = index.query_radius(37.5, 127.0, 20000)
+    expected = np.flatnonzero(dist <= 20000)
+    assert sorted(lot.id for lot in lots) == sorted(expected.tolist())
+    distances = [lot.distance for lot in lots]
+    assert distances == sorted(distances)
+
+    nearest = index.query_knn(37.5, 127.0, 10)
+    np.testing.assert_allclose([lot.distance for lot in nearest], np.sort(dist[~np.isnan(dist)])[:10])
+
+
+def test_index_holder_rebuilds_on_new_version():
+    built = []
+
+    def loader(version):
+        built.append(version)
+        return ParkingLotIndex([(1, 'P1', 'a', 37.5, 127.0, 's', 'g', 'addr', 1)], version)
+
+    holder = IndexHolder(loader)
+    first = holder.get(1)
+    assert holder.get(1) is first
+    assert holder.get(2).version == 2
+    assert built == [1, 2]
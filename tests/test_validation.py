@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from src.utils import valid_check_with_logging
+from src.validation import BatchValidator, to_floats
+
+REQUIRED_KEYS = ['id', 'name', 'lat', 'lng']
+NUMBER_KEYS = ['lat', 'lng', 'space']
+RANGES = {'lat': (-90, 90), 'lng': (-180, 180)}
+VALUES = [None, '', '   ', '\t', 'abc', '12', ' 3.5 ', '-0', '1e3', 'nan', 'inf', '1_000', '١٢٣', '0x10',
+          b'7', 7, 2.5, float('nan'), True, [1], {'a': 1}, '37.5', '127.0', '95', '-200', '-inf']
+
+
+def fuzzed_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [{key: rng.choice(VALUES) for key in ['id', 'name', 'lat', 'lng', 'space']} for _ in range(n)]
+
+
+def test_batch_validator_matches_dict_loop():
+    rows = fuzzed_rows(5000)
+    expected = valid_check_with_logging([dict(row) for row in rows], REQUIRED_KEYS, NUMBER_KEYS, RANGES)
+
+    columns = {key: [row.get(key) for row in rows] for key in ['id', 'name', 'lat', 'lng', 'space']}
+    result = BatchValidator(REQUIRED_KEYS, NUMBER_KEYS, RANGES).validate(columns)
+
+    assert any('Out of range: lat(95)' in msg for msg in result.error_msg.tolist())
+    assert result.error_yn.tolist() == [row['error_yn'] for row in expected]
+    assert result.error_msg.tolist() == [row['error_msg'] for row in expected]
+    assert len(result) == len(rows)
+
+
+def test_batch_validator_string_columns():
+    columns = {'id': np.array(['a', '', ' ', 'b'], dtype=np.dtypes.StringDType()),
+               'lat': np.array(['1', 'x', '2', '3'], dtype=np.dtypes.StringDType())}
+    result = BatchValidator(['id'], ['lat']).validate(columns)
+    assert result.valid.tolist() == [True, False, False, True]
+    assert result.error_msg[1] == 'Missing required key: id | Invalid number format: lat(x)'
+
+
+def test_batch_validator_ranges_and_errors_table():
+    frame = pd.DataFrame({'lat': ['37.5', '95', None, 'x'], 'lng': ['127', '127', '127', '127']})
+    result = BatchValidator(['lat'], ['lat'], ranges={'lat': (-90, 90)}).validate(frame)
+    assert result.valid.tolist() == [True, False, False, False]
+    assert result.error_msg[1] == 'Out of range: lat(95)'
+    assert list(result.errors['rule']) == ['required', 'number_null', 'number_format', 'range']
+    assert result.valid_subset(frame)['lat'].tolist() == ['37.5']
+
+
+def test_to_floats_follows_float():
+    numbers, invalid = to_floats(['1', ' 2 ', '1_000', '١٢٣', 'x', None])
+    assert numbers[:4].tolist() == [1.0, 2.0, 1000.0, 123.0]
+    assert invalid.tolist() == [False, False, False, False, True, False]
+    assert np.isnan(numbers[5])
+
+
+def test_non_finite_coordinates_are_out_of_range():
+    values = ['nan', 'inf', '-inf', float('nan'), float('inf'), '37', None, 'x']
+    result = BatchValidator(['lat'], ['lat'], {'lat': (33, 39)}).validate({'lat': values})
+    assert result.valid.tolist() == [False, False, False, False, False, True, False, False]
+    assert result.error_msg.tolist()[:5] == ['Out of range: lat(nan)', 'Out of range: lat(inf)', 'Out of range: lat(-inf)',
+                                             'Out of range: lat(nan)', 'Out of range: lat(inf)']
+    assert result.error_msg[7] == 'Invalid number format: lat(x)'     # 숫자가 아니면 범위 오류는 붙이지 않음
+
+    rows = valid_check_with_logging([{'lat': val} for val in values], ['lat'], ['lat'], {'lat': (33, 39)})
+    assert [row['error_msg'] for row in rows] == result.error_msg.tolist()